@@ -1,82 +1,940 @@
+import numpy as np
 import pandas as pd
-from pydantic import BaseModel
+from concurrent.futures import ProcessPoolExecutor
+from pydantic import BaseModel, PrivateAttr
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import warnings
 
 # local imports
-from extract_school_names import ExtractSchoolNames
-from extract_author_names import ExtractAuthorNames
-from gender_classifier import RunGenderClassifier
+from choices import GENDER_BACKENDS, ROLES
+from fetch_policy import FetchPolicy
+from fetcher import AsyncFetcher
+from gender_cache import GenderCache
+from gender_classifier import RunGenderClassifier, labelled_names_path
+from genderize_client import GenderizeClient
+from http_session import PooledSession
+from instrumentation import Metrics, NULL_METRICS
+from name_index import MISSING_ID, NameIndex
+from name_parser import PART_COLUMNS, parse_names
+from response_cache import ResponseCache
+from run_journal import RunJournal
+from sinks import make_sink, to_arrow
+import fetch_policy
+import fetcher
+import gender_cache
+import genderize_client
+import http_session
+import job_queue
+import journal_frontier
+import page_index
+import quota_ledger
+import response_cache
 import school_constants
 import journal_constants
 
 
 class StatNameScraper(BaseModel):
+    """
+    Attributes:
+        max_concurrency (int): maximum number of page downloads in flight
+        host_concurrency (Dict[str, int]): maximum number of page downloads in flight per host
+        pool_maxsize (int): maximum number of kept alive connections per host
+        http2 (bool): use HTTP/2 where supported, requires httpx[http2]
+        cache_dir (str): folder of the on-disk response cache. If None and not offline, pages are not cached
+        offline (bool): run entirely from cached pages without network access
+        parser (str): html parser backend, one of html_parser.PARSERS
+        batch_size (int): number of names classified and written at once when streaming
+        parse_workers (int): number of processes parsing pages while others download. If 0, pages are parsed
+            in this process after all downloads finish
+        genderize_url (str): genderize.io endpoint, e.g. a local stand-in for benchmarks
+        gender_cache_path (str): SQLite file of the first name gender cache
+        quota_ledger_path (str): SQLite file of the genderize.io quota ledger. Lookups beyond the daily quota are
+            queued there, most frequent names and faculty first, and left unclassified until a later run. If
+            None, every lookup is sent at once
+        daily_quota (int): genderize.io names per day assumed before a response reports the limit
+        gender_backend (str): classifier of first names, genderize for genderize.io or name_table for the offline
+            name table at name_table_path
+        name_table_path (str): name table file written by name_table.build_name_table. With the genderize
+            backend it classifies the names genderize.io leaves without a gender. If None, there is no fallback
+            and the name_table backend reads name_table.TABLE_PATH
+        metrics_json (str): file the json summary of stage and per url timings is written to after a run
+        metrics_prometheus (str): file the same metrics are written to in the Prometheus text format. If neither
+            metrics file is set, nothing is recorded
+        schools (List[str]): schools scraped. If None, every school in school_constants
+        roles (List[str]): roles scraped, any of faculty, phd and author
+        journals (List[str]): journals scraped. If None, every journal in journal_constants.WEBSITES
+        max_retries (int): retries of a page after a connection error, timeout, 429 or 5xx
+        hedge_percentile (float): latency percentile of a host after which a duplicate request is sent. If None,
+            requests are not hedged
+        journal_path (str): append-only journal the names of every page and every classification batch are
+            written to as soon as they are done. If None, nothing is journaled
+        resume (bool): replay the journal of an earlier run, so pages and persons it finished are neither
+            fetched nor classified again, and continue from the first unfinished page
+    """
+
+    max_concurrency: int = fetcher.MAX_CONCURRENCY
+    host_concurrency: Dict[str, int] = fetcher.HOST_CONCURRENCY
+    pool_maxsize: int = http_session.POOL_MAXSIZE
+    http2: bool = False
+    cache_dir: Optional[str] = None
+    offline: bool = False
+    parser: str = "html.parser"
+    batch_size: int = 500
+    parse_workers: int = 0
+    genderize_url: str = genderize_client.API_URL
+    gender_cache_path: str = gender_cache.CACHE_PATH
+    quota_ledger_path: Optional[str] = quota_ledger.LEDGER_PATH
+    daily_quota: Optional[int] = None
+    gender_backend: str = "genderize"
+    name_table_path: Optional[str] = None
+    metrics_json: Optional[str] = None
+    metrics_prometheus: Optional[str] = None
+    schools: Optional[List[str]] = None
+    roles: List[str] = ROLES
+    journals: Optional[List[str]] = None
+    max_retries: int = fetch_policy.MAX_RETRIES
+    hedge_percentile: Optional[float] = None
+    journal_path: Optional[str] = None
+    resume: bool = False
+
+    _session: PooledSession = PrivateAttr(default=None)
+    _gender_cache: GenderCache = PrivateAttr(default=None)
+    _quota_ledger: Any = PrivateAttr(default=None)
+    _name_table: Any = PrivateAttr(default=None)
+    _metrics: Metrics = PrivateAttr(default=None)
+    _name_index: NameIndex = PrivateAttr(default_factory=NameIndex)
+    _person_preds: List = PrivateAttr(default_factory=list)
+    _person_probabilities: List[float] = PrivateAttr(default_factory=list)
+    _person_parts: Dict[str, List] = PrivateAttr(
+        default_factory=lambda: {column: [] for column in PART_COLUMNS}
+    )
+    _failed_urls: Dict[str, str] = PrivateAttr(default_factory=dict)
+    _skipped: List[Dict[str, str]] = PrivateAttr(default_factory=list)
+    _validation: pd.DataFrame = PrivateAttr(default=None)
+    _journal: RunJournal = PrivateAttr(default=None)
+
     def pipeline(self) -> pd.DataFrame:
         """Pipeline for scraping names from top statistics departments and journals
 
         For "Revisiting the Glass Ceiling: A Study of the Gender Gap in Statistics Academia" abstract presented
         at 2022 WSDS Conference. Departments scraped are the top 29 from 2022 U.S. News Best Statistics Program
-        Rankings. Top journals' (SRJ Journal 2021 rankings) 2021 issues
+        Rankings. Top journals' (SRJ Journal 2021 rankings) 2021 issues. The hand labelled names are classified
+        too and their validation report is kept for validation_report
 
         Return:
-            pd.DataFrame: [school/journal, full_name, pred_gender]
+            pd.DataFrame: [school/journal, role, name, person_id, pred, probability] and name_parser.PART_COLUMNS
         """
 
-        # Get all school and journal names
-        all_names_df = self._get_all_names_schools("faculty")
-        all_names_df.append(self._get_all_names_schools("phd"))
-        all_names_df.append(self._get_all_names_journals())
+        all_names_df = self.get_all_names()
 
         # pull in genderizer and add the column
-        genderClassifier = RunGenderClassifier()
-        all_names_df = genderClassifier.validation_analysis(all_names_df)
+        with self._get_metrics().timer("stage", stage="classify"):
+            all_names_df = self._classify(all_names_df[all_names_df.name.str.strip() != ""])
+        # Validation is a by-product, a missing labelled file must not lose the classified names
+        try:
+            labelled_names_path()
+        except FileNotFoundError as e:
+            warnings.warn(f"Skipping validation: {e}")
+        else:
+            with self._get_metrics().timer("stage", stage="validate"):
+                self._validation = self.validate()
 
+        self.write_metrics()
         return all_names_df
 
-    def _get_all_names_schools(self, role: str) -> pd.DataFrame:
+    def validate(self, labelled_df: pd.DataFrame = None, seed: int = None) -> pd.DataFrame:
+        """Accuracy of the gender classification on hand labelled names
+
+        Arguments:
+            labelled_df (pd.DataFrame): names with columns "name" and "male", 1 if male and 0 if female, and
+                optionally "school" and "role" to break the results down by. Defaults to namesmanual.csv in
+                gender_classifier.FOLDER, or the repository's copy
+            seed (int): seed of the bootstrap intervals
+        Returns:
+            pd.DataFrame: report of RunGenderClassifier.validation_analysis by school and role
+        """
+        if labelled_df is not None:
+            labelled_df = labelled_df[labelled_df["male"].notna()].reset_index(drop=True)
+        genderClassifier = RunGenderClassifier(name_df=labelled_df, **self._classifier_kwargs())
+        return genderClassifier.validation_analysis(seed=seed)
+
+    def validation_report(self) -> Optional[pd.DataFrame]:
+        """Validation report of the latest pipeline run, None before the first run"""
+        return self._validation
+
+    def get_all_names(self) -> pd.DataFrame:
+        """Names of every selected school and journal, without classification
+
+        Pages are parsed in a process pool while downloads continue if parse_workers is set, otherwise after
+        all downloads finish.
+
+        Returns:
+            pd.DataFrame: [school/journal, role, name]. role is faculty, phd or author
+        """
+        metrics = self._get_metrics()
+
+        # Get all school and journal names
+        if self.parse_workers > 0:
+            with metrics.timer("stage", stage="fetch_parse"):
+                all_names_df = self._get_all_names_parallel()
+        else:
+            # Download every page up front so parsing does not wait on each round trip
+            with metrics.timer("stage", stage="fetch"):
+                pages = self._fetch_all_pages()
+            with metrics.timer("stage", stage="parse"):
+                all_names_df = pd.concat(
+                    [
+                        self._get_all_names_schools("faculty", pages),
+                        self._get_all_names_schools("phd", pages),
+                        self._get_all_names_journals(pages),
+                    ],
+                    ignore_index=True,
+                )
+        return all_names_df
+
+    def update_rosters(
+        self, index_path: str = page_index.INDEX_PATH
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Incremental run that only parses changed pages and only classifies new names
+
+        Pages whose normalized body and extraction rules match the last run reuse the names stored in the page
+        index. Rosters are compared with the last run per school/journal and role.
+
+        Arguments:
+            index_path (str): json file of the page index kept between runs
+
+        Returns:
+            pd.DataFrame: [school/journal, role, name, person_id, pred, probability] and name_parser.PART_COLUMNS
+                of the names added since the last run
+            pd.DataFrame: [school/journal, role, name, change] names added or removed since the last run
+        """
+        from page_index import PageIndex, roster_diff
+        from parse_worker import parse_page, rules_fingerprint
+
+        metrics = self._get_metrics()
+        index = PageIndex(index_path)
+        units = self._all_units()
+        with metrics.timer("stage", stage="fetch"):
+            pages = self._fetch_all_pages()
+
+        groups = list(dict.fromkeys((source, role) for source, role, _ in units))
+        previous = {group: index.previous_names(*group) for group in groups}
+        current = {group: [] for group in groups}
+        # Parsed pages enter the index only once their whole roster succeeded, see below
+        parsed = {group: [] for group in groups}
+        skipped = set()
+
+        for source, role, url in units:
+            if (source, role) in skipped:
+                continue
+            if url not in pages:
+                self._skip(source, role, self._failed_urls.get(url, f"{url} was not fetched"))
+                skipped.add((source, role))
+                continue
+            text = pages[url]
+            rules = rules_fingerprint(source, role)
+            names = index.lookup(source, role, url, text, rules)
+            if names is None:
+                try:
+                    with metrics.timer("parse", source=source, role=role, url=url):
+                        names = parse_page(source, role, url, text, self.parser)
+                except Exception as e:
+                    self._skip(source, role, f"{type(e).__name__}: {e}")
+                    skipped.add((source, role))
+                    continue
+                parsed[(source, role)].append((url, text, names, rules))
+            else:
+                metrics.count("pages_unchanged", source=source, role=role)
+            current[(source, role)].extend(names)
+
+        rows = []
+        for (source, role), names in current.items():
+            # A skipped roster is compared again on the next run instead of showing everyone as removed, and
+            # its pages stay as they were indexed so names added on them are reported then
+            if (source, role) in skipped:
+                continue
+            for url, text, page_names, rules in parsed[(source, role)]:
+                index.update(source, role, url, text, page_names, rules)
+            changes = roster_diff(previous[(source, role)], names)
+            for change, changed_names in changes.items():
+                rows.extend((source, role, name, change) for name in changed_names)
+        diff_df = pd.DataFrame(rows, columns=["school/journal", "role", "name", "change"])
+
+        added_df = diff_df[(diff_df.change == "added") & (diff_df.name.str.strip() != "")]
+        added_df = added_df.drop(columns="change").reset_index(drop=True)
+        if len(added_df) > 0:
+            with metrics.timer("stage", stage="classify"):
+                added_df = self._classify(added_df)
+
+        # Pages of sources left out of a partial run stay in the index
+        index.retain(self._all_units(selected=False))
+        index.save()
+        self.write_metrics()
+        return added_df, diff_df
+
+    def crawl_journals(
+        self,
+        journals: List[str] = None,
+        first_year: int = None,
+        last_year: int = None,
+        checkpoint_path: str = journal_frontier.CHECKPOINT_PATH,
+    ) -> pd.DataFrame:
+        """Crawl every volume and issue of the journals in journal_constants.URL_TEMPLATES and classify authors
+
+        Volumes stop at their first missing issue and progress is checkpointed, so an interrupted crawl picks
+        up where it stopped when run again with the same checkpoint.
+
+        Arguments:
+            journals (List[str]): journals to crawl. Defaults to every journal with a url template
+            first_year (int): skip volumes published before this year
+            last_year (int): skip volumes published after this year
+            checkpoint_path (str): json file crawl progress is saved to. If None, progress is not saved
+
+        Returns:
+            pd.DataFrame: [school/journal, role, name, volume, issue, year, url, person_id, pred, probability] and
+                name_parser.PART_COLUMNS
+        """
+        from journal_frontier import JournalCrawler, build_frontier
+
+        crawler = JournalCrawler(
+            session=self._get_session(),
+            max_concurrency=self.max_concurrency,
+            host_concurrency=self.host_concurrency,
+            parser=self.parser,
+            checkpoint_path=checkpoint_path,
+            metrics=self._get_metrics(),
+        )
+        with self._get_metrics().timer("stage", stage="crawl"):
+            records = crawler.crawl(build_frontier(journals, first_year, last_year))
+        names_df = pd.DataFrame(
+            records,
+            columns=["school/journal", "role", "name", "volume", "issue", "year", "url"],
+        )
+        if len(names_df) > 0:
+            with self._get_metrics().timer("stage", stage="classify"):
+                names_df = self._classify(names_df)
+        self.write_metrics()
+        return names_df
+
+    def enqueue(self, queue_path: str = job_queue.QUEUE_PATH) -> int:
+        """Add a unit per selected page to a job queue for work to process
+
+        Arguments:
+            queue_path (str): SQLite file of the job queue
+        Returns:
+            int: number of units added, units already queued are kept as they are
+        """
+        from job_queue import JobQueue, WorkUnit
+
+        queue = JobQueue(queue_path)
+        try:
+            return queue.add(WorkUnit(*unit) for unit in self._all_units())
+        finally:
+            queue.close()
+
+    def work(
+        self, queue_path: str = job_queue.QUEUE_PATH, worker: str = None, max_units: int = None
+    ) -> int:
+        """Claim units from a job queue, fetch and parse their pages and store the names, until none are left
+
+        Any number of workers may share a queue, on this machine or others. Units are claimed max_concurrency at
+        a time so their pages download concurrently, and a unit whose page fails is handed back to the queue.
+
+        Arguments:
+            queue_path (str): SQLite file of the job queue
+            worker (str): identifier of this worker. Defaults to a unique name from the host and process
+            max_units (int): stop after this many units. If None, work until the queue is empty
+        Returns:
+            int: number of units processed
+        """
+        from job_queue import JobQueue, worker_name
+        from parse_worker import parse_page
+
+        metrics = self._get_metrics()
+        queue = JobQueue(queue_path)
+        worker = worker_name() if worker is None else worker
+        page_fetcher = AsyncFetcher(
+            max_concurrency=self.max_concurrency,
+            host_concurrency=self.host_concurrency,
+            session=self._get_session(),
+            metrics=metrics,
+        )
+        num_units = 0
+        try:
+            while max_units is None or num_units < max_units:
+                limit = self.max_concurrency
+                if max_units is not None:
+                    limit = min(limit, max_units - num_units)
+                units = queue.claim(worker, limit)
+                if not units:
+                    break
+                with metrics.timer("stage", stage="fetch"):
+                    pages = page_fetcher.fetch_all(unit.url for unit in units)
+                queue.renew(worker, units)
+                for unit in units:
+                    if unit.url not in pages:
+                        queue.fail(worker, unit, page_fetcher.failed.get(unit.url, "not fetched"))
+                        continue
+                    try:
+                        names = parse_page(*unit, pages[unit.url], self.parser)
+                    except Exception as e:
+                        queue.fail(worker, unit, f"{type(e).__name__}: {e}")
+                        continue
+                    queue.complete(unit, names)
+                num_units += len(units)
+        finally:
+            queue.close()
+        self.write_metrics()
+        return num_units
+
+    def merge_queue(self, queue_path: str = job_queue.QUEUE_PATH) -> pd.DataFrame:
+        """Classified names of every school and journal role a job queue finished
+
+        Roles with a failed or unfinished unit are left out and listed by skipped_sources.
+
+        Arguments:
+            queue_path (str): SQLite file of the job queue
+        Returns:
+            pd.DataFrame: [school/journal, role, url, name, person_id, pred, probability] and
+                name_parser.PART_COLUMNS
+        """
+        from job_queue import JobQueue
+
+        queue = JobQueue(queue_path)
+        try:
+            names_df = queue.merge()
+            incomplete_df = queue.incomplete()
+        finally:
+            queue.close()
+        for (source, role), units_df in incomplete_df.groupby(["school/journal", "role"], sort=False):
+            unit = units_df.iloc[0]
+            self._skip(source, role, f"{unit['status']} {unit['url']}: {unit['error']}")
+
+        with self._get_metrics().timer("stage", stage="classify"):
+            names_df = self._classify(names_df[names_df.name.str.strip() != ""].reset_index(drop=True))
+        self.write_metrics()
+        return names_df
+
+    def iter_records(self) -> Iterator[Dict[str, str]]:
+        """Yield a record per name as each school and journal is parsed
+
+        Pages of one school or journal are fetched concurrently right before they are parsed, so only the
+        current source's pages are held in memory. Blank names are skipped since they cannot be classified.
+
+        Yields:
+            Dict[str, str]: [school/journal, role, name]. role is faculty, phd or author
+        """
+        from extract_author_names import ExtractAuthorNames
+        from extract_school_names import ExtractSchoolNames
+
+        for role in ("faculty", "phd"):
+            for school, urls in self._websites(role).items():
+                extract_names = ExtractSchoolNames(
+                    school=school,
+                    role=role,
+                    pages=self._fetch_pages(urls),
+                    session=self._get_session(),
+                    parser=self.parser,
+                    metrics=self._get_metrics(),
+                )
+                for name in self._extract(extract_names, school, role, urls):
+                    if name.strip():
+                        yield {"school/journal": school, "role": role, "name": name}
+
+        for journal, urls in self._websites("author").items():
+            extract_names = ExtractAuthorNames(
+                journal=journal,
+                pages=self._fetch_pages(urls),
+                session=self._get_session(),
+                parser=self.parser,
+                metrics=self._get_metrics(),
+            )
+            for name in self._extract(extract_names, journal, "author", urls):
+                if name.strip():
+                    yield {"school/journal": journal, "role": "author", "name": name}
+
+    def stream(self) -> Iterator[pd.DataFrame]:
+        """Yield classified micro-batches of batch_size names as the crawl progresses
+
+        Yields:
+            pd.DataFrame: [school/journal, role, name, person_id, pred, probability] and name_parser.PART_COLUMNS
+        """
+        batch = []
+        for record in self.iter_records():
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                yield self._classify(pd.DataFrame(batch))
+                batch = []
+        if batch:
+            yield self._classify(pd.DataFrame(batch))
+
+    def stream_arrow(self) -> Iterator:
+        """Yield classified micro-batches as Arrow record batches. Requires pyarrow
+
+        Source, role and gender are dictionary encoded, see sinks.to_arrow.
+
+        Yields:
+            pyarrow.RecordBatch: [school/journal, role, name, person_id, probability, gender]
+        """
+        for batch_df in self.stream():
+            yield from to_arrow(batch_df).to_batches()
+
+    def run_streaming(self, output_paths: List[str]) -> int:
+        """Stream classified names into output files as they are produced
+
+        Each batch is flushed to every output before the next is scraped, so partial results can be read while
+        the crawl is still running.
+
+        Arguments:
+            output_paths (List[str]): files ending in .csv, .jsonl or .parquet, or folders ending in / for parquet
+                datasets partitioned by source and year
+        Returns:
+            int: number of names written
+        """
+        sinks = [make_sink(path) for path in output_paths]
+        num_names = 0
+        try:
+            with self._get_metrics().timer("stage", stage="stream"):
+                for batch_df in self.stream():
+                    for sink in sinks:
+                        sink.write(batch_df)
+                    num_names += len(batch_df)
+        finally:
+            for sink in sinks:
+                sink.close()
+            self.write_metrics()
+        return num_names
+
+    def skipped_sources(self) -> pd.DataFrame:
+        """Schools and journals left out of the results because a page could not be fetched or parsed
+
+        Returns:
+            pd.DataFrame: [school/journal, role, reason]
+        """
+        return pd.DataFrame(self._skipped, columns=["school/journal", "role", "reason"])
+
+    def _extract(self, extract_names, source: str, role: str, urls: List[str]) -> List[str]:
+        """Names of one school or journal, or none if it has to be skipped
+
+        Arguments:
+            extract_names (ExtractSchoolNames or ExtractAuthorNames): extractor of the source
+            source (str): name of school or journal
+            role (str): faculty, phd or author
+            urls (List[str]): urls of the source
+        Returns:
+            List[str]: names, empty if a page failed to download or parse
+        """
+        journal = self._get_journal()
+        failed = [url for url in urls if url in self._failed_urls]
+        if failed:
+            self._skip(source, role, self._failed_urls[failed[0]])
+            return []
+        names = []
+        try:
+            for url in urls:
+                page_names = None if journal is None else journal.unit_names(source, role, url)
+                if page_names is None:
+                    page_names = extract_names.get_page_names(url)
+                    if journal is not None:
+                        journal.record_unit(source, role, url, page_names)
+                names.extend(page_names)
+        except Exception as e:
+            self._skip(source, role, f"{type(e).__name__}: {e}")
+            return []
+        return names
+
+    def _skip(self, source: str, role: str, reason: str):
+        self._skipped.append({"school/journal": source, "role": role, "reason": reason})
+        self._get_metrics().count("skipped_sources", source=source, role=role)
+
+    def write_metrics(self):
+        """Write the metrics recorded so far to metrics_json and metrics_prometheus, if set"""
+        if not self._get_metrics().enabled:
+            return
+        if self.metrics_json is not None:
+            self._metrics.write_json(self.metrics_json)
+        if self.metrics_prometheus is not None:
+            self._metrics.write_prometheus(self.metrics_prometheus)
+
+    def _classify(self, names_df: pd.DataFrame) -> pd.DataFrame:
+        """Add predicted gender and name parts to a batch of names
+
+        Names are deduplicated into persons with the scraper's name index, each new person is parsed and
+        classified once and the predictions and parts are joined back to every occurrence.
+
+        Arguments:
+            names_df (pd.DataFrame): should contain a column "name"
+        Returns:
+            pd.DataFrame: names_df with columns person_id, pred, probability, the genderize.io probability of
+                the predicted gender, and name_parser.PART_COLUMNS. Missing names have a null person_id and are
+                left unclassified
+        """
+        journal = self._get_journal()
+        num_persons = len(self._name_index.names)
+        person_ids = self._name_index.add(names_df["name"])
+        new_persons = self._name_index.persons().iloc[num_persons:].reset_index(drop=True)
+        preds = [None] * len(new_persons)
+        probabilities = [np.nan] * len(new_persons)
+        if journal is not None:
+            for i, name in enumerate(new_persons["name"]):
+                entry = journal.person(name)
+                if entry is not None:
+                    preds[i], probabilities[i] = entry
+        todo = [i for i, pred in enumerate(preds) if pred is None]
+        if todo:
+            persons_df = new_persons.iloc[todo].reset_index(drop=True)
+            if "role" in names_df:
+                # role a person was first seen with, used to prioritize lookups within the quota
+                roles = pd.Series(names_df["role"].to_numpy()).groupby(person_ids).first()
+                persons_df["role"] = roles.reindex(persons_df["person_id"]).to_numpy()
+            genderClassifier = RunGenderClassifier(name_df=persons_df, **self._classifier_kwargs())
+            for i, pred, probability in zip(
+                todo, genderClassifier.name_df["pred"], genderClassifier.name_df["probability"]
+            ):
+                preds[i], probabilities[i] = pred, probability
+            if journal is not None:
+                # Unclassified persons are left out so a resumed run asks for them again, e.g. after the quota resets
+                classified_df = genderClassifier.name_df[genderClassifier.name_df["pred"] != "None"]
+                journal.record_batch(
+                    classified_df["name"].tolist(),
+                    classified_df["pred"].tolist(),
+                    classified_df["probability"].tolist(),
+                )
+        self._person_preds.extend(preds)
+        self._person_probabilities.extend(probabilities)
+        # parsed here rather than taken from the classifier so persons replayed from the journal get parts too
+        parts = parse_names(new_persons["name"])
+        for column in PART_COLUMNS:
+            self._person_parts[column].extend(parts[column])
+
+        names_df = names_df.copy()
+        # MISSING_ID of missing names indexes a trailing unclassified person without parts
+        missing = person_ids == MISSING_ID
+        names_df["person_id"] = pd.array(person_ids, dtype="Int64")
+        names_df.loc[missing, "person_id"] = pd.NA
+        names_df["pred"] = np.array(self._person_preds + ["None"], dtype=object)[person_ids]
+        names_df["probability"] = np.array(self._person_probabilities + [np.nan])[person_ids]
+        no_parts = parse_names(pd.Series([None], dtype=object))
+        for column in PART_COLUMNS:
+            names_df[column] = np.array(self._person_parts[column] + no_parts[column].tolist(), dtype=object)[
+                person_ids
+            ]
+        return names_df
+
+    def _classifier_kwargs(self) -> Dict:
+        """Session, cache, backend and fallback shared by every classification of this scraper
+
+        Returns:
+            Dict: keyword arguments for RunGenderClassifier
+        Raises:
+            Exception: "Invalid gender backend: {gender_backend}. Must be one of {GENDER_BACKENDS}"
+        """
+        from quota_ledger import QuotaLedger, QuotaScheduler
+
+        if self.gender_backend not in GENDER_BACKENDS:
+            raise Exception(
+                f"Invalid gender backend: {self.gender_backend}. Must be one of {GENDER_BACKENDS}"
+            )
+        if self._gender_cache is None:
+            self._gender_cache = GenderCache(path=self.gender_cache_path)
+        use_table = self.name_table_path is not None or self.gender_backend == "name_table"
+        if self._name_table is None and use_table:
+            import name_table
+
+            self._name_table = name_table.NameTable(table_path=self.name_table_path or name_table.TABLE_PATH)
+        if self.gender_backend == "name_table":
+            return {
+                "session": self._get_session(),
+                "cache": self._gender_cache,
+                "backend": self._name_table,
+                "metrics": self._get_metrics(),
+            }
+
+        backend = GenderizeClient(session=self._get_session(), api_url=self.genderize_url)
+        if self.quota_ledger_path is not None:
+            if self._quota_ledger is None:
+                self._quota_ledger = QuotaLedger(path=self.quota_ledger_path, daily_limit=self.daily_quota)
+            backend = QuotaScheduler(client=backend, ledger=self._quota_ledger)
+        return {
+            "session": self._get_session(),
+            "cache": self._gender_cache,
+            "backend": backend,
+            "fallback": self._name_table,
+            "metrics": self._get_metrics(),
+        }
+
+    def _get_journal(self) -> Optional[RunJournal]:
+        """Journal of this run, opened on first use and replayed if resuming
+
+        Returns:
+            RunJournal: journal at journal_path, None if journal_path is not set
+        """
+        if self._journal is None and self.journal_path is not None:
+            self._journal = RunJournal(path=self.journal_path, resume=self.resume)
+        return self._journal
+
+    def _get_metrics(self):
+        """Metrics shared by every stage of this scraper
+
+        Returns:
+            Metrics or NullMetrics: recording metrics if a metrics file is set, otherwise a no-op
+        """
+        if self._metrics is None:
+            if self.metrics_json is None and self.metrics_prometheus is None:
+                return NULL_METRICS
+            self._metrics = Metrics()
+        return self._metrics
+
+    def connection_stats(self) -> Dict[str, int]:
+        """Connection reuse counts of the session used by the pipeline
+
+        Returns:
+            Dict[str, int]: number of requests, connections opened and requests served on a reused connection
+        """
+        return self._get_session().stats()
+
+    def _get_session(self) -> PooledSession:
+        """Session shared by the fetcher, extractors and gender classifier of this scraper
+
+        Returns:
+            PooledSession: pooled keep-alive session
+        """
+        if self._session is None:
+            cache = None
+            if self.cache_dir is not None or self.offline:
+                cache = ResponseCache(
+                    directory=self.cache_dir or response_cache.CACHE_DIR,
+                    offline=self.offline,
+                )
+            policy = FetchPolicy(
+                max_retries=self.max_retries, hedge_percentile=self.hedge_percentile
+            )
+            self._session = PooledSession(
+                pool_maxsize=self.pool_maxsize, http2=self.http2, cache=cache, policy=policy
+            )
+        return self._session
+
+    def _fetch_all_pages(self) -> Dict[str, str]:
+        """Download every school and journal page concurrently
+
+        Returns:
+            Dict[str, str]: url to html text
+        """
+        return self._fetch_pages(self._all_urls())
+
+    def _fetch_pages(self, urls: List[str]) -> Dict[str, str]:
+        """Download pages concurrently
+
+        Arguments:
+            urls (List[str]): website urls. Pages of a resumed run's journal are not fetched again
+        Returns:
+            Dict[str, str]: url to html text
+        """
+        journal = self._get_journal()
+        if journal is not None:
+            urls = [url for url in urls if url not in journal.urls]
+        page_fetcher = AsyncFetcher(
+            max_concurrency=self.max_concurrency,
+            host_concurrency=self.host_concurrency,
+            session=self._get_session(),
+            metrics=self._get_metrics(),
+        )
+        pages = page_fetcher.fetch_all(urls)
+        self._failed_urls.update(page_fetcher.failed)
+        return pages
+
+    def _websites(self, role: str, selected: bool = True) -> Dict[str, List[str]]:
+        """Selected schools or journals of a role with their urls
+
+        Arguments:
+            role (str): faculty, phd or author
+            selected (bool): whether to apply the schools, roles and journals selection
+        Returns:
+            Dict[str, List[str]]: school/journal to urls, empty if the role is not selected
+        Raises:
+            Exception: "Invalid choice for role: {role}. Must be one of ['faculty', 'phd', 'author']"
+        """
+        if role == "faculty":
+            websites, sources = school_constants.DEPT_WEBSITES_FACULTY, self.schools
+        elif role == "phd":
+            websites, sources = school_constants.DEPT_WEBSITES_PHD, self.schools
+        elif role == "author":
+            websites, sources = journal_constants.WEBSITES, self.journals
+        else:
+            raise Exception(
+                f"Invalid choice for role: {role}. Must be one of ['faculty', 'phd', 'author']"
+            )
+        if not selected:
+            return websites
+        if role not in self.roles:
+            return {}
+        if sources is None:
+            return websites
+        return {source: urls for source, urls in websites.items() if source in sources}
+
+    def _all_units(self, selected: bool = True) -> List[Tuple[str, str, str]]:
+        """Every selected page with the source and role it is parsed for
+
+        Arguments:
+            selected (bool): whether to apply the schools, roles and journals selection
+        Returns:
+            List[Tuple[str, str, str]]: (school/journal, role, url). role is faculty, phd or author
+        """
+        units = []
+        for role in ("faculty", "phd", "author"):
+            for source, urls in self._websites(role, selected).items():
+                units.extend((source, role, url) for url in urls)
+        return units
+
+    def _all_urls(self, selected: bool = True) -> List[str]:
+        """All selected school and journal urls
+
+        Arguments:
+            selected (bool): whether to apply the schools, roles and journals selection
+        Returns:
+            List[str]: urls of faculty, phd and journal pages
+        """
+        return [url for _, _, url in self._all_units(selected)]
+
+    def _get_all_names_parallel(self) -> pd.DataFrame:
+        """Extract names of every school and journal, parsing in a process pool
+
+        Each page is handed to a worker as soon as it is downloaded so parsing overlaps with the remaining
+        downloads.
+
+        Returns:
+            pd.DataFrame: [school/journal, role, name]
+        """
+        from parse_worker import parse_page
+
+        journal = self._get_journal()
+        units = self._all_units()
+        # Units of a resumed run's journal are replayed instead of fetched and parsed
+        done = {} if journal is None else {unit: journal.unit_names(*unit) for unit in units}
+        units_by_url = {}
+        for source, role, url in units:
+            if done.get((source, role, url)) is None:
+                units_by_url.setdefault(url, []).append((source, role))
+
+        futures = {}
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+
+            def on_page(url: str, text: str):
+                for source, role in units_by_url[url]:
+                    futures[(source, role, url)] = pool.submit(
+                        parse_page, source, role, url, text, self.parser
+                    )
+
+            page_fetcher = AsyncFetcher(
+                max_concurrency=self.max_concurrency,
+                host_concurrency=self.host_concurrency,
+                session=self._get_session(),
+                metrics=self._get_metrics(),
+            )
+            page_fetcher.fetch_all(units_by_url, on_page=on_page)
+            self._failed_urls.update(page_fetcher.failed)
+
+            # Collect whole sources so one failed page skips its school or journal
+            group_names = {}
+            for source, role, url in units:
+                group = (source, role)
+                if group_names.get(group, []) is None:
+                    continue
+                try:
+                    page_names = done.get((source, role, url))
+                    if page_names is None:
+                        if url in self._failed_urls:
+                            raise Exception(self._failed_urls[url])
+                        page_names = futures[(source, role, url)].result()
+                        if journal is not None:
+                            journal.record_unit(source, role, url, page_names)
+                    group_names.setdefault(group, []).extend(page_names)
+                except Exception as e:
+                    self._skip(source, role, str(e))
+                    group_names[group] = None
+
+            sources = []
+            roles = []
+            names = []
+            for (source, role), full_name in group_names.items():
+                if full_name is None:
+                    continue
+                sources.extend([source] * len(full_name))
+                roles.extend([role] * len(full_name))
+                names.extend(full_name)
+
+        final_df = pd.DataFrame({"school/journal": sources, "role": roles, "name": names})
+        return final_df
+
+    def _get_all_names_schools(
+        self, role: str, pages: Dict[str, str] = None
+    ) -> pd.DataFrame:
         """Extract names from schools
 
         Iterate through all schools to pull names of phd students or faculty
 
         Arguments:
             role (str): faculty or phd
+            pages (Dict[str, str]): already fetched html keyed by url
 
         Returns:
-            pd.DataFrame: [school/journal, name]
+            pd.DataFrame: [school/journal, role, name]
         """
+        from extract_school_names import ExtractSchoolNames
 
-        final_df = pd.DataFrame()
-        for school in school_constants.DEPT_WEBSITES_FACULTY.keys():
-            extract_names = ExtractSchoolNames(school=school, role=role)
-            full_name = extract_names.pipeline()
+        all_names_dfs = []
+        for school, urls in self._websites(role).items():
+            extract_names = ExtractSchoolNames(
+                school=school,
+                role=role,
+                pages=pages,
+                session=self._get_session(),
+                parser=self.parser,
+                metrics=self._get_metrics(),
+            )
+            full_name = self._extract(extract_names, school, role, urls)
 
             names_df = pd.DataFrame(
                 {
                     "school/journal": school,
+                    "role": role,
                     "name": full_name,
                 }
             )
 
-            final_df.append(names_df)
+            all_names_dfs.append(names_df)
 
+        if not all_names_dfs:
+            return pd.DataFrame(columns=["school/journal", "role", "name"])
+        final_df = pd.concat(all_names_dfs, ignore_index=True)
         return final_df
 
-    @staticmethod
-    def _get_all_names_journals() -> pd.DataFrame:
+    def _get_all_names_journals(self, pages: Dict[str, str] = None) -> pd.DataFrame:
         """
         Iterate through all journals to pull name.
 
+        Arguments:
+            pages (Dict[str, str]): already fetched html keyed by url
+
         Returns:
-            pd.DataFrame: [school/journal, fullname, firstname]
+            pd.DataFrame: [school/journal, role, name]
         """
+        from extract_author_names import ExtractAuthorNames
 
         journals = []
         names = []
 
-        for journal in journal_constants.WEBSITES.keys():
-            extract_names = ExtractAuthorNames(journal=journal)
-            full_name = extract_names.pipeline()
+        for journal, urls in self._websites("author").items():
+            extract_names = ExtractAuthorNames(
+                journal=journal,
+                pages=pages,
+                session=self._get_session(),
+                parser=self.parser,
+                metrics=self._get_metrics(),
+            )
+            full_name = self._extract(extract_names, journal, "author", urls)
             journals.extend([journal] * len(full_name))
             names.extend(full_name)
 
-        final_df = pd.DataFrame({"school/journal": journals, "name": names})
+        final_df = pd.DataFrame({"school/journal": journals, "role": "author", "name": names})
         return final_df
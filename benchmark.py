@@ -0,0 +1,298 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+# local imports
+from StatNameScraper import StatNameScraper
+from gender_cache import GenderCache
+from gender_classifier import RunGenderClassifier
+from genderize_client import GenderizeClient
+from http_session import PooledSession
+from parse_worker import parse_page
+from response_cache import ResponseCache
+
+#global constants
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_fixtures")
+REPORT_PATH = "benchmark_report.json"
+MANUAL_NAMES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "namesmanual.csv")
+# A benchmark more than this much slower than the baseline report is flagged
+SLOWDOWN_THRESHOLD = 0.2
+
+
+class _GenderizeStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for genderize.io answering every name without a network round trip"""
+
+    def do_GET(self):
+        names = parse_qs(urlparse(self.path).query).get("name[]", [])
+        body = json.dumps(
+            [
+                {
+                    "name": name,
+                    "gender": "female" if len(name) % 2 else "male",
+                    "probability": 0.9,
+                    "count": 100,
+                }
+                for name in names
+            ]
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Rate-Limit-Remaining", str(10**9))
+        self.send_header("X-Rate-Limit-Reset", "86400")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Benchmark:
+    def __init__(
+        self,
+        fixture_dir: str = FIXTURE_DIR,
+        repeat: int = 5,
+        parser: str = "html.parser",
+    ):
+        """Benchmarks of parsing, classification and the full pipeline on recorded pages
+
+        Pages are recorded once with record() into fixture_dir, which is a ResponseCache directory, and every
+        benchmark replays them offline. Only schools and journals with a recorded page are benchmarked. The
+        repository ships hand-made pages in FIXTURE_DIR so the benchmark runs without recording, at least one
+        school per kind of extraction rule, e.g. role rows, tables, a container and strained pages, and the
+        jss and jasa issues. Genderize.io is replaced by a local http server.
+
+        Attributes:
+            fixture_dir (str): folder of recorded pages
+            repeat (int): number of timed runs of each benchmark, the median is reported
+            parser (str): html parser backend, one of html_parser.PARSERS
+        """
+        self.fixture_dir = fixture_dir
+        self.repeat = repeat
+        self.parser = parser
+        self._sources = None
+
+    def record(self) -> Dict[str, int]:
+        """Download every configured page into the fixture folder
+
+        Returns:
+            Dict[str, int]: number of pages recorded and failed
+        """
+        session = PooledSession(cache=ResponseCache(self.fixture_dir))
+        recorded = 0
+        failed = 0
+        for url in StatNameScraper()._all_urls():
+            try:
+                session.fetch_text(url)
+                recorded += 1
+            except Exception as e:
+                print(f"Could not record {url}: {e}", file=sys.stderr)
+                failed += 1
+        self._sources = None
+        return {"recorded": recorded, "failed": failed}
+
+    def run(self) -> Dict:
+        """Run every benchmark
+
+        Returns:
+            Dict: machine readable report
+        """
+        report = {
+            "created_at": time.time(),
+            "python": platform.python_version(),
+            "parser": self.parser,
+            "repeat": self.repeat,
+            "sources": self._recorded_sources(),
+            "benchmarks": {},
+        }
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _GenderizeStandIn)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        api_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            names = self._bench_parsing(report["benchmarks"])
+            self._bench_classifier(report["benchmarks"], names, api_url)
+            self._bench_pipeline(report["benchmarks"], api_url)
+        finally:
+            server.shutdown()
+        return report
+
+    def _bench_parsing(self, results: Dict) -> List[str]:
+        """Time parse and role filtering of every school role and journal
+
+        Returns:
+            List[str]: every name extracted, used as classifier input
+        """
+        cache = ResponseCache(self.fixture_dir, offline=True)
+        units = {}
+        for source, role, url in self._scraper()._all_units():
+            units.setdefault((source, role), []).append(url)
+
+        all_names = []
+        for (source, role), urls in units.items():
+            key = f"parse/{role}/{source}"
+            entries = [(url, cache.load(url)) for url in urls]
+            if any(entry is None for _, entry in entries):
+                results[key] = {"error": "missing fixture"}
+                continue
+            pages = [(url, entry["body"]) for url, entry in entries]
+
+            def parse():
+                return [parse_page(source, role, url, text, self.parser) for url, text in pages]
+
+            try:
+                result = self._time(parse)
+            except Exception as e:
+                results[key] = {"error": f"{type(e).__name__}: {e}"}
+                continue
+            names = [name for page_names in parse() for name in page_names]
+            if not names:
+                # a page the extraction rules no longer match, timing it would hide the breakage
+                results[key] = {"error": "no names extracted"}
+                continue
+            result["names"] = len(names)
+            result["bytes"] = sum(len(text) for _, text in pages)
+            results[key] = result
+            all_names.extend(names)
+        return all_names
+
+    def _bench_classifier(self, results: Dict, names: List[str], api_url: str):
+        """Time RunGenderClassifier with a cold cache against the local stand-in"""
+        names = [name for name in names if name.strip()]
+        if not names:
+            names = pd.read_csv(MANUAL_NAMES)["name"].tolist()
+        name_df = pd.DataFrame({"name": names})
+
+        def classify():
+            with tempfile.TemporaryDirectory() as folder:
+                RunGenderClassifier(
+                    name_df=name_df.copy(),
+                    cache=GenderCache(os.path.join(folder, "cache.sqlite")),
+                    backend=GenderizeClient(api_url=api_url),
+                )
+
+        result = self._time(classify)
+        result["names"] = len(names)
+        result["names_per_second"] = len(names) / result["median"]
+        results["classifier/genderize"] = result
+
+    def _bench_pipeline(self, results: Dict, api_url: str):
+        """Time the full scrape and classification from fixtures, batched with pipeline and streamed"""
+
+        def make_scraper(folder: str) -> StatNameScraper:
+            return self._scraper(
+                cache_dir=self.fixture_dir,
+                offline=True,
+                parser=self.parser,
+                genderize_url=api_url,
+                gender_cache_path=os.path.join(folder, "cache.sqlite"),
+                quota_ledger_path=os.path.join(folder, "quota.sqlite"),
+            )
+
+        def pipeline():
+            with tempfile.TemporaryDirectory() as folder:
+                make_scraper(folder).pipeline()
+
+        def stream():
+            with tempfile.TemporaryDirectory() as folder:
+                make_scraper(folder).run_streaming([os.path.join(folder, "names.csv")])
+
+        for key, function in (("pipeline/batch", pipeline), ("pipeline/stream", stream)):
+            try:
+                results[key] = self._time(function)
+            except Exception as e:
+                results[key] = {"error": f"{type(e).__name__}: {e}"}
+
+    def _recorded_sources(self) -> List[str]:
+        """Schools and journals with at least one page in the fixture folder, found once per benchmark"""
+        if self._sources is None:
+            cache = ResponseCache(self.fixture_dir, offline=True)
+            self._sources = sorted(
+                {source for source, _, url in StatNameScraper()._all_units() if cache.load(url) is not None}
+            )
+        return self._sources
+
+    def _scraper(self, **kwargs) -> StatNameScraper:
+        """Scraper of the recorded schools and journals"""
+        sources = self._recorded_sources()
+        return StatNameScraper(schools=sources, journals=sources, **kwargs)
+
+    def _time(self, function: Callable) -> Dict[str, float]:
+        times = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+        return {"median": statistics.median(times), "min": min(times), "max": max(times)}
+
+
+def errors(report: Dict) -> List[str]:
+    """Benchmarks that could not run, e.g. a missing fixture or one yielding no names
+
+    Arguments:
+        report (Dict): report of a run
+    Returns:
+        List[str]: description of each error
+    """
+    return [f"{key}: {result['error']}" for key, result in report["benchmarks"].items() if "error" in result]
+
+
+def compare(report: Dict, baseline: Dict, threshold: float = SLOWDOWN_THRESHOLD) -> List[str]:
+    """Benchmarks that got slower than a baseline report
+
+    Arguments:
+        report (Dict): report of this run
+        baseline (Dict): earlier report
+        threshold (float): allowed relative increase of the median time
+    Returns:
+        List[str]: description of each slowdown
+    """
+    slowdowns = []
+    for key, result in report["benchmarks"].items():
+        before = baseline["benchmarks"].get(key, {})
+        if "median" not in result or "median" not in before:
+            continue
+        if result["median"] > before["median"] * (1 + threshold):
+            slowdowns.append(
+                f"{key}: {before['median']:.4f}s -> {result['median']:.4f}s"
+            )
+    return slowdowns
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark StatNameScraper on recorded pages")
+    arg_parser.add_argument("--record", action="store_true", help="download fixtures first")
+    arg_parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--parser", default="html.parser")
+    arg_parser.add_argument("--output", default=REPORT_PATH)
+    arg_parser.add_argument("--baseline", help="earlier report to check for slowdowns")
+    args = arg_parser.parse_args()
+
+    benchmark = Benchmark(fixture_dir=args.fixtures, repeat=args.repeat, parser=args.parser)
+    if args.record:
+        print(benchmark.record())
+    report = benchmark.run()
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    failures = errors(report)
+    for failure in failures:
+        print(f"Failed: {failure}")
+    slowdowns = []
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            slowdowns = compare(report, json.load(f))
+        for slowdown in slowdowns:
+            print(f"Slower than baseline: {slowdown}")
+    sys.exit(1 if failures or slowdowns else 0)
@@ -0,0 +1,7 @@
+# Choices shared by the command line and the modules that implement them. This module imports nothing, so cli.py
+# can offer them without loading bs4, pandas or pydantic
+
+#global constants
+ROLES = ["faculty", "phd", "author"]
+PARSERS = ["html.parser", "lxml", "selectolax"]
+GENDER_BACKENDS = ["genderize", "name_table"]
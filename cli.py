@@ -0,0 +1,358 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# local imports
+# Only the constants are imported up front so --help and partial runs start without pandas, bs4 or the
+# http stack. Every stage imports what it needs when it runs
+from choices import GENDER_BACKENDS, PARSERS, ROLES
+import journal_constants
+import school_constants
+
+#global constants
+# Most milliseconds importing this module may take, checked by the check-imports command
+IMPORT_BUDGET_MS = 50
+# Modules that must not be imported until a stage needs them
+HEAVY_MODULES = ["pandas", "numpy", "bs4", "lxml", "requests", "httpx", "pydantic", "pyarrow"]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Argument parser of every command
+
+    Returns:
+        argparse.ArgumentParser: parser of every command
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog="statgenderizer",
+        description="Scrape statistics department and journal names and classify their gender",
+    )
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="print the configured schools and journals")
+
+    selection = argparse.ArgumentParser(add_help=False)
+    selection.add_argument("--schools", nargs="+", help="schools to scrape, default all")
+    selection.add_argument("--roles", nargs="+", choices=ROLES, default=ROLES)
+    selection.add_argument("--journals", nargs="+", help="journals to scrape, default all")
+
+    scraper = argparse.ArgumentParser(add_help=False)
+    scraper.add_argument("--max-concurrency", type=int, help="page downloads in flight")
+    scraper.add_argument("--parse-workers", type=int, default=0, help="processes parsing pages")
+    scraper.add_argument("--batch-size", type=int, help="names classified and written at once")
+    scraper.add_argument("--max-retries", type=int, help="retries of a page after an error")
+    scraper.add_argument(
+        "--hedge-percentile", type=float, help="send a duplicate request after this latency percentile"
+    )
+    scraper.add_argument("--parser", choices=PARSERS, default="html.parser")
+    scraper.add_argument("--http2", action="store_true")
+    scraper.add_argument("--cache-dir", help="on-disk response cache folder")
+    scraper.add_argument("--offline", action="store_true", help="only use cached pages")
+    scraper.add_argument("--gender-cache", help="SQLite file of the first name gender cache")
+    scraper.add_argument("--quota-ledger", help="SQLite file of the genderize.io quota ledger and queue")
+    scraper.add_argument(
+        "--no-quota-ledger", action="store_true", help="send every genderize.io lookup without the ledger"
+    )
+    scraper.add_argument("--daily-quota", type=int, help="genderize.io names per day until a response says")
+    scraper.add_argument(
+        "--gender-backend",
+        choices=GENDER_BACKENDS,
+        default="genderize",
+        help="classify first names with genderize.io or offline with the name table",
+    )
+    scraper.add_argument(
+        "--name-table", help="name table file, the fallback for names genderize.io leaves without a gender"
+    )
+    scraper.add_argument(
+        "--run-journal", help="append-only run journal of finished pages and classification batches"
+    )
+    scraper.add_argument(
+        "--resume", action="store_true", help="replay the run journal and continue from the first unfinished page"
+    )
+    scraper.add_argument("--metrics-json", help="write a json summary of timings")
+    scraper.add_argument("--metrics-prometheus", help="write timings in the Prometheus text format")
+
+    outputs = argparse.ArgumentParser(add_help=False)
+    outputs.add_argument(
+        "--output",
+        "-o",
+        action="append",
+        required=True,
+        help="file ending in .csv, .jsonl or .parquet, or a folder ending in / for a partitioned parquet "
+        "dataset. May be repeated",
+    )
+
+    commands.add_parser(
+        "run",
+        parents=[selection, scraper, outputs],
+        help="scrape the selected schools and journals and classify the names",
+    )
+
+    crawl = commands.add_parser(
+        "crawl",
+        parents=[scraper, outputs],
+        help="crawl every volume and issue of the journal url templates",
+    )
+    crawl.add_argument("--journals", nargs="+", help="journals to crawl, default all with a template")
+    crawl.add_argument("--first-year", type=int)
+    crawl.add_argument("--last-year", type=int)
+    crawl.add_argument("--checkpoint", help="json file crawl progress is saved to")
+
+    update = commands.add_parser(
+        "update",
+        parents=[selection, scraper, outputs],
+        help="only parse changed pages, write the names added since the last run",
+    )
+    update.add_argument("--index", help="json file of the page index kept between runs")
+    update.add_argument("--diff-output", help="file for the names added and removed since the last run")
+
+    queue = argparse.ArgumentParser(add_help=False)
+    queue.add_argument("--queue", help="SQLite file of the job queue shared by the workers")
+
+    commands.add_parser(
+        "enqueue", parents=[selection, scraper, queue], help="add a unit per selected page to the job queue"
+    )
+    work = commands.add_parser(
+        "work", parents=[scraper, queue], help="process units of the job queue until it is empty"
+    )
+    work.add_argument("--max-units", type=int, help="stop after this many units")
+    commands.add_parser(
+        "merge",
+        parents=[scraper, queue, outputs],
+        help="classify and write the names of every finished school and journal of the job queue",
+    )
+
+    validate = commands.add_parser(
+        "validate",
+        parents=[scraper],
+        help="classify hand labelled names and report accuracy by school and role",
+    )
+    validate.add_argument("--labels", help="csv with name and male columns, default namesmanual.csv")
+    validate.add_argument("--seed", type=int, help="seed of the bootstrap intervals")
+    validate.add_argument("--output", "-o", action="append", default=[], help="file the report is written to")
+
+    analyze = commands.add_parser(
+        "analyze", help="female share by school, role and journal of a classified names file"
+    )
+    analyze.add_argument("input", help="classified names, a .csv, .jsonl or .parquet file or parquet folder")
+    analyze.add_argument(
+        "--output-dir", required=True, help="folder departments, gaps and journals are written to"
+    )
+    analyze.add_argument("--format", choices=["csv", "jsonl", "parquet"], default="csv")
+    analyze.add_argument("--replicates", type=int, help="bootstrap replicates and permutations per group")
+    analyze.add_argument("--workers", type=int, default=0, help="processes the groups are split across")
+    analyze.add_argument("--seed", type=int)
+
+    check = commands.add_parser(
+        "check-imports", help="check that starting the command line stays within its import budget"
+    )
+    check.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    return arg_parser
+
+
+def main(argv=None) -> int:
+    """Run a command
+
+    Arguments:
+        argv (List[str]): command line arguments without the program name. Defaults to sys.argv
+    Returns:
+        int: exit code
+    """
+    args = build_parser().parse_args(argv)
+
+    if args.command == "list":
+        return list_sources()
+    if args.command == "check-imports":
+        return check_imports(args.budget_ms)
+    if args.command == "analyze":
+        return analyze(args)
+
+    scraper = _make_scraper(args)
+    if args.command == "run":
+        if args.parse_workers > 0:
+            # The process pool parses every page before classification, so results are written at the end
+            names_df = scraper.get_all_names()
+            _write(scraper._classify(names_df[names_df.name.str.strip() != ""]), args.output)
+            scraper.write_metrics()
+        else:
+            scraper.run_streaming(args.output)
+    elif args.command == "crawl":
+        import journal_frontier
+
+        names_df = scraper.crawl_journals(
+            journals=args.journals,
+            first_year=args.first_year,
+            last_year=args.last_year,
+            checkpoint_path=args.checkpoint or journal_frontier.CHECKPOINT_PATH,
+        )
+        _write(names_df, args.output)
+    elif args.command == "update":
+        import page_index
+
+        added_df, diff_df = scraper.update_rosters(args.index or page_index.INDEX_PATH)
+        _write(added_df, args.output)
+        if args.diff_output is not None:
+            _write(diff_df, [args.diff_output])
+    elif args.command in ("enqueue", "work", "merge"):
+        import job_queue
+
+        queue_path = args.queue or job_queue.QUEUE_PATH
+        if args.command == "enqueue":
+            print(f"Added {scraper.enqueue(queue_path)} units")
+        elif args.command == "work":
+            print(f"Processed {scraper.work(queue_path, max_units=args.max_units)} units")
+        else:
+            _write(scraper.merge_queue(queue_path), args.output)
+    elif args.command == "validate":
+        import pandas as pd
+
+        labelled_df = None if args.labels is None else pd.read_csv(args.labels)
+        report_df = scraper.validate(labelled_df, seed=args.seed)
+        print(report_df.to_string(index=False))
+        _write(report_df, args.output)
+
+    for skipped in scraper.skipped_sources().itertuples(index=False):
+        print(f"Skipped {skipped[0]} {skipped[1]}: {skipped[2]}", file=sys.stderr)
+    return 0
+
+
+def list_sources() -> int:
+    """Print every configured school with its roles and every journal
+
+    Returns:
+        int: exit code
+    """
+    schools = set(school_constants.DEPT_WEBSITES_FACULTY) | set(school_constants.DEPT_WEBSITES_PHD)
+    for school in sorted(schools):
+        roles = [
+            role
+            for role, websites in (
+                ("faculty", school_constants.DEPT_WEBSITES_FACULTY),
+                ("phd", school_constants.DEPT_WEBSITES_PHD),
+            )
+            if school in websites
+        ]
+        print(f"{school}\t{','.join(roles)}")
+    for journal in sorted(set(journal_constants.WEBSITES) | set(journal_constants.URL_TEMPLATES)):
+        print(f"{journal}\tauthor")
+    return 0
+
+
+def check_imports(budget_ms: float = IMPORT_BUDGET_MS) -> int:
+    """Import this module in a fresh interpreter and check its import time and heavy dependencies
+
+    Arguments:
+        budget_ms (float): most milliseconds the import may take
+    Returns:
+        int: 0 within budget, 1 otherwise
+    """
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import cli\n"
+        "print((time.perf_counter() - start) * 1000)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    lines = result.stdout.splitlines()
+    elapsed = float(lines[0])
+    heavy = lines[1] if len(lines) > 1 else ""
+    print(f"import cli: {elapsed:.1f} ms (budget {budget_ms:.0f} ms)")
+    if heavy:
+        print(f"Imported at start: {heavy}")
+    return 0 if elapsed <= budget_ms and not heavy else 1
+
+
+def analyze(args) -> int:
+    """Write the gender gap tables of a classified names file
+
+    Returns:
+        int: exit code
+    """
+    import pandas as pd
+    import gender_gap
+
+    if args.input.endswith(".csv"):
+        names_df = pd.read_csv(args.input)
+    elif args.input.endswith(".jsonl"):
+        names_df = pd.read_json(args.input, lines=True)
+    else:
+        if os.path.isdir(args.input):
+            import sinks
+
+            names_df = sinks.read_partitioned(args.input)
+        else:
+            names_df = pd.read_parquet(args.input)
+        if "gender" in names_df and "pred" not in names_df:
+            # typed parquet files store pred as a gender column
+            pred = names_df["gender"].astype(object).map({"male": 1.0, "female": 0.0})
+            names_df["pred"] = pred.fillna("None")
+
+    analysis = gender_gap.GenderGapAnalysis(
+        num_replicates=args.replicates or gender_gap.NUM_REPLICATES,
+        workers=args.workers,
+        seed=args.seed,
+    )
+    os.makedirs(args.output_dir, exist_ok=True)
+    for name, table_df in analysis.run(names_df).items():
+        _write(table_df, [os.path.join(args.output_dir, f"{name}.{args.format}")])
+    return 0
+
+
+def _make_scraper(args):
+    """StatNameScraper configured from the command line, importing the scraping stack"""
+    from StatNameScraper import StatNameScraper
+
+    options = {
+        "parse_workers": args.parse_workers,
+        "parser": args.parser,
+        "http2": args.http2,
+        "cache_dir": args.cache_dir,
+        "offline": args.offline,
+        "metrics_json": args.metrics_json,
+        "metrics_prometheus": args.metrics_prometheus,
+        "hedge_percentile": args.hedge_percentile,
+    }
+    if args.command in ("run", "update", "enqueue"):
+        options.update(schools=args.schools, roles=args.roles, journals=args.journals)
+    if args.max_concurrency is not None:
+        options["max_concurrency"] = args.max_concurrency
+    if args.max_retries is not None:
+        options["max_retries"] = args.max_retries
+    if args.batch_size is not None:
+        options["batch_size"] = args.batch_size
+    if args.gender_cache is not None:
+        options["gender_cache_path"] = args.gender_cache
+    if args.no_quota_ledger:
+        options["quota_ledger_path"] = None
+    elif args.quota_ledger is not None:
+        options["quota_ledger_path"] = args.quota_ledger
+    if args.daily_quota is not None:
+        options["daily_quota"] = args.daily_quota
+    options.update(gender_backend=args.gender_backend, name_table_path=args.name_table)
+    if args.run_journal is not None or args.resume:
+        import run_journal
+
+        options.update(journal_path=args.run_journal or run_journal.JOURNAL_PATH, resume=args.resume)
+    return StatNameScraper(**options)
+
+
+def _write(df, output_paths):
+    from sinks import make_sink
+
+    for path in output_paths:
+        sink = make_sink(path)
+        try:
+            sink.write(df)
+        finally:
+            sink.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
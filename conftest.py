@@ -0,0 +1,28 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+# local imports
+from benchmark import FIXTURE_DIR, _GenderizeStandIn
+
+
+@pytest.fixture
+def genderize_url():
+    """Url of a local genderize.io stand-in, so no test calls the real api"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _GenderizeStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def offline_scraper_options(tmp_path, genderize_url):
+    """StatNameScraper options replaying the benchmark fixtures with caches in a temporary folder"""
+    return {
+        "cache_dir": FIXTURE_DIR,
+        "offline": True,
+        "genderize_url": genderize_url,
+        "gender_cache_path": str(tmp_path / "gender_cache.sqlite"),
+        "quota_ledger_path": str(tmp_path / "quota.sqlite"),
+    }
@@ -0,0 +1,137 @@
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, Tuple
+
+# Joins element texts so one regex pass covers a whole page without matches crossing elements
+SEPARATOR = "\x00"
+
+
+class ExclusionMatcher:
+    def __init__(self, terms: Tuple[str, ...]):
+        """Match any of a list of excluded terms with one compiled regex
+
+        Elements are matched on their text and attribute values rather than their serialized markup.
+
+        Attributes:
+            terms (Tuple[str, ...]): substrings that exclude an element, e.g. school_constants.EXCLUDED_FACULTY
+        """
+        self.terms = terms
+        # Longest first so overlapping terms (Lecturer, Lecturers) resolve the same way every time
+        alternation = "|".join(re.escape(x) for x in sorted(terms, key=len, reverse=True))
+        self.regex = re.compile(alternation) if terms else None
+
+    def mask(self, rows: list) -> List[bool]:
+        """Which rows contain an excluded term, in one pass over the page
+
+        Arguments:
+            rows (list): BeautifulSoup elements or strings, None rows never match
+        Returns:
+            List[bool]: True for rows containing an excluded term
+        """
+        if self.regex is None or not rows:
+            return [False] * len(rows)
+
+        texts = [_searchable_text(row) for row in rows]
+        starts = []
+        position = 0
+        for text in texts:
+            starts.append(position)
+            position += len(text) + len(SEPARATOR)
+
+        excluded = [False] * len(rows)
+        for match in self.regex.finditer(SEPARATOR.join(texts)):
+            excluded[bisect_right(starts, match.start()) - 1] = True
+        return excluded
+
+    def matches(self, row) -> bool:
+        """Whether a single row contains an excluded term
+
+        Arguments:
+            row: BeautifulSoup element or string
+        Returns:
+            bool: True if the row contains an excluded term
+        """
+        return self.regex is not None and self.regex.search(_searchable_text(row)) is not None
+
+
+class TagMatcher:
+    def __init__(self, snippets: Tuple[str, ...]):
+        """Match elements containing tags described by markup snippets
+
+        Snippets such as '<a href' or '<span class="department">' from school_constants.EXCLUDED_TAGS are
+        compiled into (tag, attribute, value) rules checked against the element tree, so the element is never
+        serialized back to html.
+
+        Attributes:
+            snippets (Tuple[str, ...]): opening tag prefixes
+        """
+        self.rules = []
+        for snippet in snippets:
+            rule = re.match(r'<\s*([\w-]+)(?:\s+([\w-]+)(?:="([^"]*)")?)?', snippet)
+            if rule is None:
+                raise Exception(f"Invalid tag snippet: {snippet}")
+            self.rules.append(rule.groups())
+
+    def matches(self, row) -> bool:
+        """Whether the row or one of its descendants matches a tag rule
+
+        Arguments:
+            row: BeautifulSoup element, None never matches
+        Returns:
+            bool: True if any rule matches
+        """
+        if row is None or not hasattr(row, "find_all"):
+            return False
+        for tag, attribute, value in self.rules:
+            candidates = [row] if row.name == tag else []
+            candidates.extend(row.find_all(tag))
+            for element in candidates:
+                if attribute is None:
+                    return True
+                found = element.get(attribute)
+                if found is None:
+                    continue
+                if isinstance(found, list):
+                    found = " ".join(found)
+                if value is None or found == value:
+                    return True
+        return False
+
+
+@lru_cache(maxsize=None)
+def exclusion_matcher(terms: Tuple[str, ...]) -> ExclusionMatcher:
+    """Matcher for a list of terms, compiled once per distinct list
+
+    Arguments:
+        terms (Tuple[str, ...]): excluded terms
+    Returns:
+        ExclusionMatcher: compiled matcher
+    """
+    return ExclusionMatcher(terms)
+
+
+@lru_cache(maxsize=None)
+def tag_matcher(snippets: Tuple[str, ...]) -> TagMatcher:
+    """Matcher for a list of tag snippets, compiled once per distinct list
+
+    Arguments:
+        snippets (Tuple[str, ...]): opening tag prefixes
+    Returns:
+        TagMatcher: compiled matcher
+    """
+    return TagMatcher(snippets)
+
+
+def _searchable_text(row) -> str:
+    """Text and attribute values of an element and its descendants"""
+    if row is None:
+        return ""
+    if isinstance(row, str):
+        return row.replace(SEPARATOR, " ")
+
+    parts = [row.get_text(" ")]
+    for element in [row, *row.find_all(True)]:
+        for value in element.attrs.values():
+            parts.append(" ".join(value) if isinstance(value, list) else str(value))
+    return " ".join(parts).replace(SEPARATOR, " ")
@@ -1,19 +1,37 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import List
+from typing import Dict, Iterator, List
 import re
 
 # local imports
+from html_parser import parse_html, select_texts
+from http_session import PooledSession, get_default_session
+from instrumentation import NULL_METRICS
 import journal_constants
 
 
 class ExtractAuthorNames:
-    def __init__(self, journal: str):
+    def __init__(
+        self,
+        journal: str,
+        pages: Dict[str, str] = None,
+        session: PooledSession = None,
+        parser: str = "html.parser",
+        metrics=None,
+    ):
         """
         Attributes:
             journal (str): name of journal
+            pages (Dict[str, str]): optional already fetched html keyed by url. Urls not in pages are
+                downloaded when parsed
+            session (PooledSession): session used to download pages. Defaults to the shared session
+            parser (str): html parser backend, one of html_parser.PARSERS
+            metrics (Metrics): records fetch and parse time per url and author rows parsed. Defaults to
+                recording nothing
         """
         self.journal = journal
+        self.pages = {} if pages is None else pages
+        self.session = get_default_session() if session is None else session
+        self.parser = parser
+        self.metrics = NULL_METRICS if metrics is None else metrics
 
     def pipeline(self) -> List[str]:
         """Run pipeline to pull relevant names for journal
@@ -24,12 +42,40 @@ class ExtractAuthorNames:
             List[str]: names as 'firstname lastname'
 
         """
+        return list(self.iter_names())
 
-        all_names = []
+    def iter_names(self) -> Iterator[str]:
+        """Yield names of the journal as each webpage is parsed
+
+        Yields:
+            str: name as 'firstname lastname'
+        """
         for url in journal_constants.WEBSITES.get(self.journal):
-            class_names_list = self._get_author_names(url)
-            all_names.extend(class_names_list)
-        return all_names
+            yield from self.get_page_names(url)
+
+    def get_page_names(self, url: str) -> List[str]:
+        """Names on one webpage of the journal
+
+        Arguments:
+            url (str): website url to pull names from
+        Returns:
+            List[str]: names as 'firstname lastname'
+        """
+        with self.metrics.timer("parse", source=self.journal, role="author", url=url):
+            return self._get_author_names(url)
+
+    def _get_html(self, url: str) -> str:
+        """Html of a webpage, using the already fetched page if available
+
+        Arguments:
+            url (str): website url
+        Returns:
+            str: html text
+        """
+        if url in self.pages:
+            return self.pages[url]
+        with self.metrics.timer("fetch", url=url):
+            return self.session.fetch_text(url)
 
     def _get_author_names(self, url: str) -> List[str]:
         """Retrieve names from journal website
@@ -46,21 +92,22 @@ class ExtractAuthorNames:
         html_class_name = journal_constants.NAME_CLASS.get(self.journal)
         name_tag = journal_constants.NAME_TAG.get(self.journal)
 
-        # Gets html
-        people_html = requests.get(
-            url, verify=False, headers={"User-Agent": "Mozilla/5.0"}
-        )
-        html = BeautifulSoup(people_html.text, "html.parser")
-
-        # Get tag for name
-        people_class = html.find_all(name_tag, {"class": html_class_name})
+        # Gets text of the name tags, only the name tags need to be parsed
+        if self.parser == "selectolax":
+            people_text = select_texts(self._get_html(url), name_tag, html_class_name)
+        else:
+            html = parse_html(self._get_html(url), self.parser, name_tag, html_class_name)
+            people_class = html.find_all(name_tag, {"class": html_class_name})
+            people_text = [row.get_text() for row in people_class]
 
         class_names = []
-        for row in people_class:
-                name = row.get_text()
+        for name in people_text:
                 name = [x.strip() for x in re.split(r'[&,]+', name)]
                 class_names.extend(name)
 
+        self.metrics.count("rows_parsed", len(people_text), source=self.journal, role="author")
+        self.metrics.count("names", len(class_names), source=self.journal, role="author")
+
         return class_names
 
 
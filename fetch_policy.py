@@ -0,0 +1,249 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+#global constants
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 30.0
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Consecutive failed requests before a host's circuit opens, and seconds before it is tried again
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 60.0
+# Latencies kept per host and across hosts to estimate the hedging delay, and how many are needed before
+# hedging starts. A host with fewer latencies of its own is hedged on the window across hosts
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 5
+
+
+def get_host(url: str) -> str:
+    """Host of a url without the leading 'www.'
+
+    Arguments:
+        url (str): website url
+    Returns:
+        str: host name used for per-host limits and circuit breakers
+    """
+    host = urlparse(url).netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+class FetchError(Exception):
+    pass
+
+
+class CircuitOpenError(FetchError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        """Fail fast for a host that keeps failing
+
+        The circuit opens after threshold consecutive failures. Once cooldown seconds pass a single trial
+        request is let through, closing the circuit if it succeeds and reopening it if it fails.
+
+        Attributes:
+            threshold (int): consecutive failures that open the circuit
+            cooldown (float): seconds the circuit stays open
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class FetchPolicy:
+    def __init__(
+        self,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+        hedge_percentile: Optional[float] = None,
+        breaker_threshold: int = BREAKER_THRESHOLD,
+        breaker_cooldown: float = BREAKER_COOLDOWN,
+    ):
+        """Timeouts, retries, hedging and a circuit breaker per host for webpage requests
+
+        Connection errors, timeouts and RETRY_STATUSES responses are retried with full jitter exponential
+        backoff, waiting at least as long as a 429's Retry-After. With hedge_percentile, a duplicate request is
+        sent when the first has taken longer than that percentile of the host's recent latencies, or of every
+        host's while the host has too few, and whichever answers first is used. A host whose requests keep
+        failing has its circuit opened and is failed fast with CircuitOpenError until its cooldown passes. Hosts
+        are compared without a leading www.
+
+        Attributes:
+            connect_timeout (float): seconds to wait for a connection
+            read_timeout (float): seconds to wait between bytes of the response
+            max_retries (int): retries after the first attempt
+            backoff_base (float): backoff before the first retry, doubled for every further retry
+            backoff_max (float): longest backoff
+            hedge_percentile (float): latency percentile between 0 and 1 after which a hedged request is sent.
+                If None, requests are not hedged
+            breaker_threshold (int): consecutive failures that open a host's circuit
+            breaker_cooldown (float): seconds a host's circuit stays open
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+
+        self.breakers = {}
+        self._latencies = {}
+        self._all_latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._hedge_executor = None
+
+    def request(self, get: Callable, url: str, **kwargs):
+        """Send a GET request under the policy
+
+        Arguments:
+            get (Callable): function sending one GET request, called as get(url, **kwargs)
+            url (str): url to request
+            **kwargs: passed to get
+        Returns:
+            requests.Response or httpx.Response: the first response that is not retried, e.g. a 200 or 404
+        Raises:
+            CircuitOpenError: if the host's circuit is open
+            FetchError: if every attempt failed
+        """
+        host = get_host(url)
+        breaker = self._breaker(host)
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {host}, skipping {url}")
+            start = time.monotonic()
+            try:
+                response = self._send(get, host, url, **kwargs)
+            except Exception as e:
+                breaker.record_failure()
+                error = e
+                if attempt < self.max_retries:
+                    time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                self._record_latency(host, time.monotonic() - start)
+                return response
+            breaker.record_failure()
+            error = FetchError(f"{url} returned {response.status_code}")
+            if attempt < self.max_retries:
+                time.sleep(max(self._backoff(attempt), _retry_after(response)))
+        raise FetchError(f"Could not fetch {url} after {self.max_retries + 1} attempts: {error}")
+
+    def stats(self) -> Dict[str, Dict]:
+        """Circuit state of every host requested
+
+        Returns:
+            Dict[str, Dict]: host to [open, failures]
+        """
+        with self._lock:
+            breakers = dict(self.breakers)
+        return {
+            host: {"open": b.opened_at is not None, "failures": b.failures}
+            for host, b in breakers.items()
+        }
+
+    def _send(self, get: Callable, host: str, url: str, **kwargs):
+        delay = self._hedge_delay(host)
+        if delay is None:
+            return get(url, **kwargs)
+
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+            executor = self._hedge_executor
+        first = executor.submit(get, url, **kwargs)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        # The slower request is left to finish in the background, its response is dropped
+        second = executor.submit(get, url, **kwargs)
+        done, _ = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        if winner.exception() is not None:
+            other = second if winner is first else first
+            return other.result()
+        return winner.result()
+
+    def _hedge_delay(self, host: str) -> Optional[float]:
+        """Latency percentile of the host after which a hedged request is sent, None if not hedging"""
+        if self.hedge_percentile is None:
+            return None
+        with self._lock:
+            latencies = self._latencies.get(host, ())
+            if len(latencies) < HEDGE_MIN_SAMPLES:
+                latencies = self._all_latencies
+            latencies = sorted(latencies)
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return latencies[min(int(self.hedge_percentile * len(latencies)), len(latencies) - 1)]
+
+    def _record_latency(self, host: str, seconds: float):
+        with self._lock:
+            if host not in self._latencies:
+                self._latencies[host] = deque(maxlen=LATENCY_WINDOW)
+            self._latencies[host].append(seconds)
+            self._all_latencies.append(seconds)
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self.breakers[host]
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter backoff before retry number attempt + 1"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+def _retry_after(response) -> float:
+    """Seconds a response asks to wait before retrying, 0 if it does not say"""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return 0.0
+    try:
+        return min(float(value), BACKOFF_MAX)
+    except ValueError:
+        return 0.0
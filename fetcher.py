@@ -0,0 +1,132 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable
+
+# local imports
+from fetch_policy import get_host
+from http_session import PooledSession, get_default_session
+from instrumentation import NULL_METRICS
+
+#global constants
+MAX_CONCURRENCY = 16
+DEFAULT_HOST_CONCURRENCY = 4
+# Journal hosts serve many issues each, keep them from being hammered
+HOST_CONCURRENCY = {
+    "projecteuclid.org": 2,
+    "tandfonline.com": 2,
+}
+
+
+class AsyncFetcher:
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        host_concurrency: Dict[str, int] = None,
+        default_host_concurrency: int = DEFAULT_HOST_CONCURRENCY,
+        session: PooledSession = None,
+        metrics=None,
+    ):
+        """Fetch many webpages concurrently
+
+        Requests are issued from a thread pool driven by an asyncio event loop. A global semaphore caps the
+        total number of open requests and a semaphore per host caps how many requests hit the same site.
+
+        Attributes:
+            max_concurrency (int): maximum number of requests in flight across all hosts
+            host_concurrency (Dict[str, int]): maximum number of requests in flight for specific hosts.
+                Defaults to HOST_CONCURRENCY
+            default_host_concurrency (int): maximum number of requests in flight for any other host
+            session (PooledSession): session whose connections are reused. Defaults to the shared session
+            metrics (Metrics): records download time and bytes per url and host. Defaults to recording nothing
+        """
+        self.max_concurrency = max_concurrency
+        self.host_concurrency = (
+            HOST_CONCURRENCY if host_concurrency is None else host_concurrency
+        )
+        self.default_host_concurrency = default_host_concurrency
+        self.session = get_default_session() if session is None else session
+        self.metrics = NULL_METRICS if metrics is None else metrics
+        self.failed = {}
+
+    def fetch_all(
+        self, urls: Iterable[str], on_page: Callable[[str, str], None] = None
+    ) -> Dict[str, str]:
+        """Download all urls concurrently
+
+        Arguments:
+            urls (Iterable[str]): website urls to download. Duplicates are fetched once
+            on_page (Callable[[str, str], None]): optional function called with (url, html text) as soon as
+                each page arrives, e.g. to start parsing while other pages are still downloading
+        Returns:
+            Dict[str, str]: url to html text. Pages that could not be fetched are left out and recorded in
+                failed with the error
+        """
+        return asyncio.run(self._fetch_all(urls, on_page))
+
+    async def _fetch_all(
+        self, urls: Iterable[str], on_page: Callable[[str, str], None] = None
+    ) -> Dict[str, str]:
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        host_limits = {}
+        for url in urls:
+            host = get_host(url)
+            if host not in host_limits:
+                host_limits[host] = asyncio.Semaphore(
+                    self.host_concurrency.get(host, self.default_host_concurrency)
+                )
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            bodies = await asyncio.gather(
+                *(
+                    self._fetch(
+                        url, executor, global_limit, host_limits[get_host(url)], on_page
+                    )
+                    for url in urls
+                )
+            )
+        return {url: body for url, body in zip(urls, bodies) if url not in self.failed}
+
+    async def _fetch(
+        self,
+        url: str,
+        executor: ThreadPoolExecutor,
+        global_limit: asyncio.Semaphore,
+        host_limit: asyncio.Semaphore,
+        on_page: Callable[[str, str], None] = None,
+    ) -> str:
+        # Wait on the host first so a busy host does not hold global slots
+        async with host_limit:
+            async with global_limit:
+                loop = asyncio.get_running_loop()
+                try:
+                    text = await loop.run_in_executor(executor, self._get, url)
+                except Exception as e:
+                    # One failing site must not stop the others
+                    self.failed[url] = f"{type(e).__name__}: {e}"
+                    self.metrics.count("fetch_failed", host=get_host(url))
+                    return None
+        if on_page is not None:
+            on_page(url, text)
+        return text
+
+    def _get(self, url: str) -> str:
+        if not self.metrics.enabled:
+            return self.session.fetch_text(url)
+        host = get_host(url)
+        with self.metrics.timer("fetch", host=host, url=url):
+            text = self.session.fetch_text(url)
+        self.metrics.count("fetch_bytes", len(text.encode("utf-8")), host=host)
+        self.metrics.count("fetch_pages", host=host)
+        return text
+
+
+if __name__ == "__main__":
+    import journal_constants
+
+    fetcher = AsyncFetcher()
+    pages = fetcher.fetch_all(journal_constants.WEBSITES.get("jss"))
+    print({url: len(text) for url, text in pages.items()})
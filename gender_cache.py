@@ -0,0 +1,162 @@
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable
+
+#global constants
+CACHE_PATH = os.path.expanduser("~/Desktop/WSDS/gender_cache.sqlite")
+TTL_DAYS = 180
+MEMORY_SIZE = 10000
+
+
+def normalize_first_name(name: str) -> str:
+    """Key used to cache a first name
+
+    Arguments:
+        name (str): first name
+    Returns:
+        str: name with unicode compatibility folding, trimmed and lower cased
+    """
+    return unicodedata.normalize("NFKC", name).strip().casefold()
+
+
+class GenderCache:
+    def __init__(
+        self,
+        path: str = CACHE_PATH,
+        ttl_days: float = TTL_DAYS,
+        memory_size: int = MEMORY_SIZE,
+    ):
+        """Persistent cache of genderize.io results keyed by first name and country
+
+        Results live in a SQLite table with a small least recently used dictionary in front of it. Results older
+        than ttl_days are treated as missing so they are looked up again.
+
+        Attributes:
+            path (str): SQLite database file
+            ttl_days (float): days before a cached result expires
+            memory_size (int): number of results kept in the in-memory tier
+        """
+        self.path = path
+        self.ttl = ttl_days * 24 * 60 * 60
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS genders (
+                name TEXT NOT NULL,
+                country TEXT NOT NULL,
+                gender TEXT,
+                probability REAL,
+                count INTEGER,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (name, country)
+            )"""
+        )
+        self._conn.commit()
+
+    def get_many(self, names: Iterable[str], country: str = None) -> Dict[str, Dict]:
+        """Cached results for names that have not expired
+
+        Arguments:
+            names (Iterable[str]): normalized first names
+            country (str): optional ISO 3166-1 alpha-2 country code the names were looked up with
+        Returns:
+            Dict[str, Dict]: name to [gender, probability, count, fetched_at] for cache hits only
+        """
+        country = country or ""
+        oldest = time.time() - self.ttl
+        found = {}
+        missing = []
+
+        with self._lock:
+            for name in dict.fromkeys(names):
+                entry = self._memory.get((name, country))
+                if entry is not None and entry["fetched_at"] >= oldest:
+                    self._memory.move_to_end((name, country))
+                    found[name] = entry
+                else:
+                    missing.append(name)
+
+            # sqlite limits the number of bound parameters per statement
+            for start in range(0, len(missing), 500):
+                chunk = missing[start : start + 500]
+                rows = self._conn.execute(
+                    f"""SELECT name, gender, probability, count, fetched_at FROM genders
+                    WHERE country = ? AND fetched_at >= ? AND name IN ({",".join("?" * len(chunk))})""",
+                    [country, oldest, *chunk],
+                ).fetchall()
+                for name, gender, probability, count, fetched_at in rows:
+                    entry = {
+                        "gender": gender,
+                        "probability": probability,
+                        "count": count,
+                        "fetched_at": fetched_at,
+                    }
+                    found[name] = entry
+                    self._remember((name, country), entry)
+        return found
+
+    def put_many(self, results: Dict[str, Dict], country: str = None):
+        """Store genderize.io results
+
+        Arguments:
+            results (Dict[str, Dict]): normalized first name to [gender, probability, count]
+            country (str): optional country code the names were looked up with
+        """
+        country = country or ""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for name, result in results.items():
+                entry = {
+                    "gender": result.get("gender"),
+                    "probability": result.get("probability"),
+                    "count": result.get("count"),
+                    "fetched_at": now,
+                }
+                self._remember((name, country), entry)
+                rows.append(
+                    (
+                        name,
+                        country,
+                        entry["gender"],
+                        entry["probability"],
+                        entry["count"],
+                        now,
+                    )
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO genders VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired results from disk
+
+        Returns:
+            int: number of rows deleted
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM genders WHERE fetched_at < ?", (time.time() - self.ttl,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self._conn.close()
+
+    def _remember(self, key, entry: Dict):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
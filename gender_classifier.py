@@ -1,71 +1,298 @@
-import requests, json
+import numpy as np
 import pandas as pd
 import os
 
+# local imports
+from gender_cache import GenderCache
+from genderize_client import GenderizeClient
+from http_session import PooledSession, get_default_session
+from instrumentation import NULL_METRICS
+from name_parser import PART_COLUMNS, parse_names
+from quota_ledger import role_rank
+
 #global constant
 FOLDER = "/Desktop/WSDS"
+# Hand labelled names shipped with the repository, used when FOLDER has none
+REPO_LABELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "namesmanual.csv")
+NUM_REPLICATES = 10000
+CONFIDENCE = 0.95
+# Outcomes of a labelled name: predicted its label, predicted the other gender, left unclassified
+CORRECT, WRONG, UNCLASSIFIED = 0, 1, 2
 
 
 class RunGenderClassifier:
-    def __init__(self, name_df: pd.DataFrame = None):
+    def __init__(
+        self,
+        name_df: pd.DataFrame = None,
+        session: PooledSession = None,
+        cache: GenderCache = None,
+        country_id: str = None,
+        backend=None,
+        fallback=None,
+        metrics=None,
+    ):
         """Classify gender of name using genderize.io api
 
         Attributes:
             name_list (pd.DataFrame): should contain at minimum a column "name" representing firstname lastname.
-                If None, will pull in the file "namesmanual.csv" from FOLDER, which should also contain a column
+                If None, will pull in the file "namesmanual.csv" from FOLDER, or the repository's copy if FOLDER
+                has none, which should also contain a column
                 "male", which is 1 if male, 0 if female
+            session (PooledSession): session used to call genderize.io. Defaults to the shared session
+            cache (GenderCache): persistent cache of first name results. Only names missing from it are sent to
+                genderize.io. Defaults to a cache stored at gender_cache.CACHE_PATH
+            country_id (str): optional ISO 3166-1 alpha-2 country code to localize predictions
+            backend (GenderizeClient, QuotaScheduler or NameTable): classifies first names with lookup(names).
+                Defaults to a genderize.io client using session and country_id. Results are cached only for
+                backends that set cacheable. Backends that set scheduled are also given each name's priority,
+                from the optional name_df columns "occurrences" and "role"
+            fallback (GenderizeClient or NameTable): optional backend for names without a gender from the backend
+                or the cache, e.g. a NameTable when genderize.io is slow or over quota. Its results are not cached
+            metrics (Metrics): records classification time, cache hits, backend calls and quota. Defaults to
+                recording nothing
         """
 
+        self.session = get_default_session() if session is None else session
+        self.cache = GenderCache() if cache is None else cache
+        self.country_id = country_id
+        self.backend = (
+            GenderizeClient(session=self.session, country_id=country_id)
+            if backend is None
+            else backend
+        )
+        self.fallback = fallback
+        self.metrics = NULL_METRICS if metrics is None else metrics
         self.name_df = name_df
         if self.name_df is None:
-            name_df = pd.read_csv(os.environ["HOME"] + FOLDER + "/namesmanual.csv")
-            name_df = name_df.iloc[:5]
-            self.name_df = name_df[name_df.male.notna()]
+            name_df = pd.read_csv(labelled_names_path())
+            self.name_df = name_df[name_df.male.notna()].reset_index(drop=True)
 
-        self._getgenders()
+        with self.metrics.timer("classify"):
+            self._getgenders()
 
     def _getgenders(self):
-        """Call genderize.io api
+        """Classify first names, calling the backend only for names missing from the cache
 
-        Adapted from https://github.com/acceptable-security/gender.py to use genderize.io api.
-        See the link for documentation
+        Distinct full names are parsed with name_parser.parse_names and their parts added to name_df. Names
+        without a usable first name, e.g. only an initial, are left unclassified without a lookup. Each distinct
+        first name is classified once and the result is broadcast back to every row.
         """
-        names = self.name_df["name"].tolist()
-        names = [x.split()[0] for x in names]
-
-        url = ""
-        cnt = 0
-        if not isinstance(names, list):
-            names = [
-                names,
-            ]
-
-        for name in names:
-            if url == "":
-                url = "name[0]=" + name
-            else:
-                cnt += 1
-                url = url + "&name[" + str(cnt) + "]=" + name
-
-        req = requests.get("https://api.genderize.io?" + url)
-        results = json.loads(req.text)
-
-        retrn = []
-        # changed from original to return only predicted gender
-        for result in results:
-            if result["gender"] is not None:
-                retrn.append(result["gender"])
-            else:
-                retrn.append("None")
-
-        self.name_df["pred"] = retrn
-
-        # Remap labels
+        metrics = self.metrics
+        # missing names get their own code, parse as an empty name and are left unclassified
+        name_codes, full_names = pd.factorize(self.name_df["name"], use_na_sentinel=False)
+        parts = parse_names(pd.Series(full_names, dtype=object))
+        for column in PART_COLUMNS:
+            self.name_df[column] = parts[column].to_numpy()[name_codes]
+        # same key as gender_cache.normalize_first_name, unusable names become missing and get code -1
+        first_names = parts["given_name"].str.normalize("NFKC").str.strip().str.casefold()
+        first_codes, names = pd.factorize(first_names.where(parts["usable_first_name"]))
+        names = names.tolist()
+        metrics.count("gender_unusable_names", int((first_codes[name_codes] < 0).sum()))
+
+        results = {}
+        if self.backend.cacheable:
+            with metrics.timer("gender_cache"):
+                results = self.cache.get_many(names, self.country_id)
+        misses = [x for x in names if x not in results]
+        metrics.count("gender_names", len(self.name_df))
+        metrics.count("gender_cache_hits", len(names) - len(misses))
+        if misses:
+            # a scheduler wraps the genderize.io client it sends lookups with
+            client = getattr(self.backend, "client", self.backend)
+            num_requests = getattr(client, "num_requests", 0)
+            num_failed = len(getattr(client, "failed", []))
+            with metrics.timer("gender_backend"):
+                if getattr(self.backend, "scheduled", False):
+                    priorities = self._priorities(first_codes, name_codes, names)
+                    fetched = self.backend.lookup(misses, {x: priorities[x] for x in misses})
+                else:
+                    fetched = self.backend.lookup(misses)
+            if self.backend.cacheable:
+                self.cache.put_many(fetched, self.country_id)
+            results.update(fetched)
+            metrics.count("gender_backend_names", len(misses))
+            if isinstance(client, GenderizeClient):
+                self._count_genderize(client, len(fetched), num_requests, num_failed)
+            if getattr(self.backend, "scheduled", False):
+                metrics.gauge("genderize_pending_names", self.backend.num_pending())
+
+        if self.fallback is not None:
+            # cached unknowns too, the backend answered them with no gender on an earlier run
+            unclassified = [x for x in names if results.get(x, {}).get("gender") is None]
+            if unclassified:
+                with metrics.timer("gender_fallback"):
+                    results.update(self.fallback.lookup(unclassified))
+                metrics.count("gender_fallback_names", len(unclassified))
+
+        # changed from original to return only predicted gender, remapped to male 1.0 and female 0.0
         gender_dict = {"male": 1.0, "female": 0.0}
-        self.name_df = self.name_df.replace({"pred": gender_dict})
+        # a trailing unclassified entry, which the -1 code of names without a usable first name indexes
+        preds = np.full(len(names) + 1, "None", dtype=object)
+        probabilities = np.full(len(names) + 1, np.nan)
+        for i, name in enumerate(names):
+            # names whose lookup failed are left unclassified and not cached
+            result = results.get(name, {})
+            gender = result.get("gender")
+            preds[i] = "None" if gender is None else gender_dict.get(gender, gender)
+            if gender is not None and result.get("probability") is not None:
+                probabilities[i] = result["probability"]
+
+        self.name_df["pred"] = preds[first_codes][name_codes]
+        self.name_df["probability"] = probabilities[first_codes][name_codes]
+
+    def validation_analysis(
+        self,
+        by: list = ["school", "role"],
+        num_replicates: int = NUM_REPLICATES,
+        confidence: float = CONFIDENCE,
+        seed: int = None,
+    ) -> pd.DataFrame:
+        """Compare predictions with the hand labelled "male" column
+
+        Accuracy is the share of classified names whose prediction matches the label and the unclassified rate
+        the share of names genderize.io could not classify. Their percentile bootstrap intervals resample the
+        names of each group. Both statistics only depend on how many names of a group are correct, wrong and
+        unclassified, so resampling a group's names is a multinomial draw of those counts, and every replicate
+        of every group is drawn at once.
+
+        Arguments:
+            by (list): columns of name_df to break the results down by. Columns missing from name_df are skipped
+            num_replicates (int): bootstrap replicates
+            confidence (float): coverage of the intervals
+            seed (int): seed of the bootstrap random generator
+        Returns:
+            pd.DataFrame: a row per group and a last row for all names, with the group columns set to "all", and
+                columns n, the confusion matrix counts male_male, male_female, male_none, female_male,
+                female_female and female_none (label then prediction), accuracy, accuracy_low, accuracy_high,
+                unclassified_rate, unclassified_low and unclassified_high
+        Raises:
+            Exception: if name_df has no "male" column
+        """
+        if "male" not in self.name_df:
+            raise Exception('Validation needs the hand labelled "male" column, 1 if male, 0 if female')
+        df = self.name_df[self.name_df["male"].notna()]
+        by = [x for x in by if x in df]
+
+        label = df["male"].to_numpy(dtype=float)
+        pred = pd.to_numeric(df["pred"].replace("None", np.nan), errors="coerce").to_numpy()
+        outcome = np.where(np.isnan(pred), UNCLASSIFIED, np.where(pred == label, CORRECT, WRONG))
+        # label 1 is male, prediction 1 male, 0 female and 2 unclassified
+        cell = (1 - label.astype(int)) * 3 + np.where(np.isnan(pred), 2, 1 - np.nan_to_num(pred)).astype(int)
+
+        if by:
+            group_codes, groups = pd.MultiIndex.from_frame(df[by].astype(str)).factorize()
+            # a last group holding every name
+            codes = np.concatenate([group_codes, np.full(len(df), len(groups))])
+            outcome, cell = np.tile(outcome, 2), np.tile(cell, 2)
+            group_keys = list(groups) + [("all",) * len(by)]
+        else:
+            codes = np.zeros(len(df), dtype=int)
+            group_keys = [()]
+
+        counts = np.zeros((len(group_keys), 3), dtype=np.int64)
+        np.add.at(counts, (codes, outcome), 1)
+        confusion = np.zeros((len(group_keys), 6), dtype=np.int64)
+        np.add.at(confusion, (codes, cell), 1)
+        n = counts.sum(axis=1)
+
+        rng = np.random.default_rng(seed)
+        probabilities = counts / np.maximum(n, 1)[:, None]
+        # replicates x groups x outcomes
+        draws = rng.multinomial(n, probabilities, size=(num_replicates, len(group_keys)))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            accuracy = counts[:, CORRECT] / (counts[:, CORRECT] + counts[:, WRONG])
+            unclassified = counts[:, UNCLASSIFIED] / n
+            boot_accuracy = draws[..., CORRECT] / (draws[..., CORRECT] + draws[..., WRONG])
+            boot_unclassified = draws[..., UNCLASSIFIED] / n
+        tails = [(1 - confidence) / 2 * 100, (1 + confidence) / 2 * 100]
+        accuracy_ci = _percentiles(boot_accuracy, tails)
+        unclassified_ci = _percentiles(boot_unclassified, tails)
+
+        report = pd.DataFrame(index=range(len(group_keys)))
+        for i, column in enumerate(by):
+            report[column] = [key[i] for key in group_keys]
+        report["n"] = n
+        for i, column in enumerate(
+            ["male_male", "male_female", "male_none", "female_male", "female_female", "female_none"]
+        ):
+            report[column] = confusion[:, i]
+        report["accuracy"] = accuracy
+        report["accuracy_low"], report["accuracy_high"] = accuracy_ci
+        report["unclassified_rate"] = unclassified
+        report["unclassified_low"], report["unclassified_high"] = unclassified_ci
+        return report
+
+    def _priorities(self, first_codes: np.ndarray, name_codes: np.ndarray, names: list) -> dict:
+        """Lookup priority of every distinct first name
+
+        Arguments:
+            first_codes (np.ndarray): first name code of each distinct full name
+            name_codes (np.ndarray): full name code of each row
+            names (list): distinct first names
+        Returns:
+            dict: first name to (occurrences, role rank), summing the "occurrences" column if present, otherwise
+                counting rows, and taking the best rank of the "role" column if present
+        """
+        row_codes = first_codes[name_codes]
+        usable = row_codes >= 0
+        weights = None
+        if "occurrences" in self.name_df:
+            weights = self.name_df["occurrences"].to_numpy(dtype=float)[usable]
+        occurrences = np.bincount(row_codes[usable], weights=weights, minlength=len(names)).astype(int)
+        ranks = np.full(len(names), role_rank(None))
+        if "role" in self.name_df:
+            role_codes, roles = pd.factorize(self.name_df["role"])
+            role_ranks = np.array([role_rank(x) for x in roles] + [role_rank(None)])
+            # factorize marks missing roles -1, which indexes the trailing unknown rank
+            np.minimum.at(ranks, row_codes[usable], role_ranks[role_codes[usable]])
+        return {name: (occurrences[i], ranks[i]) for i, name in enumerate(names)}
+
+    def _count_genderize(
+        self, client: GenderizeClient, num_names: int, num_requests: int, num_failed: int
+    ):
+        """Record genderize.io calls and quota after a lookup
+
+        Arguments:
+            client (GenderizeClient): client the lookup was sent with
+            num_names (int): names classified by genderize.io
+            num_requests (int): requests the client had made before the lookup
+            num_failed (int): names the client had failed before the lookup
+        """
+        self.metrics.count("genderize_requests", client.num_requests - num_requests)
+        self.metrics.count("genderize_failed_names", len(client.failed) - num_failed)
+        # genderize.io counts every name of a successful request against the daily quota
+        self.metrics.count("genderize_quota_used", num_names)
+        remaining = client.rate_limit()["remaining"]
+        if remaining is not None:
+            self.metrics.gauge("genderize_quota_remaining", remaining)
+
+
+def labelled_names_path() -> str:
+    """namesmanual.csv in FOLDER if there is one, otherwise the repository's copy
+
+    Returns:
+        str: path of the hand labelled names
+    Raises:
+        FileNotFoundError: if neither file exists
+    """
+    for path in (os.path.expanduser("~") + FOLDER + "/namesmanual.csv", REPO_LABELS):
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No namesmanual.csv in {os.path.expanduser('~') + FOLDER} or {REPO_LABELS}")
+
+
+def _percentiles(replicates: np.ndarray, tails: list):
+    """Percentiles of each group's replicates, ignoring replicates where the statistic is undefined"""
+    defined = ~np.isnan(replicates).all(axis=0)
+    low = np.full(replicates.shape[1], np.nan)
+    high = np.full(replicates.shape[1], np.nan)
+    if defined.any():
+        low[defined], high[defined] = np.nanpercentile(replicates[:, defined], tails, axis=0)
+    return low, high
 
 
 if __name__ == "__main__":
     genderclassifier = RunGenderClassifier()
     pred_df = genderclassifier.name_df
+    print(genderclassifier.validation_analysis())
     # pd.to_csv(pred_df, os.environ["HOME"] + FOLDER + "/namesmanualresults.csv")
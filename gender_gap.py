@@ -0,0 +1,276 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+#global constants
+NUM_REPLICATES = 10000
+CONFIDENCE = 0.95
+# Female probabilities are rounded to this many decimals, which bounds the distinct values of a group
+PROBABILITY_DECIMALS = 4
+SOURCE_COLUMNS = ["school/journal", "source", "school"]
+
+
+def female_probability(df: pd.DataFrame) -> pd.DataFrame:
+    """Hard and probability weighted female indicators of classified names
+
+    Arguments:
+        df (pd.DataFrame): classified names with column pred, 1.0 male, 0.0 female or "None", and optionally the
+            genderize.io probability of the predicted gender
+    Returns:
+        pd.DataFrame: the classified rows of df with columns female, 1.0 if predicted female else 0.0, and
+            p_female, the probability the name is female. Names without a probability count as certain
+    """
+    pred = pd.to_numeric(df["pred"].replace("None", np.nan), errors="coerce")
+    df = df[pred.notna()].copy()
+    female = 1.0 - pred[pred.notna()].to_numpy()
+    probability = np.ones(len(df))
+    if "probability" in df:
+        probability = pd.to_numeric(df["probability"], errors="coerce").fillna(1.0).to_numpy()
+    df["female"] = female
+    df["p_female"] = np.round(
+        np.where(female == 1.0, probability, 1.0 - probability), PROBABILITY_DECIMALS
+    )
+    return df
+
+
+class GenderGapAnalysis:
+    def __init__(
+        self,
+        num_replicates: int = NUM_REPLICATES,
+        confidence: float = CONFIDENCE,
+        workers: int = 0,
+        seed: int = None,
+    ):
+        """Female share by school, role and journal, faculty and PhD gaps, with bootstrap and permutation intervals
+
+        Every estimate comes hard, from predicted genders, and probability weighted, from the genderize.io
+        probability of each prediction. Both are group means of a per-name value with few distinct values, so
+        a group is reduced to the count of each value and a bootstrap replicate is a multinomial draw of those
+        counts, and a permutation of two groups a multivariate hypergeometric draw. Resampling never touches
+        rows, which keeps million row author tables cheap, and the group summaries are small enough to send to
+        worker processes.
+
+        Attributes:
+            num_replicates (int): bootstrap replicates and permutations per group
+            confidence (float): coverage of the percentile intervals
+            workers (int): processes groups are split across. If 0, groups are resampled in this process
+            seed (int): seed of the random generators. Each group gets its own stream, so results do not depend
+                on workers
+        """
+        self.num_replicates = num_replicates
+        self.confidence = confidence
+        self.workers = workers
+        self.seed = seed
+
+    def run(self, df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """Every table of the study
+
+        Arguments:
+            df (pd.DataFrame): classified names, e.g. from StatNameScraper.pipeline, with a source column
+                (school/journal, source or school), role and pred
+        Returns:
+            Dict[str, pd.DataFrame]: departments, female share by school and role. gaps, faculty minus PhD
+                female share by school. journals, female share of authors by journal and year if present
+        """
+        source = _source_column(df)
+        roster_df = df[df["role"] != "author"]
+        author_df = df[df["role"] == "author"]
+        journal_by = [source]
+        if "year" in author_df and author_df["year"].notna().any():
+            journal_by.append("year")
+        return {
+            "departments": self.group_shares(roster_df, [source, "role"]),
+            "gaps": self.role_gaps(roster_df, [source]),
+            "journals": self.group_shares(author_df, journal_by),
+        }
+
+    def group_shares(self, df: pd.DataFrame, by: List[str]) -> pd.DataFrame:
+        """Female share of each group with bootstrap intervals
+
+        Arguments:
+            df (pd.DataFrame): classified names
+            by (List[str]): columns defining the groups
+        Returns:
+            pd.DataFrame: by columns, n, unclassified, female, female_share, female_share_low,
+                female_share_high, weighted_share, weighted_share_low and weighted_share_high
+        """
+        classified = female_probability(df)
+        totals = df.groupby(by, dropna=False).size().rename("n")
+        summaries = _summaries(classified, by)
+        tasks = [
+            (summary, self.num_replicates, self.confidence, seed)
+            for summary, seed in zip(summaries.values(), self._seeds(len(summaries)))
+        ]
+        rows = []
+        for key, result in zip(summaries, self._map(_share_task, tasks)):
+            rows.append({**dict(zip(by, _as_tuple(key))), **result})
+
+        columns = [
+            "female_share",
+            "female_share_low",
+            "female_share_high",
+            "weighted_share",
+            "weighted_share_low",
+            "weighted_share_high",
+        ]
+        shares = pd.DataFrame(rows, columns=by + ["classified", "female"] + columns)
+        report = totals.reset_index().merge(shares, on=by, how="left")
+        report[["classified", "female"]] = report[["classified", "female"]].fillna(0).astype(int)
+        report.insert(len(by) + 1, "unclassified", report["n"] - report.pop("classified"))
+        return report
+
+    def role_gaps(
+        self, df: pd.DataFrame, by: List[str], roles: Tuple[str, str] = ("faculty", "phd")
+    ) -> pd.DataFrame:
+        """Difference in female share between two roles within each group
+
+        Arguments:
+            df (pd.DataFrame): classified names with a role column
+            by (List[str]): columns defining the groups, e.g. the school
+            roles (Tuple[str, str]): roles compared, the gap is the first's share minus the second's
+        Returns:
+            pd.DataFrame: by columns, n of each role, female share of each role, gap, gap_low, gap_high,
+                p_value of a two sided permutation test of no gap, and the same for the probability weighted
+                shares prefixed weighted_. Groups missing a role are left out
+        """
+        classified = female_probability(df[df["role"].isin(roles)])
+        summaries = _summaries(classified, by + ["role"])
+        pairs = {}
+        for key, summary in summaries.items():
+            key = _as_tuple(key)
+            pairs.setdefault(key[:-1], {})[key[-1]] = summary
+        pairs = {key: pair for key, pair in pairs.items() if len(pair) == 2}
+
+        tasks = [
+            (pair[roles[0]], pair[roles[1]], self.num_replicates, self.confidence, seed)
+            for pair, seed in zip(pairs.values(), self._seeds(len(pairs)))
+        ]
+        rows = []
+        for key, result in zip(pairs, self._map(_gap_task, tasks)):
+            result = {
+                name.replace("first", roles[0]).replace("second", roles[1]): value
+                for name, value in result.items()
+            }
+            rows.append({**dict(zip(by, key)), **result})
+        return pd.DataFrame(rows)
+
+    def _seeds(self, num_groups: int) -> List[np.random.SeedSequence]:
+        return np.random.SeedSequence(self.seed).spawn(num_groups)
+
+    def _map(self, function, tasks: List[Tuple]) -> List[Dict]:
+        if self.workers > 0 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                chunksize = max(len(tasks) // (4 * self.workers), 1)
+                return list(pool.map(function, *zip(*tasks), chunksize=chunksize))
+        return [function(*task) for task in tasks]
+
+
+def _source_column(df: pd.DataFrame) -> str:
+    for column in SOURCE_COLUMNS:
+        if column in df:
+            return column
+    raise Exception(f"No source column in names, expected one of {SOURCE_COLUMNS}")
+
+
+def _as_tuple(key) -> tuple:
+    return key if isinstance(key, tuple) else (key,)
+
+
+def _summaries(classified: pd.DataFrame, by: List[str]) -> Dict:
+    """Count of each distinct female probability per group
+
+    Returns:
+        Dict: group key to (hard counts [male, female], distinct p_female values, their counts)
+    """
+    # One groupby keeps groups with missing keys, e.g. journals without a year, which .loc cannot look up
+    counts = classified.groupby(by + ["female", "p_female"], dropna=False).size()
+    summaries = {}
+    for key, group in counts.groupby(level=by if len(by) > 1 else by[0], dropna=False):
+        hard = group.groupby(level="female").sum().reindex([0.0, 1.0], fill_value=0)
+        weighted = group.groupby(level="p_female").sum()
+        summaries[key] = (
+            hard.to_numpy(dtype=np.int64),
+            weighted.index.to_numpy(dtype=float),
+            weighted.to_numpy(dtype=np.int64),
+        )
+    return summaries
+
+
+def _bootstrap_means(
+    values: np.ndarray, counts: np.ndarray, num_replicates: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Means of bootstrap resamples of a group given as counts of distinct values"""
+    n = counts.sum()
+    draws = rng.multinomial(n, counts / n, size=num_replicates)
+    return draws @ values / n
+
+
+def _permuted_differences(
+    values: np.ndarray,
+    first: np.ndarray,
+    second: np.ndarray,
+    num_replicates: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Differences in mean between two groups after shuffling their pooled members"""
+    pooled = first + second
+    draws = rng.multivariate_hypergeometric(pooled, first.sum(), size=num_replicates)
+    return draws @ values / first.sum() - (pooled - draws) @ values / second.sum()
+
+
+def _interval(replicates: np.ndarray, confidence: float) -> Tuple[float, float]:
+    low, high = np.percentile(replicates, [(1 - confidence) / 2 * 100, (1 + confidence) / 2 * 100])
+    return low, high
+
+
+def _share_task(
+    summary: Tuple, num_replicates: int, confidence: float, seed: np.random.SeedSequence
+) -> Dict:
+    hard, values, counts = summary
+    rng = np.random.default_rng(seed)
+    hard_values = np.array([0.0, 1.0])
+    result = {"classified": int(hard.sum()), "female": int(hard[1])}
+    result["female_share"] = hard[1] / hard.sum()
+    result["female_share_low"], result["female_share_high"] = _interval(
+        _bootstrap_means(hard_values, hard, num_replicates, rng), confidence
+    )
+    result["weighted_share"] = counts @ values / counts.sum()
+    result["weighted_share_low"], result["weighted_share_high"] = _interval(
+        _bootstrap_means(values, counts, num_replicates, rng), confidence
+    )
+    return result
+
+
+def _gap_task(
+    first: Tuple, second: Tuple, num_replicates: int, confidence: float, seed: np.random.SeedSequence
+) -> Dict:
+    rng = np.random.default_rng(seed)
+    result = {"n_first": int(first[0].sum()), "n_second": int(second[0].sum())}
+    hard_values = np.array([0.0, 1.0])
+    # The weighted counts of both roles are aligned on the union of their distinct values
+    values = np.union1d(first[1], second[1])
+    first_counts = np.zeros(len(values), dtype=np.int64)
+    second_counts = np.zeros(len(values), dtype=np.int64)
+    first_counts[np.searchsorted(values, first[1])] = first[2]
+    second_counts[np.searchsorted(values, second[1])] = second[2]
+
+    for prefix, values, a, b in (
+        ("", hard_values, first[0], second[0]),
+        ("weighted_", values, first_counts, second_counts),
+    ):
+        share_a, share_b = a @ values / a.sum(), b @ values / b.sum()
+        gap = share_a - share_b
+        boot = _bootstrap_means(values, a, num_replicates, rng) - _bootstrap_means(
+            values, b, num_replicates, rng
+        )
+        permuted = _permuted_differences(values, a, b, num_replicates, rng)
+        result[f"{prefix}first_share"] = share_a
+        result[f"{prefix}second_share"] = share_b
+        result[f"{prefix}gap"] = gap
+        result[f"{prefix}gap_low"], result[f"{prefix}gap_high"] = _interval(boot, confidence)
+        # Small tolerance so permutations tying the observed gap are counted despite rounding
+        extreme = np.abs(permuted) >= abs(gap) - 1e-12
+        result[f"{prefix}p_value"] = (1 + extreme.sum()) / (num_replicates + 1)
+    return result
@@ -0,0 +1,178 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# local imports
+from http_session import PooledSession, get_default_session
+
+#global constants
+API_URL = "https://api.genderize.io"
+MAX_NAMES_PER_REQUEST = 10
+MAX_WORKERS = 4
+MAX_RETRIES = 3
+# Longest pause for the rate limit to reset before a chunk is given up on
+MAX_RATE_LIMIT_WAIT = 60
+
+
+class GenderizeClient:
+    cacheable = True
+
+    def __init__(
+        self,
+        session: PooledSession = None,
+        country_id: str = None,
+        api_key: str = None,
+        chunk_size: int = MAX_NAMES_PER_REQUEST,
+        max_workers: int = MAX_WORKERS,
+        max_retries: int = MAX_RETRIES,
+        max_rate_limit_wait: float = MAX_RATE_LIMIT_WAIT,
+        api_url: str = API_URL,
+    ):
+        """Batch client for the genderize.io api
+
+        Adapted from https://github.com/acceptable-security/gender.py to use genderize.io api.
+        Names are deduplicated, split into chunks of at most chunk_size names and the chunks are sent
+        concurrently. The X-Rate-Limit-Remaining and X-Rate-Limit-Reset headers of every response are tracked
+        and requests pause until the reset when the remaining allowance runs out. A chunk that keeps failing
+        is recorded in failed instead of failing the whole lookup.
+
+        Attributes:
+            session (PooledSession): session used to call genderize.io. Defaults to the shared session
+            country_id (str): optional ISO 3166-1 alpha-2 country code to localize predictions
+            api_key (str): optional genderize.io api key
+            chunk_size (int): names per request, genderize.io accepts at most 10
+            max_workers (int): number of chunks requested at once
+            max_retries (int): retries of a chunk after an error response
+            max_rate_limit_wait (float): longest pause in seconds for the rate limit to reset
+            api_url (str): genderize.io endpoint
+        """
+        self.session = get_default_session() if session is None else session
+        self.country_id = country_id
+        self.api_key = api_key
+        self.chunk_size = min(chunk_size, MAX_NAMES_PER_REQUEST)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.max_rate_limit_wait = max_rate_limit_wait
+        self.api_url = api_url
+
+        self.failed = []
+        self.num_requests = 0
+        self._limit = None
+        self._remaining = None
+        self._reset_at = None
+        self._lock = threading.Lock()
+
+    def lookup(self, names: List[str]) -> Dict[str, Dict]:
+        """Classify first names
+
+        Arguments:
+            names (List[str]): first names, duplicates are requested once
+        Returns:
+            Dict[str, Dict]: name to [gender, probability, count]. Names whose chunk failed are left out and
+                listed in failed
+        """
+        names = list(dict.fromkeys(names))
+        chunks = [
+            names[i : i + self.chunk_size] for i in range(0, len(names), self.chunk_size)
+        ]
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for chunk_results in executor.map(self._lookup_chunk, chunks):
+                results.update(chunk_results)
+        return results
+
+    def rate_limit(self) -> Dict[str, Optional[float]]:
+        """Rate limit reported by the latest response
+
+        Returns:
+            Dict[str, float]: names allowed per window, remaining names and seconds until the limit resets, None
+                if unknown
+        """
+        with self._lock:
+            reset = None
+            if self._reset_at is not None:
+                reset = max(self._reset_at - time.monotonic(), 0.0)
+            return {"limit": self._limit, "remaining": self._remaining, "reset": reset}
+
+    def _lookup_chunk(self, names: List[str]) -> Dict[str, Dict]:
+        params = [("name[]", name) for name in names]
+        if self.country_id is not None:
+            params.append(("country_id", self.country_id))
+        if self.api_key is not None:
+            params.append(("apikey", self.api_key))
+
+        for attempt in range(self.max_retries + 1):
+            if not self._reserve(len(names)):
+                break
+            try:
+                response = self.session.get(self.api_url, params=params)
+            except Exception:
+                time.sleep(2**attempt)
+                continue
+            self._update_rate_limit(response.headers)
+
+            if response.status_code == 200:
+                return {
+                    name: {
+                        "gender": result.get("gender"),
+                        "probability": result.get("probability"),
+                        "count": result.get("count"),
+                    }
+                    for name, result in zip(names, response.json())
+                }
+            if response.status_code == 429:
+                # limit is exhausted, the next reservation waits for the reset
+                with self._lock:
+                    self._remaining = 0
+            else:
+                time.sleep(2**attempt)
+
+        with self._lock:
+            self.failed.extend(names)
+        return {}
+
+    def _reserve(self, num_names: int) -> bool:
+        """Wait until the rate limit allows num_names more names
+
+        Returns:
+            bool: False if the limit resets later than max_rate_limit_wait
+        """
+        while True:
+            with self._lock:
+                if self._remaining is None or self._remaining >= num_names:
+                    if self._remaining is not None:
+                        self._remaining -= num_names
+                    self.num_requests += 1
+                    return True
+                if self._reset_at is None:
+                    # no reset reported, try again shortly
+                    self._reset_at = time.monotonic() + 1.0
+                wait = self._reset_at - time.monotonic()
+                if wait > self.max_rate_limit_wait:
+                    return False
+                if wait <= 0:
+                    # limit should have reset, let the next response report it again
+                    self._remaining = None
+                    self._reset_at = None
+                    continue
+            time.sleep(wait)
+
+    def _update_rate_limit(self, headers):
+        limit = headers.get("X-Rate-Limit-Limit")
+        remaining = headers.get("X-Rate-Limit-Remaining")
+        reset = headers.get("X-Rate-Limit-Reset")
+        with self._lock:
+            if limit is not None:
+                self._limit = int(limit)
+            if remaining is not None:
+                self._remaining = int(remaining)
+            if reset is not None:
+                self._reset_at = time.monotonic() + float(reset)
+
+
+if __name__ == "__main__":
+    client = GenderizeClient()
+    print(client.lookup(["peter", "lois", "stewie"]))
+    print(client.rate_limit())
@@ -0,0 +1,60 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import List
+
+# local imports
+from choices import PARSERS
+
+
+def parse_html(
+    text: str, parser: str = "html.parser", name_tag=None, html_class_name=None
+) -> BeautifulSoup:
+    """Parse html with the chosen BeautifulSoup backend
+
+    When name_tag or html_class_name is given, only elements matching them (and their children) are built,
+    which is much faster on large pages but only valid if every lookup afterwards stays inside those elements.
+
+    Arguments:
+        text (str): html text
+        parser (str): one of PARSERS. selectolax has no BeautifulSoup tree so it is parsed with lxml here
+        name_tag (str): tag of the elements to keep
+        html_class_name (str): class of the elements to keep
+    Returns:
+        BeautifulSoup: parsed html
+    Raises:
+        Exception: "Invalid choice for parser: {parser}. Must be one of {PARSERS}"
+    """
+    if parser not in PARSERS:
+        raise Exception(f"Invalid choice for parser: {parser}. Must be one of {PARSERS}")
+    features = "lxml" if parser == "selectolax" else parser
+
+    parse_only = None
+    if name_tag is not None or html_class_name is not None:
+        parse_only = SoupStrainer(name_tag, {"class": html_class_name})
+    return BeautifulSoup(text, features, parse_only=parse_only)
+
+
+def select_texts(text: str, name_tag: str, html_class_name: str) -> List[str]:
+    """Text of every element with the given tag and class, using selectolax's lexbor parser
+
+    Matches classes the same way as BeautifulSoup's find_all(name_tag, {"class": html_class_name}): a class
+    containing a space must equal the whole class attribute, otherwise it must be one of the element's classes.
+
+    Arguments:
+        text (str): html text
+        name_tag (str): tag of the elements
+        html_class_name (str): class of the elements
+    Returns:
+        List[str]: text of the matching elements
+    """
+    from selectolax.lexbor import LexborHTMLParser
+
+    texts = []
+    for node in LexborHTMLParser(text).css(name_tag):
+        node_class = node.attributes.get("class") or ""
+        if " " in html_class_name:
+            matched = node_class == html_class_name
+        else:
+            matched = html_class_name in node_class.split()
+        if matched:
+            texts.append(node.text())
+    return texts
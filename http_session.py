@@ -0,0 +1,159 @@
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# local imports
+from fetch_policy import FetchPolicy
+from response_cache import ResponseCache
+
+#global constants
+POOL_CONNECTIONS = 64
+POOL_MAXSIZE = 8
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+_default_session = None
+
+
+class PooledSession:
+    def __init__(
+        self,
+        pool_maxsize: int = POOL_MAXSIZE,
+        pool_connections: int = POOL_CONNECTIONS,
+        http2: bool = False,
+        cache: ResponseCache = None,
+        policy: FetchPolicy = None,
+    ):
+        """HTTP session shared by all extractors and the gender classifier
+
+        Keeps connections alive between requests so pages on the same host reuse one TLS handshake.
+        Uses requests by default. With http2, uses httpx which must be installed with the http2 extra.
+
+        Attributes:
+            pool_maxsize (int): maximum number of kept alive connections per host
+            pool_connections (int): number of hosts to keep connection pools for. Should be at least the
+                number of distinct hosts scraped so pools are not dropped
+            http2 (bool): negotiate HTTP/2 where the server supports it
+            cache (ResponseCache): optional on-disk cache used when fetching webpages
+            policy (FetchPolicy): timeouts, retries, hedging and circuit breakers used when fetching webpages.
+                Defaults to FetchPolicy()
+        """
+        self.pool_maxsize = pool_maxsize
+        self.pool_connections = pool_connections
+        self.http2 = http2
+        self.cache = cache
+        self.policy = FetchPolicy() if policy is None else policy
+        self._num_requests = 0
+        self._streams = set()
+
+        if http2:
+            import httpx
+
+            self._client = httpx.Client(
+                http2=True,
+                verify=False,
+                headers=HEADERS,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=pool_maxsize * pool_connections,
+                    max_keepalive_connections=pool_maxsize * pool_connections,
+                ),
+            )
+            self._timeout = httpx.Timeout(self.policy.read_timeout, connect=self.policy.connect_timeout)
+        else:
+            self._client = requests.Session()
+            self._client.verify = False
+            self._client.headers.update(HEADERS)
+            adapter = HTTPAdapter(
+                pool_connections=pool_connections, pool_maxsize=pool_maxsize
+            )
+            self._client.mount("https://", adapter)
+            self._client.mount("http://", adapter)
+            self._timeout = (self.policy.connect_timeout, self.policy.read_timeout)
+
+    def get(self, url: str, **kwargs):
+        """Send a GET request through the shared connection pool
+
+        Arguments:
+            url (str): url to request
+            **kwargs: passed to the underlying client's get
+        Returns:
+            requests.Response or httpx.Response: response, both expose text, status_code and headers
+        """
+        response = self._client.get(url, **kwargs)
+        self._num_requests += 1
+        if self.http2:
+            stream = response.extensions.get("network_stream")
+            if stream is not None:
+                self._streams.add(id(stream))
+        return response
+
+    def get_page(self, url: str, **kwargs):
+        """Send a GET request for a webpage under the fetch policy
+
+        Arguments:
+            url (str): url to request
+            **kwargs: passed to get
+        Returns:
+            requests.Response or httpx.Response: response, e.g. a 200 or 404
+        Raises:
+            CircuitOpenError: if the host has failed too often and is being skipped
+            FetchError: if the page could not be fetched after all retries
+        """
+        kwargs.setdefault("timeout", self._timeout)
+        return self.policy.request(self.get, url, **kwargs)
+
+    def fetch_text(self, url: str) -> str:
+        """Html of a webpage, going through the response cache if there is one
+
+        Arguments:
+            url (str): website url
+        Returns:
+            str: html text
+        Raises:
+            CircuitOpenError: if the host has failed too often and is being skipped
+            FetchError: if the page could not be fetched after all retries
+        """
+        if self.cache is None:
+            return self.get_page(url).text
+        return self.cache.fetch(url, self.get_page)
+
+    def stats(self) -> Dict[str, int]:
+        """Connection reuse counts
+
+        Returns:
+            Dict[str, int]: number of requests, connections opened and requests served on a reused connection
+        """
+        if self.http2:
+            connections = len(self._streams)
+        else:
+            connections = 0
+            # both schemes are mounted on the same adapter
+            adapters = {id(a): a for a in self._client.adapters.values()}
+            for adapter in adapters.values():
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+        return {
+            "requests": self._num_requests,
+            "connections": connections,
+            "reused": max(self._num_requests - connections, 0),
+        }
+
+    def close(self):
+        """Close all pooled connections"""
+        self._client.close()
+
+
+def get_default_session() -> PooledSession:
+    """Session shared by extractors that were not given one
+
+    Returns:
+        PooledSession: process wide session
+    """
+    global _default_session
+    if _default_session is None:
+        _default_session = PooledSession()
+    return _default_session
@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+#global constants
+PROMETHEUS_PREFIX = "statnamescraper_"
+
+
+class Metrics:
+    enabled = True
+
+    def __init__(self):
+        """Counters, gauges and timings of a run, labelled by stage, school/journal, host or url
+
+        Timings keep a count, total and maximum per label set. Safe to use from the fetcher's threads.
+        """
+        self.counters = {}
+        self.gauges = {}
+        self.timings = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def timer(self, name: str, **labels) -> "_Timer":
+        """Context manager recording the wall time of its block
+
+        Arguments:
+            name (str): metric name, e.g. fetch or parse
+            labels: label values, e.g. source="berkeley"
+        """
+        return _Timer(self, name, labels)
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Record one timing
+
+        Arguments:
+            name (str): metric name
+            seconds (float): wall time
+            labels: label values
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            timing = self.timings.get(key)
+            if timing is None:
+                self.timings[key] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+
+    def count(self, name: str, value: float = 1, **labels):
+        """Add to a counter
+
+        Arguments:
+            name (str): metric name, e.g. fetch_bytes
+            value (float): amount added
+            labels: label values
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels):
+        """Set a value that can go up and down, e.g. the remaining genderize.io quota
+
+        Arguments:
+            name (str): metric name
+            value (float): latest value
+            labels: label values
+        """
+        with self._lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def summary(self) -> Dict:
+        """Machine readable summary of everything recorded
+
+        Returns:
+            Dict: [started_at, duration, counters, gauges, timings]. Each metric is a list of label sets with
+                their values
+        """
+        with self._lock:
+            counters = {}
+            for (name, labels), value in self.counters.items():
+                counters.setdefault(name, []).append({"labels": dict(labels), "value": value})
+            gauges = {}
+            for (name, labels), value in self.gauges.items():
+                gauges.setdefault(name, []).append({"labels": dict(labels), "value": value})
+            timings = {}
+            for (name, labels), (num, total, longest) in self.timings.items():
+                timings.setdefault(name, []).append(
+                    {"labels": dict(labels), "count": num, "sum": total, "max": longest}
+                )
+        return {
+            "started_at": self.started_at,
+            "duration": time.time() - self.started_at,
+            "counters": counters,
+            "gauges": gauges,
+            "timings": timings,
+        }
+
+    def write_json(self, path: str):
+        _write(path, json.dumps(self.summary(), indent=2))
+
+    def write_prometheus(self, path: str):
+        """Write the metrics in the Prometheus text exposition format, e.g. for the node exporter textfile
+        collector
+
+        Arguments:
+            path (str): output file, usually ending in .prom
+        """
+        summary = self.summary()
+        lines = []
+        for name, values in sorted(summary["counters"].items()):
+            metric = PROMETHEUS_PREFIX + name + "_total"
+            lines.append(f"# TYPE {metric} counter")
+            for value in values:
+                lines.append(f"{metric}{_prometheus_labels(value['labels'])} {value['value']}")
+        for name, values in sorted(summary["gauges"].items()):
+            metric = PROMETHEUS_PREFIX + name
+            lines.append(f"# TYPE {metric} gauge")
+            for value in values:
+                lines.append(f"{metric}{_prometheus_labels(value['labels'])} {value['value']}")
+        for name, values in sorted(summary["timings"].items()):
+            metric = PROMETHEUS_PREFIX + name + "_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for value in values:
+                labels = _prometheus_labels(value["labels"])
+                lines.append(f"{metric}_count{labels} {value['count']}")
+                lines.append(f"{metric}_sum{labels} {value['sum']}")
+            lines.append(f"# TYPE {metric}_max gauge")
+            for value in values:
+                lines.append(f"{metric}_max{_prometheus_labels(value['labels'])} {value['max']}")
+        _write(path, "\n".join(lines) + "\n")
+
+
+class NullMetrics:
+    enabled = False
+
+    def __init__(self):
+        """Metrics that record nothing, used when instrumentation is turned off"""
+
+    def timer(self, name: str, **labels) -> "_NullTimer":
+        return _NULL_TIMER
+
+    def observe(self, name: str, seconds: float, **labels):
+        pass
+
+    def count(self, name: str, value: float = 1, **labels):
+        pass
+
+    def gauge(self, name: str, value: float, **labels):
+        pass
+
+
+class _Timer:
+    def __init__(self, metrics: Metrics, name: str, labels: Dict[str, str]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+NULL_METRICS = NullMetrics()
+
+
+def _label_key(labels: Dict) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _prometheus_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{k}="' + v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+        for k, v in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _write(path: str, text: str):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,210 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, NamedTuple
+
+import pandas as pd
+
+#global constants
+QUEUE_PATH = os.path.expanduser("~/Desktop/WSDS/job_queue.sqlite")
+# Seconds a claimed unit stays with its worker before another worker may take it over
+LEASE_SECONDS = 600
+MAX_ATTEMPTS = 3
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+
+
+class WorkUnit(NamedTuple):
+    source: str
+    role: str
+    url: str
+
+
+def worker_name() -> str:
+    """Identifier of this worker, unique across machines and processes"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class JobQueue:
+    def __init__(
+        self,
+        path: str = QUEUE_PATH,
+        lease_seconds: float = LEASE_SECONDS,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        """Queue of scraping work units shared by any number of workers through a SQLite file
+
+        A unit is one page of one school or journal role. Workers claim units under a lease, and a unit whose
+        lease runs out, because its worker crashed or hung, can be claimed again. A unit that fails max_attempts
+        times is marked failed. Each finished unit keeps the names extracted from it, which merge combines.
+
+        Attributes:
+            path (str): SQLite database file, on storage every worker can reach
+            lease_seconds (float): seconds a worker has to finish a unit it claimed
+            max_attempts (int): claims of a unit before it is given up on
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # Autocommit, transactions are opened explicitly so a claim locks the database before reading
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS units (
+                source TEXT NOT NULL,
+                role TEXT NOT NULL,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                names TEXT,
+                error TEXT,
+                PRIMARY KEY (source, role, url)
+            )"""
+        )
+
+    def add(self, units: Iterable[WorkUnit]) -> int:
+        """Queue units that are not queued yet
+
+        Arguments:
+            units (Iterable[WorkUnit]): (source, role, url) units
+        Returns:
+            int: number of units added
+        """
+        rows = [(source, role, url, PENDING) for source, role, url in units]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO units (source, role, url, status) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.execute("COMMIT")
+            return self._conn.total_changes - before
+
+    def claim(self, worker: str, limit: int = 1) -> List[WorkUnit]:
+        """Lease pending units, or units whose lease ran out, to a worker
+
+        Arguments:
+            worker (str): worker identifier, e.g. from worker_name
+            limit (int): most units claimed
+        Returns:
+            List[WorkUnit]: claimed units, empty when nothing is left to claim
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Units whose last lease ran out after their final attempt are given up on
+                self._conn.execute(
+                    """UPDATE units SET status = ?, error = COALESCE(error, 'lease expired')
+                    WHERE status = ? AND lease_until < ? AND attempts >= ?""",
+                    (FAILED, LEASED, now, self.max_attempts),
+                )
+                rows = self._conn.execute(
+                    """SELECT source, role, url FROM units
+                    WHERE status = ? OR (status = ? AND lease_until < ?)
+                    ORDER BY attempts, rowid LIMIT ?""",
+                    (PENDING, LEASED, now, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    """UPDATE units SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1
+                    WHERE source = ? AND role = ? AND url = ?""",
+                    [(LEASED, worker, now + self.lease_seconds, *row) for row in rows],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [WorkUnit(*row) for row in rows]
+
+    def renew(self, worker: str, units: Iterable[WorkUnit]):
+        """Extend the leases a worker still holds"""
+        rows = [(time.time() + self.lease_seconds, *unit, worker, LEASED) for unit in units]
+        with self._lock:
+            self._conn.executemany(
+                """UPDATE units SET lease_until = ?
+                WHERE source = ? AND role = ? AND url = ? AND worker = ? AND status = ?""",
+                rows,
+            )
+
+    def complete(self, unit: WorkUnit, names: List[str]):
+        """Store the names of a finished unit
+
+        A unit finished by a worker whose lease ran out is still accepted, every attempt extracts the same names.
+        """
+        with self._lock:
+            self._conn.execute(
+                """UPDATE units SET status = ?, names = ?, error = NULL, lease_until = NULL
+                WHERE source = ? AND role = ? AND url = ?""",
+                (DONE, json.dumps(names), *unit),
+            )
+
+    def fail(self, worker: str, unit: WorkUnit, error: str):
+        """Return a unit to the queue after an error, or mark it failed after its last attempt
+
+        Only the worker holding the unit's lease may fail it, a worker whose lease ran out must not hand back a
+        unit another worker has claimed since.
+        """
+        with self._lock:
+            self._conn.execute(
+                """UPDATE units SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END,
+                    error = ?, lease_until = NULL
+                WHERE source = ? AND role = ? AND url = ? AND worker = ? AND status = ?""",
+                (self.max_attempts, FAILED, PENDING, error, *unit, worker, LEASED),
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """Number of units by status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM units GROUP BY status").fetchall()
+        return {**{status: 0 for status in (PENDING, LEASED, DONE, FAILED)}, **dict(rows)}
+
+    def merge(self) -> pd.DataFrame:
+        """Names of every school and journal role whose units all finished
+
+        As in a single process run, one failed or unfinished page leaves its whole school or journal role out.
+
+        Returns:
+            pd.DataFrame: [school/journal, role, url, name] in queue order
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, role, url, status, names FROM units ORDER BY rowid"
+            ).fetchall()
+        incomplete = {(source, role) for source, role, _, status, _ in rows if status != DONE}
+        records = []
+        for source, role, url, status, names in rows:
+            if (source, role) in incomplete:
+                continue
+            records.extend(
+                {"school/journal": source, "role": role, "url": url, "name": name}
+                for name in json.loads(names)
+            )
+        return pd.DataFrame(records, columns=["school/journal", "role", "url", "name"])
+
+    def incomplete(self) -> pd.DataFrame:
+        """Units merge leaves out
+
+        Returns:
+            pd.DataFrame: [school/journal, role, url, status, attempts, error] of units not done
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT source, role, url, status, attempts, error FROM units
+                WHERE status != ? ORDER BY rowid""",
+                (DONE,),
+            ).fetchall()
+        return pd.DataFrame(
+            rows, columns=["school/journal", "role", "url", "status", "attempts", "error"]
+        )
+
+    def close(self):
+        self._conn.close()
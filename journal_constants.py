@@ -31,12 +31,55 @@ NAME_CLASS = {
     "annals_of_stat": "TOCLineItemText2 linkBlueToBlue",
     "jasa": "articleEntryAuthorsLinks",
     "annals_of_prob": "TOCLineItemText2 linkBlueToBlue",
-    "jss": "col-sm-9 authors"
+    "jss": "col-sm-9 authors",
+    "annals_of_applied_stat": "TOCLineItemText2 linkBlueToBlue",
 }
 
 NAME_TAG = {
     "annals_of_stat": "span",
     "jasa": "span",
     "annals_of_prob": "span",
-    "jss": "div"
+    "jss": "div",
+    "annals_of_applied_stat": "span",
+}
+
+# Table of contents urls of every issue, used to build the crawl frontier in journal_frontier
+#   template (str): url with {volume} and optionally {issue} fields
+#   volumes (list): first and last volume crawled
+#   issues (int): most issues per volume, crawling a volume stops at the first missing issue. None if the
+#       template has no issue
+#   first_issue (list): [volume, issue] for journals numbering issues continuously across volumes
+#   year_offset (int): volume + year_offset is the publication year. None if volumes do not follow years
+URL_TEMPLATES = {
+    "annals_of_stat": {
+        "template": "https://projecteuclid.org/journals/annals-of-statistics/volume-{volume}/issue-{issue}",
+        "volumes": [39, 49],
+        "issues": 6,
+        "year_offset": 1972,
+    },
+    "annals_of_prob": {
+        "template": "https://projecteuclid.org/journals/annals-of-probability/volume-{volume}/issue-{issue}",
+        "volumes": [39, 49],
+        "issues": 6,
+        "year_offset": 1972,
+    },
+    "annals_of_applied_stat": {
+        "template": "https://projecteuclid.org/journals/annals-of-applied-statistics/volume-{volume}/issue-{issue}",
+        "volumes": [5, 15],
+        "issues": 4,
+        "year_offset": 2006,
+    },
+    "jasa": {
+        "template": "https://www.tandfonline.com/toc/uasa20/{volume}/{issue}?nav=tocList",
+        "volumes": [106, 116],
+        "issues": 4,
+        "first_issue": [116, 533],
+        "year_offset": 1905,
+    },
+    "jss": {
+        "template": "https://www.jstatsoft.org/index.php/jss/issue/view/v{volume:03d}",
+        "volumes": [39, 100],
+        "issues": None,
+        "year_offset": None,
+    },
 }
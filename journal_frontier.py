@@ -0,0 +1,273 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# local imports
+from fetcher import AsyncFetcher, get_host
+from http_session import PooledSession, get_default_session
+from instrumentation import NULL_METRICS
+from response_cache import CacheMissError
+import fetcher
+import journal_constants
+
+#global constants
+CHECKPOINT_PATH = os.path.expanduser("~/Desktop/WSDS/journal_frontier.json")
+# Least seconds between two requests to the same host
+HOST_DELAY = {
+    "projecteuclid.org": 0.5,
+    "tandfonline.com": 1.0,
+}
+DEFAULT_HOST_DELAY = 0.25
+NOT_FOUND = 404
+
+
+class IssuePage(NamedTuple):
+    journal: str
+    volume: int
+    issue: Optional[int]
+    year: Optional[int]
+    url: str
+
+
+def build_frontier(
+    journals: List[str] = None, first_year: int = None, last_year: int = None
+) -> List[IssuePage]:
+    """Table of contents pages of every volume and issue from journal_constants.URL_TEMPLATES
+
+    Arguments:
+        journals (List[str]): journals to crawl. Defaults to every journal with a template
+        first_year (int): skip volumes published before this year. Journals whose volumes do not follow years
+            are not filtered
+        last_year (int): skip volumes published after this year
+    Returns:
+        List[IssuePage]: pages ordered by journal, volume and issue, without duplicate urls
+    """
+    journals = list(journal_constants.URL_TEMPLATES) if journals is None else journals
+    frontier = {}
+    for journal in journals:
+        template = journal_constants.URL_TEMPLATES.get(journal)
+        if template is None:
+            raise Exception(
+                f"No url template for journal: {journal}. Must be one of {list(journal_constants.URL_TEMPLATES)}"
+            )
+        first_volume, last_volume = template["volumes"]
+        for volume in range(first_volume, last_volume + 1):
+            year = None
+            if template.get("year_offset") is not None:
+                year = volume + template["year_offset"]
+                if first_year is not None and year < first_year:
+                    continue
+                if last_year is not None and year > last_year:
+                    continue
+            for issue in _issues(template, volume):
+                url = template["template"].format(volume=volume, issue=issue)
+                frontier.setdefault(url, IssuePage(journal, volume, issue, year, url))
+    return list(frontier.values())
+
+
+def _issues(template: Dict, volume: int) -> List[Optional[int]]:
+    """Issue numbers of a volume in crawl order"""
+    if template.get("issues") is None:
+        return [None]
+    first = 1
+    if template.get("first_issue") is not None:
+        anchor_volume, anchor_issue = template["first_issue"]
+        first = anchor_issue + (volume - anchor_volume) * template["issues"]
+    return list(range(first, first + template["issues"]))
+
+
+class _StatusFetcher(AsyncFetcher):
+    def __init__(self, host_delay: Dict[str, float], default_host_delay: float, **kwargs):
+        """AsyncFetcher returning (status code, html text) and spacing out requests to the same host"""
+        super().__init__(**kwargs)
+        self.host_delay = host_delay
+        self.default_host_delay = default_host_delay
+        self._next_at = {}
+        self._lock = threading.Lock()
+
+    def _get(self, url: str) -> Tuple[Optional[int], str]:
+        cache = self.session.cache
+        if cache is not None and cache.offline:
+            try:
+                return 200, cache.fetch(url, self.session.get_page)
+            except CacheMissError:
+                # Not known to be missing, an online crawl fetches it
+                return None, ""
+
+        self._wait_turn(get_host(url))
+        statuses = {}
+
+        def get(url: str, **kwargs):
+            response = self.session.get_page(url, **kwargs)
+            statuses[url] = response.status_code
+            return response
+
+        try:
+            with self.metrics.timer("fetch", host=get_host(url), url=url):
+                text = get(url).text if cache is None else cache.fetch(url, get)
+        except Exception:
+            # Connection errors, exhausted retries and open circuits are retried by the next crawl
+            return None, ""
+        # A 304 revalidation of a cached page means the page exists
+        status = statuses.get(url, 200)
+        return (200 if status == 304 else status), text
+
+    def _wait_turn(self, host: str):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at.get(host, now))
+            self._next_at[host] = start + self.host_delay.get(host, self.default_host_delay)
+        if start > now:
+            time.sleep(start - now)
+
+
+class JournalCrawler:
+    def __init__(
+        self,
+        session: PooledSession = None,
+        max_concurrency: int = fetcher.MAX_CONCURRENCY,
+        host_concurrency: Dict[str, int] = None,
+        host_delay: Dict[str, float] = None,
+        default_host_delay: float = DEFAULT_HOST_DELAY,
+        parser: str = "html.parser",
+        checkpoint_path: str = CHECKPOINT_PATH,
+        metrics=None,
+    ):
+        """Crawl a frontier of journal issues and extract their authors
+
+        Issues are fetched in waves: wave k requests issue k of every volume still open, concurrently across
+        volumes and journals within the per-host limits. A volume is closed at its first missing issue, so
+        volumes with fewer issues than the template allows, or not yet published, stop cleanly. Progress is
+        checkpointed after every wave and a crawl restarted with the same checkpoint only fetches pages it has
+        not finished.
+
+        Attributes:
+            session (PooledSession): session used to download pages. Defaults to the shared session
+            max_concurrency (int): maximum number of requests in flight across all hosts
+            host_concurrency (Dict[str, int]): maximum number of requests in flight per host. Defaults to
+                fetcher.HOST_CONCURRENCY
+            host_delay (Dict[str, float]): least seconds between requests to a host. Defaults to HOST_DELAY
+            default_host_delay (float): least seconds between requests to any other host
+            parser (str): html parser backend, one of html_parser.PARSERS
+            checkpoint_path (str): json file progress is saved to. If None, progress is not saved
+            metrics (Metrics): records download and parse time per url. Defaults to recording nothing
+        """
+        self.session = get_default_session() if session is None else session
+        self.max_concurrency = max_concurrency
+        self.host_concurrency = host_concurrency
+        self.host_delay = HOST_DELAY if host_delay is None else host_delay
+        self.default_host_delay = default_host_delay
+        self.parser = parser
+        self.checkpoint_path = checkpoint_path
+        self.metrics = NULL_METRICS if metrics is None else metrics
+        self.done = self._load_checkpoint()
+
+    def crawl(self, frontier: List[IssuePage]) -> List[Dict]:
+        """Fetch every page of the frontier until its volume ends and extract the author names
+
+        Arguments:
+            frontier (List[IssuePage]): pages from build_frontier
+        Returns:
+            List[Dict]: record per name [school/journal, role, name, volume, issue, year, url]
+        """
+        volumes = {}
+        for page in frontier:
+            volumes.setdefault((page.journal, page.volume), []).append(page)
+
+        page_fetcher = _StatusFetcher(
+            host_delay=self.host_delay,
+            default_host_delay=self.default_host_delay,
+            max_concurrency=self.max_concurrency,
+            host_concurrency=self.host_concurrency,
+            session=self.session,
+            metrics=self.metrics,
+        )
+        open_volumes = list(volumes)
+        wave = 0
+        while open_volumes:
+            pages = [volumes[v][wave] for v in open_volumes if wave < len(volumes[v])]
+            if not pages:
+                break
+            statuses = {
+                page.url: self.done[page.url]["status"] for page in pages if page.url in self.done
+            }
+            todo = [page for page in pages if page.url not in self.done]
+            if todo:
+                fetched = page_fetcher.fetch_all([page.url for page in todo])
+                for page in todo:
+                    status, text = fetched[page.url]
+                    statuses[page.url] = status
+                    # Only pages that exist or are missing are final, errors are fetched again next crawl
+                    if status == 200:
+                        self.done[page.url] = {"status": status, "names": self._get_names(page, text)}
+                    elif status == NOT_FOUND:
+                        self.done[page.url] = {"status": status, "names": []}
+                self._save_checkpoint()
+
+            # A missing issue ends its volume
+            ended = {
+                (page.journal, page.volume)
+                for page in pages
+                if statuses[page.url] == NOT_FOUND
+            }
+            open_volumes = [
+                v for v in open_volumes if v not in ended and wave + 1 < len(volumes[v])
+            ]
+            wave += 1
+
+        records = []
+        for page in frontier:
+            entry = self.done.get(page.url)
+            if entry is None:
+                continue
+            for name in entry["names"]:
+                records.append(
+                    {
+                        "school/journal": page.journal,
+                        "role": "author",
+                        "name": name,
+                        "volume": page.volume,
+                        "issue": page.issue,
+                        "year": page.year,
+                        "url": page.url,
+                    }
+                )
+        return records
+
+    def _get_names(self, page: IssuePage, text: str) -> List[str]:
+        # imported here so the checkpoint path and frontier can be used without the html parsers
+        from extract_author_names import ExtractAuthorNames
+
+        extract_names = ExtractAuthorNames(
+            journal=page.journal,
+            pages={page.url: text},
+            session=self.session,
+            parser=self.parser,
+            metrics=self.metrics,
+        )
+        return [name for name in extract_names.get_page_names(page.url) if name.strip()]
+
+    def _load_checkpoint(self) -> Dict[str, Dict]:
+        """Pages finished by an earlier crawl, url to [status, names]"""
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_checkpoint(self):
+        if self.checkpoint_path is None:
+            return
+        folder = os.path.dirname(self.checkpoint_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.done, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+
+if __name__ == "__main__":
+    frontier = build_frontier(first_year=2020)
+    print(len(frontier), frontier[:3])
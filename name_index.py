@@ -0,0 +1,79 @@
+import re
+import unicodedata
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+# Periods and runs of whitespace, so "J. Smith", "J Smith" and "J.  Smith" share a key
+SEPARATORS = re.compile(r"[.\s]+")
+# Person id of a missing name, which is neither indexed nor counted
+MISSING_ID = -1
+
+
+def person_key(name: str) -> str:
+    """Key identifying a person across spellings of their name
+
+    Arguments:
+        name (str): full name as scraped
+    Returns:
+        str: name with accents removed, case folded, periods dropped and whitespace collapsed
+    """
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return SEPARATORS.sub(" ", name.casefold()).strip()
+
+
+class NameIndex:
+    def __init__(self):
+        """Hash index from normalized name key to a canonical person
+
+        Every distinct key gets a person id in the order it is first seen and the first spelling seen becomes
+        the canonical name. Ids stay stable across calls to add, so batches of one run can be joined.
+        """
+        self.ids = {}
+        self.names = []
+        self.occurrences = np.zeros(0, dtype=np.int64)
+
+    def add(self, names: Iterable[str]) -> np.ndarray:
+        """Index names and return the person id of each
+
+        Only distinct spellings are normalized, the ids are broadcast back to every occurrence. Missing names
+        get MISSING_ID.
+
+        Arguments:
+            names (Iterable[str]): full names, repeats allowed
+        Returns:
+            np.ndarray: person id of each name, in order
+        """
+        codes, spellings = pd.factorize(pd.Series(list(names), dtype=object))
+        spelling_ids = np.empty(len(spellings), dtype=np.int64)
+        for i, spelling in enumerate(spellings):
+            key = person_key(spelling)
+            person_id = self.ids.get(key)
+            if person_id is None:
+                person_id = len(self.names)
+                self.ids[key] = person_id
+                self.names.append(spelling)
+            spelling_ids[i] = person_id
+
+        # the -1 code of missing names indexes a trailing MISSING_ID
+        person_ids = np.append(spelling_ids, MISSING_ID)[codes]
+        counts = np.bincount(person_ids[person_ids != MISSING_ID], minlength=len(self.names))
+        counts[: len(self.occurrences)] += self.occurrences
+        self.occurrences = counts
+        return person_ids
+
+    def persons(self) -> pd.DataFrame:
+        """One row per distinct person
+
+        Returns:
+            pd.DataFrame: [person_id, name, occurrences] with name the canonical spelling
+        """
+        return pd.DataFrame(
+            {
+                "person_id": np.arange(len(self.names)),
+                "name": self.names,
+                "occurrences": self.occurrences,
+            }
+        )
@@ -0,0 +1,89 @@
+import re
+
+import pandas as pd
+
+#global constants
+# Titles before the name, e.g. "Dr. Jane Doe" or "Prof. Dr. Jane Doe"
+HONORIFICS = re.compile(
+    r"^(?:(?:dr|prof|professor|assoc|asst|mr|mrs|ms|miss|mx|sir|dame|rev)\.?\s+)+", re.IGNORECASE
+)
+# Generational suffixes, and degrees after a comma, e.g. "Jane Doe Jr." or "Jane Doe, Ph.D.". Degrees that are
+# also surnames, e.g. Ma, are only stripped after a comma
+SUFFIXES = re.compile(
+    r"(?:(?:,\s*|\s+)(?:jr|sr|ii|iii|iv)\.?"
+    r"|,\s*(?:m\.?d|m\.?s|m\.?a|m\.?b\.?a|m\.?phil|d\.?phil|sc\.?d|esq|cpa)\.?"
+    r"|(?:,\s*|\s+)ph\.?\s?d\.?)+$",
+    re.IGNORECASE,
+)
+# Generational suffixes before the comma of "Last Jr., First", which SUFFIXES misses as they are not at the end
+SUFFIXES_BEFORE_COMMA = re.compile(r"(?:,\s*|\s+)(?:jr|sr|ii|iii|iv)\.?(?=\s*,)", re.IGNORECASE)
+# Name parts added to classified names, see gender_classifier.RunGenderClassifier
+PART_COLUMNS = ["first_name", "middle_name", "last_name", "usable_first_name"]
+# Nicknames and notes in parentheses or quotes, e.g. 'Robert "Bob" Smith'
+NICKNAMES = re.compile(r"\s*(?:\([^)]*\)|\"[^\"]*\"|“[^”]*”)")
+WHITESPACE = re.compile(r"\s+")
+# "Last, First Middle" once suffixes are gone
+LAST_FIRST = re.compile(r"^(?P<last>[^,]+),\s*(?P<rest>[^,]+)$")
+# First token, optional middle tokens and last token
+PARTS = re.compile(r"^(?P<first>\S+)(?:\s+(?P<middle>.*?))??(?:\s+(?P<last>\S+))?$")
+# A single letter with an optional period, or dotted initials like "J.-P." or "J.R."
+INITIAL = re.compile(r"^(?:[^\W\d_]\.?|(?:[^\W\d_]\.-?)+)$")
+# At least two letters, optionally joined by hyphens or apostrophes, e.g. "Jean-Pierre" or "D'Arcy"
+USABLE = re.compile(r"^(?=.{2})[^\W\d_]+(?:[-'’][^\W\d_]+)*$")
+
+
+def parse_names(names: pd.Series) -> pd.DataFrame:
+    """Split full names into parts and pick the first name to classify
+
+    Every rule runs as a vectorized string operation over the whole column. Nicknames, honorifics and
+    suffixes are removed, including the one before the comma of "Last Jr., First", "Last, First" is flipped,
+    and when the first name is an initial the first middle name that is not is used instead, e.g.
+    "J. Michael Smith" gives Michael.
+
+    Arguments:
+        names (pd.Series): full names as scraped
+    Returns:
+        pd.DataFrame: one row per name, aligned with names, with columns first_name, middle_name, last_name,
+            suffix, given_name, the name to classify, and usable_first_name, False when given_name is an
+            initial, has digits or is missing so the name should not be sent to a classifier
+    """
+    index = pd.Series(names).index
+    names = pd.Series(names, dtype=object).fillna("").astype(str).reset_index(drop=True)
+    cleaned = names.str.replace(NICKNAMES, "", regex=True)
+    cleaned = cleaned.str.replace(WHITESPACE, " ", regex=True).str.strip(" ,;")
+    cleaned = cleaned.str.replace(HONORIFICS, "", regex=True)
+    suffix = cleaned.str.extract(f"(?P<suffix>{SUFFIXES.pattern})", flags=re.IGNORECASE)["suffix"]
+    cleaned = cleaned.str.replace(SUFFIXES, "", regex=True).str.strip(" ,;")
+    inner_suffix = cleaned.str.extract(
+        f"(?P<suffix>{SUFFIXES_BEFORE_COMMA.pattern})", flags=re.IGNORECASE
+    )["suffix"]
+    suffix = suffix.fillna(inner_suffix)
+    cleaned = cleaned.str.replace(SUFFIXES_BEFORE_COMMA, "", regex=True)
+
+    flipped = cleaned.str.extract(LAST_FIRST)
+    is_flipped = flipped["last"].notna()
+    cleaned = cleaned.where(~is_flipped, flipped["rest"].str.strip() + " " + flipped["last"].str.strip())
+
+    parts = cleaned.str.extract(PARTS)
+    first = parts["first"].fillna("")
+    middle = parts["middle"].fillna("")
+    last = parts["last"].fillna("")
+
+    # the first middle name that is not an initial replaces an initial first name
+    first_is_initial = first.str.match(INITIAL)
+    tokens = middle.str.split(" ").explode()
+    tokens = tokens[(tokens != "") & ~tokens.str.match(INITIAL).astype(bool)]
+    spelled = tokens.groupby(level=0).first().reindex(names.index, fill_value="")
+    given = first.where(~first_is_initial | (spelled == ""), spelled)
+
+    return pd.DataFrame(
+        {
+            "first_name": first.to_numpy(),
+            "middle_name": middle.to_numpy(),
+            "last_name": last.to_numpy(),
+            "suffix": suffix.fillna("").str.strip(" ,").to_numpy(),
+            "given_name": given.to_numpy(),
+            "usable_first_name": given.str.match(USABLE).to_numpy(dtype=bool),
+        },
+        index=index,
+    )
@@ -0,0 +1,168 @@
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List
+
+# local imports
+from gender_cache import normalize_first_name
+
+#global constants
+TABLE_PATH = os.path.expanduser("~/Desktop/WSDS/name_table.bin")
+MAGIC = b"SGNT"
+VERSION = 1
+# magic, version, number of names
+HEADER = struct.Struct("=4sIQ")
+
+
+def build_name_table(source_path: str, table_path: str = TABLE_PATH) -> int:
+    """Compile a first name dump into a name table file
+
+    The source is a csv with columns name, count and either p_male or gender and probability (as returned by
+    genderize.io), or a json file holding a list of such records or a dictionary of name to record.
+
+    The file holds a header, the string offsets of each name, P(male) as float32, counts as uint32 and finally
+    the normalized names sorted by their utf-8 bytes. Arrays are written in native byte order.
+
+    Arguments:
+        source_path (str): csv or json dump
+        table_path (str): name table file to write
+    Returns:
+        int: number of names in the table
+    """
+    with open(source_path, encoding="utf-8-sig") as f:
+        if source_path.endswith(".json"):
+            records = json.load(f)
+            if isinstance(records, dict):
+                records = [dict(record, name=name) for name, record in records.items()]
+        else:
+            records = list(csv.DictReader(f))
+
+    table = {}
+    for record in records:
+        key = normalize_first_name(record["name"]).encode("utf-8")
+        if record.get("p_male") not in (None, ""):
+            p_male = float(record["p_male"])
+        elif record.get("gender") in ("male", "female"):
+            probability = float(record.get("probability") or 1.0)
+            p_male = probability if record["gender"] == "male" else 1.0 - probability
+        else:
+            continue
+        table[key] = (p_male, int(float(record.get("count") or 0)))
+
+    keys = sorted(table)
+    offsets = array("Q", [0])
+    for key in keys:
+        offsets.append(offsets[-1] + len(key))
+    p_male = array("f", (table[key][0] for key in keys))
+    counts = array("I", (table[key][1] for key in keys))
+
+    folder = os.path.dirname(table_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(table_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(keys)))
+        offsets.tofile(f)
+        p_male.tofile(f)
+        counts.tofile(f)
+        f.write(b"".join(keys))
+    return len(keys)
+
+
+class NameTable:
+    cacheable = False
+
+    def __init__(self, table_path: str = TABLE_PATH):
+        """Offline first name gender backend for RunGenderClassifier
+
+        Memory maps a file written by build_name_table so opening it does not parse anything. Lookups are
+        binary searches over the sorted names, done for a whole batch of names in sorted order.
+
+        Attributes:
+            table_path (str): name table file
+        """
+        self.table_path = table_path
+        with open(table_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise Exception(f"{table_path} is not a version {VERSION} name table")
+
+        view = memoryview(self._mm)
+        start = HEADER.size
+        self._offsets = view[start : start + 8 * (n + 1)].cast("Q")
+        start += 8 * (n + 1)
+        self._p_male = view[start : start + 4 * n].cast("f")
+        start += 4 * n
+        self._counts = view[start : start + 4 * n].cast("I")
+        start += 4 * n
+        self._names = view[start:]
+        self.size = n
+
+    def lookup(self, names: List[str]) -> Dict[str, Dict]:
+        """Classify first names from the table
+
+        Arguments:
+            names (List[str]): first names
+        Returns:
+            Dict[str, Dict]: name to [gender, probability, count, p_male]. Names not in the table have gender None
+        """
+        keys = {name: normalize_first_name(name).encode("utf-8") for name in names}
+        found = {}
+        lo = 0
+        # sorted queries only ever move the lower search bound forward
+        for key in sorted(set(keys.values())):
+            lo = self._search(key, lo)
+            if lo < self.size and self._key(lo) == key:
+                found[key] = lo
+
+        results = {}
+        for name, key in keys.items():
+            i = found.get(key)
+            if i is None:
+                results[name] = {
+                    "gender": None,
+                    "probability": None,
+                    "count": 0,
+                    "p_male": None,
+                }
+                continue
+            p_male = self._p_male[i]
+            results[name] = {
+                "gender": "male" if p_male >= 0.5 else "female",
+                "probability": max(p_male, 1.0 - p_male),
+                "count": self._counts[i],
+                "p_male": p_male,
+            }
+        return results
+
+    def close(self):
+        self._offsets.release()
+        self._p_male.release()
+        self._counts.release()
+        self._names.release()
+        self._mm.close()
+
+    def _key(self, i: int) -> bytes:
+        return self._names[self._offsets[i] : self._offsets[i + 1]].tobytes()
+
+    def _search(self, key: bytes, lo: int) -> int:
+        """Index of the first name not less than key, searching from lo"""
+        hi = self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+if __name__ == "__main__":
+    table_path = sys.argv[2] if len(sys.argv) > 2 else TABLE_PATH
+    num_names = build_name_table(sys.argv[1], table_path)
+    print(f"Wrote {num_names} names")
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+#global constants
+INDEX_PATH = os.path.expanduser("~/Desktop/WSDS/page_index.json")
+
+# Parts of a page that change on every request without changing the roster
+VOLATILE_PATTERNS = [
+    re.compile(r"<script\b.*?</script>", re.DOTALL | re.IGNORECASE),
+    re.compile(r"<style\b.*?</style>", re.DOTALL | re.IGNORECASE),
+    re.compile(r"<!--.*?-->", re.DOTALL),
+    re.compile(r'\s(?:nonce|value|data-csrf[\w-]*)="[^"]*"', re.IGNORECASE),
+]
+WHITESPACE = re.compile(r"\s+")
+
+
+def body_hash(text: str) -> str:
+    """Hash of a page with scripts, styles, comments, tokens and whitespace differences removed
+
+    Arguments:
+        text (str): html text
+    Returns:
+        str: sha256 hex digest of the normalized page
+    """
+    for pattern in VOLATILE_PATTERNS:
+        text = pattern.sub("", text)
+    text = WHITESPACE.sub(" ", text).strip()
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def unit_key(source: str, role: str, url: str) -> str:
+    """Index key of a page parsed for a school or journal role
+
+    The same url can be configured for several sources or roles, e.g. a directory shared by two schools, so
+    entries are keyed by all three.
+    """
+    return f"{source}\t{role}\t{url}"
+
+
+class PageIndex:
+    def __init__(self, path: str = INDEX_PATH):
+        """Names extracted from each page at the last run, keyed by source, role and url
+
+        Lets a run reuse the names of pages whose normalized body has not changed instead of parsing them, and
+        compare rosters between runs.
+
+        Attributes:
+            path (str): json file the index is kept in
+        """
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)
+            # Indexes of earlier versions were keyed by url only
+            self.entries = {
+                key if "\t" in key else unit_key(e["source"], e["role"], key): e
+                for key, e in entries.items()
+            }
+
+    def lookup(
+        self, source: str, role: str, url: str, text: str, rules: str = ""
+    ) -> Optional[List[str]]:
+        """Stored names of a page if neither its body nor its extraction rules have changed
+
+        Arguments:
+            source (str): name of school or journal
+            role (str): faculty, phd or author
+            url (str): website url
+            text (str): html text fetched this run
+            rules (str): fingerprint of the rules the page is parsed with
+        Returns:
+            List[str]: names stored at the last run, or None if the page is new or changed
+        """
+        entry = self.entries.get(unit_key(source, role, url))
+        if entry is None or entry["hash"] != body_hash(text) or entry.get("rules") != rules:
+            return None
+        return entry["names"]
+
+    def previous_names(self, source: str, role: str) -> List[str]:
+        """Names of a school or journal role stored at the last run
+
+        Arguments:
+            source (str): name of school or journal
+            role (str): faculty, phd or author
+        Returns:
+            List[str]: names across all of its pages
+        """
+        names = []
+        for entry in self.entries.values():
+            if entry["source"] == source and entry["role"] == role:
+                names.extend(entry["names"])
+        return names
+
+    def update(
+        self,
+        source: str,
+        role: str,
+        url: str,
+        text: str,
+        names: List[str],
+        rules: str = "",
+    ):
+        """Store the names extracted from a page
+
+        Arguments:
+            source (str): name of school or journal
+            role (str): faculty, phd or author
+            url (str): website url
+            text (str): html text the names came from
+            names (List[str]): extracted names
+            rules (str): fingerprint of the rules the page was parsed with
+        """
+        self.entries[unit_key(source, role, url)] = {
+            "source": source,
+            "role": role,
+            "hash": body_hash(text),
+            "rules": rules,
+            "names": names,
+            "updated_at": time.time(),
+        }
+
+    def retain(self, units: Iterable[Tuple[str, str, str]]):
+        """Forget pages that are no longer configured
+
+        Arguments:
+            units (Iterable[Tuple[str, str, str]]): (source, role, url) of the pages to keep
+        """
+        keys = {unit_key(*unit) for unit in units}
+        self.entries = {key: e for key, e in self.entries.items() if key in keys}
+
+    def save(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+def roster_diff(previous: List[str], current: List[str]) -> Dict[str, List[str]]:
+    """Names added and removed between two runs
+
+    Arguments:
+        previous (List[str]): names at the last run
+        current (List[str]): names this run
+    Returns:
+        Dict[str, List[str]]: [added, removed], each sorted
+    """
+    previous = set(previous)
+    current = set(current)
+    return {
+        "added": sorted(current - previous),
+        "removed": sorted(previous - current),
+    }
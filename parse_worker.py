@@ -0,0 +1,55 @@
+import hashlib
+import json
+from typing import List
+
+# local imports
+from extract_author_names import ExtractAuthorNames
+from extract_school_names import ExtractSchoolNames
+import journal_constants
+import site_specs
+
+
+def parse_page(source: str, role: str, url: str, text: str, parser: str) -> List[str]:
+    """Extract names from an already fetched webpage
+
+    Top level so it can be sent to a process pool. Only plain strings go in and out of the worker.
+
+    Arguments:
+        source (str): name of school or journal
+        role (str): faculty, phd or author
+        url (str): website url the text came from
+        text (str): html text
+        parser (str): html parser backend, one of html_parser.PARSERS
+    Returns:
+        List[str]: names as 'firstname lastname'
+    """
+    pages = {url: text}
+    if role == "author":
+        extract_names = ExtractAuthorNames(journal=source, pages=pages, parser=parser)
+    else:
+        extract_names = ExtractSchoolNames(
+            school=source, role=role, pages=pages, parser=parser
+        )
+    return extract_names.get_page_names(url)
+
+
+def rules_fingerprint(source: str, role: str) -> str:
+    """Fingerprint of the extraction rules of a school or journal role
+
+    Changes whenever the constants the names are parsed with change, so stored results can be invalidated.
+
+    Arguments:
+        source (str): name of school or journal
+        role (str): faculty, phd or author
+    Returns:
+        str: sha256 hex digest of the rules
+    """
+    if role == "author":
+        rules = [
+            journal_constants.NAME_TAG.get(source),
+            journal_constants.NAME_CLASS.get(source),
+        ]
+    else:
+        rules = site_specs.build_spec(source, role)
+    rules = json.dumps(rules, sort_keys=True, default=str)
+    return hashlib.sha256(rules.encode("utf-8")).hexdigest()
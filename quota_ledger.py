@@ -0,0 +1,264 @@
+import datetime
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# local imports
+from genderize_client import GenderizeClient
+
+#global constants
+LEDGER_PATH = os.path.expanduser("~/Desktop/WSDS/genderize_quota.sqlite")
+# Order names of equal occurrences are looked up in, roles missing from it go last
+ROLE_PRIORITY = ["faculty", "author", "phd"]
+
+
+def role_rank(role: str) -> int:
+    """Position of a role in ROLE_PRIORITY, lower is looked up first"""
+    try:
+        return ROLE_PRIORITY.index(role)
+    except ValueError:
+        return len(ROLE_PRIORITY)
+
+
+class QuotaLedger:
+    def __init__(self, path: str = LEDGER_PATH, daily_limit: int = None):
+        """Persistent record of the genderize.io daily quota and of names waiting for it
+
+        The quota window is taken from the X-Rate-Limit-Limit, X-Rate-Limit-Remaining and X-Rate-Limit-Reset
+        headers of the latest response, so it carries over between runs and processes. Names used are also
+        summed per UTC day. Names that did not fit in the quota are kept in a pending table ordered by priority.
+
+        Attributes:
+            path (str): SQLite database file
+            daily_limit (int): names allowed per window before any response has reported the limit. If None,
+                the limit is unknown until the first response
+        """
+        self.path = path
+        self.daily_limit = daily_limit
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS quota (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                quota_limit INTEGER,
+                remaining INTEGER,
+                window_end REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS usage (
+                day TEXT PRIMARY KEY,
+                names INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pending (
+                name TEXT NOT NULL,
+                country TEXT NOT NULL,
+                occurrences INTEGER NOT NULL,
+                role_rank INTEGER NOT NULL,
+                queued_at REAL NOT NULL,
+                PRIMARY KEY (name, country)
+            );"""
+        )
+        self._conn.commit()
+
+    def remaining(self) -> Optional[int]:
+        """Names that may still be looked up in the current window
+
+        Returns:
+            int: remaining names, the full limit once the recorded window has reset, None if the limit is unknown
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT quota_limit, remaining, window_end FROM quota WHERE id = 0"
+            ).fetchone()
+        if row is None:
+            return self.daily_limit
+        quota_limit, remaining, window_end = row
+        if time.time() >= window_end:
+            return quota_limit if quota_limit is not None else self.daily_limit
+        return remaining
+
+    def record(
+        self,
+        num_names: int,
+        remaining: int = None,
+        reset: float = None,
+        limit: int = None,
+    ):
+        """Record names looked up and the rate limit reported with them
+
+        Arguments:
+            num_names (int): names genderize.io counted against the quota
+            remaining (int): X-Rate-Limit-Remaining of the latest response. If None, the remaining names are
+                reduced by num_names
+            reset (float): X-Rate-Limit-Reset of the latest response, seconds until the window resets. If None,
+                the window ends at the next UTC midnight
+            limit (int): X-Rate-Limit-Limit of the latest response
+        """
+        now = time.time()
+        day = datetime.datetime.fromtimestamp(now, datetime.timezone.utc).date()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT quota_limit, remaining, window_end FROM quota WHERE id = 0"
+            ).fetchone()
+            quota_limit = limit
+            if quota_limit is None:
+                quota_limit = row[0] if row is not None and row[0] is not None else self.daily_limit
+
+            if row is not None and now < row[2]:
+                window_end, left = row[2], row[1]
+            else:
+                midnight = datetime.datetime.combine(
+                    day + datetime.timedelta(days=1), datetime.time(), datetime.timezone.utc
+                )
+                window_end, left = midnight.timestamp(), quota_limit
+            if reset is not None:
+                window_end = now + reset
+            if remaining is None and left is not None:
+                remaining = max(left - num_names, 0)
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO quota VALUES (0, ?, ?, ?)",
+                (quota_limit, remaining, window_end),
+            )
+            self._conn.execute(
+                """INSERT INTO usage VALUES (?, ?)
+                ON CONFLICT(day) DO UPDATE SET names = names + excluded.names""",
+                (day.isoformat(), num_names),
+            )
+            self._conn.commit()
+
+    def usage(self) -> Dict[str, int]:
+        """Names looked up per UTC day
+
+        Returns:
+            Dict[str, int]: ISO date to names
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT day, names FROM usage ORDER BY day").fetchall()
+        return dict(rows)
+
+    def enqueue(self, priorities: Dict[str, Tuple[int, int]], country: str = None):
+        """Add names to the pending queue, keeping the highest priority of names already queued
+
+        Arguments:
+            priorities (Dict[str, Tuple[int, int]]): normalized first name to (occurrences, role rank)
+            country (str): optional country code the names are looked up with
+        """
+        country = country or ""
+        now = time.time()
+        rows = [
+            (name, country, int(occurrences), int(rank), now)
+            for name, (occurrences, rank) in priorities.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                """INSERT INTO pending VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(name, country) DO UPDATE SET
+                    occurrences = MAX(occurrences, excluded.occurrences),
+                    role_rank = MIN(role_rank, excluded.role_rank)""",
+                rows,
+            )
+            self._conn.commit()
+
+    def pending(self, country: str = None, limit: int = None) -> List[str]:
+        """Queued names, most occurrences first, then by role rank, then oldest first
+
+        Arguments:
+            country (str): optional country code the names are looked up with
+            limit (int): most names returned. If None, every queued name
+        Returns:
+            List[str]: normalized first names
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT name FROM pending WHERE country = ?
+                ORDER BY occurrences DESC, role_rank ASC, queued_at ASC LIMIT ?""",
+                (country or "", -1 if limit is None else limit),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def dequeue(self, names: Iterable[str], country: str = None):
+        """Remove names that were looked up from the pending queue"""
+        rows = [(name, country or "") for name in names]
+        with self._lock:
+            self._conn.executemany("DELETE FROM pending WHERE name = ? AND country = ?", rows)
+            self._conn.commit()
+
+    def num_pending(self, country: str = None) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM pending WHERE country = ?", (country or "",)
+            ).fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+class QuotaScheduler:
+    cacheable = True
+    scheduled = True
+
+    def __init__(self, client: GenderizeClient = None, ledger: QuotaLedger = None):
+        """Backend sending genderize.io lookups within the daily quota, highest priority first
+
+        Every lookup adds its names to the ledger's pending queue, then sends the highest priority queued names
+        that fit in the remaining quota. Names queued by earlier runs compete with the new ones, and whatever
+        does not fit waits for the next window. When the quota is unknown a single chunk is sent first to read
+        it from the response headers. Names left queued are returned unclassified.
+
+        Attributes:
+            client (GenderizeClient): client the lookups are sent with. Defaults to a genderize.io client
+            ledger (QuotaLedger): persistent quota and queue. Defaults to a ledger stored at LEDGER_PATH
+        """
+        self.client = GenderizeClient() if client is None else client
+        self.ledger = QuotaLedger() if ledger is None else ledger
+        self.country_id = self.client.country_id
+
+    def lookup(
+        self, names: List[str], priorities: Dict[str, Tuple[int, int]] = None
+    ) -> Dict[str, Dict]:
+        """Classify first names within the quota
+
+        Arguments:
+            names (List[str]): normalized first names
+            priorities (Dict[str, Tuple[int, int]]): name to (occurrences, role rank). Names without a priority
+                count one occurrence with the lowest role rank
+        Returns:
+            Dict[str, Dict]: name to [gender, probability, count] for every name sent, which may include names
+                queued by earlier lookups
+        """
+        priorities = {} if priorities is None else priorities
+        lowest = (1, len(ROLE_PRIORITY))
+        self.ledger.enqueue(
+            {name: priorities.get(name, lowest) for name in dict.fromkeys(names)}, self.country_id
+        )
+
+        results = {}
+        while True:
+            budget = self.ledger.remaining()
+            if budget is None:
+                budget = self.client.chunk_size
+            batch = self.ledger.pending(self.country_id, budget) if budget > 0 else []
+            if not batch:
+                break
+            num_failed = len(self.client.failed)
+            fetched = self.client.lookup(batch)
+            rate_limit = self.client.rate_limit()
+            self.ledger.record(
+                len(fetched), rate_limit["remaining"], rate_limit["reset"], rate_limit["limit"]
+            )
+            self.ledger.dequeue(fetched, self.country_id)
+            results.update(fetched)
+            # Failed names stay queued for a later lookup, and a batch smaller than the budget emptied the queue
+            if len(self.client.failed) > num_failed or len(batch) < budget:
+                break
+        return results
+
+    def num_pending(self) -> int:
+        """Names queued for a later window"""
+        return self.ledger.num_pending(self.country_id)
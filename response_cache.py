@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+#global constants
+CACHE_DIR = os.path.expanduser("~/Desktop/WSDS/http_cache")
+
+
+class CacheMissError(Exception):
+    """Raised in offline mode when a url has no cached body"""
+
+
+class ResponseCache:
+    def __init__(self, directory: str = CACHE_DIR, offline: bool = False):
+        """Persistent cache of webpage responses
+
+        Each url is stored as one json file holding the body and the ETag and Last-Modified validators.
+        Cached pages are revalidated with If-None-Match/If-Modified-Since and a 304 reuses the stored body.
+
+        Attributes:
+            directory (str): folder the cached responses are written to
+            offline (bool): never touch the network, serve every url from the cache
+        """
+        self.directory = directory
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def fetch(self, url: str, get: Callable) -> str:
+        """Html of a url, from the cache when it is still valid
+
+        Arguments:
+            url (str): website url
+            get (Callable): function sending a GET request, called as get(url, headers=...)
+        Returns:
+            str: html text
+        Raises:
+            CacheMissError: in offline mode when the url was never cached
+        """
+        entry = self.load(url)
+        if self.offline:
+            if entry is None:
+                raise CacheMissError(f"No cached response for {url} in {self.directory}")
+            self._count(hit=True)
+            return entry["body"]
+
+        response = get(url, headers=self._conditional_headers(entry))
+        if response.status_code == 304 and entry is not None:
+            self._count(hit=True)
+            return entry["body"]
+
+        self._count(hit=False)
+        if response.status_code == 200:
+            self.store(
+                url,
+                response.text,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        return response.text
+
+    def load(self, url: str) -> Optional[Dict]:
+        """Cached entry of a url
+
+        Arguments:
+            url (str): website url
+        Returns:
+            Dict: [url, body, etag, last_modified, fetched_at] or None if not cached
+        """
+        path = self._path(url)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def store(
+        self, url: str, body: str, etag: str = None, last_modified: str = None
+    ):
+        """Write a response to the cache
+
+        Arguments:
+            url (str): website url
+            body (str): html text
+            etag (str): ETag response header
+            last_modified (str): Last-Modified response header
+        """
+        entry = {
+            "url": url,
+            "body": body,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        path = self._path(url)
+        # write then rename so concurrent readers never see a partial file
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: number of cache hits (including 304s) and misses
+        """
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key + ".json")
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @staticmethod
+    def _conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+#global constants
+JOURNAL_PATH = os.path.expanduser("~/Desktop/WSDS/run_journal.jsonl")
+
+
+class RunJournal:
+    def __init__(self, path: str = JOURNAL_PATH, resume: bool = False):
+        """Append-only journal of the pages extracted and names classified by a run
+
+        Every entry is one json line written with a single write and synced to disk before the run moves on, so
+        a run killed at any point loses at most the entry it was writing. A resumed run replays the journal,
+        dropping a torn last line, and gets back the names of every page and the prediction of every person
+        already done.
+
+        Attributes:
+            path (str): json lines file
+            resume (bool): replay an existing journal and append to it. If False, the journal is started over
+        """
+        self.path = path
+        self.units = {}
+        self.urls = set()
+        self.persons = {}
+        self.num_batches = 0
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        if resume and os.path.exists(path):
+            self._replay()
+            self._file = open(path, "a", encoding="utf-8")
+        else:
+            self._file = open(path, "w", encoding="utf-8")
+
+    def unit_names(self, source: str, role: str, url: str) -> Optional[List[str]]:
+        """Names journaled for a page, None if the page was not extracted yet"""
+        return self.units.get((source, role, url))
+
+    def record_unit(self, source: str, role: str, url: str, names: List[str]):
+        """Journal the names extracted from a page
+
+        Arguments:
+            source (str): name of school or journal
+            role (str): faculty, phd or author
+            url (str): page url
+            names (List[str]): names extracted from the page
+        """
+        self.units[(source, role, url)] = list(names)
+        self.urls.add(url)
+        self._append({"type": "unit", "source": source, "role": role, "url": url, "names": list(names)})
+
+    def record_batch(self, names: List[str], preds: List, probabilities: List[float]):
+        """Journal a classification batch
+
+        Arguments:
+            names (List[str]): canonical person names
+            preds (List): predicted gender of each, 1.0 male, 0.0 female or "None"
+            probabilities (List[float]): genderize.io probability of each prediction, NaN if unknown
+        """
+        # json has no NaN, unknown probabilities are written as null
+        probabilities = [None if p != p else p for p in probabilities]
+        for name, pred, probability in zip(names, preds, probabilities):
+            self.persons[name] = (pred, probability)
+        self.num_batches += 1
+        self._append(
+            {
+                "type": "batch",
+                "names": list(names),
+                "preds": list(preds),
+                "probabilities": probabilities,
+            }
+        )
+
+    def person(self, name: str) -> Optional[Tuple]:
+        """Journaled (pred, probability) of a person, None if not classified yet"""
+        entry = self.persons.get(name)
+        if entry is None:
+            return None
+        pred, probability = entry
+        return pred, float("nan") if probability is None else probability
+
+    def close(self):
+        self._file.close()
+
+    def _append(self, entry: Dict):
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _replay(self):
+        """Load every complete entry and cut a torn last line off the file"""
+        valid_end = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("torn line")
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                valid_end += len(line)
+                if entry["type"] == "unit":
+                    self.units[(entry["source"], entry["role"], entry["url"])] = entry["names"]
+                    self.urls.add(entry["url"])
+                elif entry["type"] == "batch":
+                    for name, pred, probability in zip(
+                        entry["names"], entry["preds"], entry["probabilities"]
+                    ):
+                        self.persons[name] = (pred, probability)
+                    self.num_batches += 1
+        with open(self.path, "r+b") as f:
+            f.truncate(valid_end)
@@ -344,3 +344,54 @@ EXCLUDED_TAGS = [
 ]
 
 NAMES_TO_CLEAN = ["unc"]
+
+# Site specific extraction rules layered over the tag and class constants above.
+# See site_specs.py for the meaning of each key
+FACULTY_SPEC_OVERRIDES = {
+    "chicago": {"person_role_tag": "b"},
+    "cornell": {"skip_role_tags": True},
+    "florida": {
+        "container": 0,
+        "name_regex": r".*\/>([^</]*)",
+        "container_role": {"tag": "p", "regex": r"<p>(.*?)<br/>"},
+    },
+    "iowa": {"people": {"tag": "td"}},
+    "purdue": {"person_role_tag": "p"},
+    "rutgers": {
+        "url_people_tag": {
+            "https://statistics.rutgers.edu/people-pages/adjunct-faculty": "h4"
+        }
+    },
+    "texas_am": {"people_attr": "data-title", "person_role_tag": "p"},
+    "ucla": {"name_parts": ["abcfslSpanMP1", "abcfslSpanMP3"]},
+    "columbia": {"tables": {"first_only": True}},
+    "harvard": {"tables": {"pick": [0]}},
+    "minnesota": {
+        "tables": {"sections": [{"tag": "table"}], "pick": [0], "match_class": False}
+    },
+    "penn": {"tables": {"pick": [0], "within": "ul"}},
+    "stanford": {"tables": {"pick": [0, 1, 2]}},
+    "uci": {
+        "tables": {
+            "sections": [{"tag": "table"}],
+            "pick": [0, 2],
+            "rows": "tr",
+            "match_class": False,
+        }
+    },
+    "wisconsin": {"tables": {"pick": [0]}},
+}
+
+PHD_SPEC_OVERRIDES = {
+    "florida": {"container": 0, "name_regex": r"<strong>(.*?)</strong>"},
+    "minnesota": {
+        # First section is phd students, second is masters
+        "people_within": [["index", 0], ["find", "table"], ["find_all", "li"]]
+    },
+    "purdue": {"person_role_tag": "p"},
+    "texas_am": {"people_attr": "data-title"},
+    # First table is relevant
+    "uci": {
+        "tables": {"sections": [{"tag": "table"}], "pick": [1], "drop_pattern": None}
+    },
+}
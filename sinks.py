@@ -0,0 +1,217 @@
+import csv
+import json
+import os
+import time
+
+import pandas as pd
+
+#global constants
+# Columns repeating a few values across many rows, stored as dictionary indices
+DICTIONARY_COLUMNS = ["school/journal", "source", "role", "gender"]
+INTEGER_COLUMNS = ["person_id", "volume", "issue", "year"]
+FLOAT_COLUMNS = ["probability"]
+# Hive style partitions of PartitionedParquetSink, e.g. source=jasa/year=2021
+PARTITION_COLUMNS = ["source", "year"]
+# Partition of names without a year, e.g. authors of journals whose volumes do not follow years
+UNKNOWN_YEAR = "unknown"
+
+
+def to_arrow(df: pd.DataFrame):
+    """Typed Arrow table of a batch of names. Requires pyarrow
+
+    Source, role and gender columns are dictionary encoded, ids, volumes and years are nullable integers and
+    probabilities are floats. pred is replaced by a gender column of male, female or null. Other columns mixing
+    types are written as strings.
+
+    Arguments:
+        df (pd.DataFrame): batch of names, e.g. from StatNameScraper.stream
+    Returns:
+        pyarrow.Table: table with one column per column of df
+    """
+    import pyarrow as pa
+
+    if "pred" in df.columns:
+        gender = df["pred"].map({1.0: "male", 0.0: "female"})
+        df = df.drop(columns="pred").assign(gender=gender)
+
+    arrays = []
+    for col in df.columns:
+        values = df[col].astype(object).where(df[col].notna(), None)
+        if col in DICTIONARY_COLUMNS:
+            array = pa.array(values, type=pa.string()).dictionary_encode()
+        elif col in INTEGER_COLUMNS:
+            array = pa.array(pd.to_numeric(df[col]).astype("Int64"), type=pa.int64())
+        elif col in FLOAT_COLUMNS:
+            array = pa.array(pd.to_numeric(df[col]), type=pa.float64(), from_pandas=True)
+        elif pd.api.types.infer_dtype(df[col]).startswith("mixed"):
+            array = pa.array(df[col].astype(str), type=pa.string())
+        else:
+            array = pa.array(df[col], from_pandas=True)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, names=list(df.columns))
+
+
+class CsvSink:
+    def __init__(self, path: str):
+        """Append DataFrame batches to a csv file, writing the header with the first batch
+
+        Attributes:
+            path (str): csv file, overwritten when the sink is opened
+        """
+        self.path = path
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = None
+
+    def write(self, df: pd.DataFrame):
+        if self._writer is None:
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(df.columns)
+        self._writer.writerows(df.itertuples(index=False, name=None))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlSink:
+    def __init__(self, path: str):
+        """Append DataFrame batches to a file with one json record per line
+
+        Attributes:
+            path (str): jsonl file, overwritten when the sink is opened
+        """
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, df: pd.DataFrame):
+        for record in df.to_dict(orient="records"):
+            self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    def __init__(self, path: str):
+        """Append DataFrame batches to a parquet file as row groups. Requires pyarrow
+
+        Batches are converted with to_arrow. The schema is taken from the first batch, later batches are cast
+        to it.
+
+        Attributes:
+            path (str): parquet file, overwritten when the sink is opened
+        """
+        import pyarrow
+
+        self.path = path
+        self._pyarrow = pyarrow
+        self._writer = None
+
+    def write(self, df: pd.DataFrame):
+        import pyarrow.parquet as pq
+
+        table = to_arrow(df)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class PartitionedParquetSink:
+    def __init__(self, path: str):
+        """Write DataFrame batches to a parquet dataset partitioned by source and year. Requires pyarrow
+
+        Each batch is converted with to_arrow and written as one file per partition under
+        path/source=<school or journal>/year=<year>, so one journal or year can be read without loading the
+        rest. school/journal is renamed source. Rosters without a year column are filed under the year the
+        run started. Authors without a year, e.g. of journals whose volumes do not follow years, keep a null
+        year, are filed under year=unknown and are read back with a null year by read_partitioned.
+
+        Attributes:
+            path (str): dataset folder. Files of earlier runs in it are kept
+        """
+        import pyarrow
+
+        self.path = path
+        self._pyarrow = pyarrow
+        self._run_id = time.strftime("%Y%m%d%H%M%S")
+        self._year = time.localtime().tm_year
+        self._num_batches = 0
+
+    def write(self, df: pd.DataFrame):
+        import pyarrow.dataset as ds
+
+        df = df.rename(columns={"school/journal": "source"})
+        if "year" not in df.columns:
+            # a roster is as of the run, an author list without years has no known publication year
+            year = self._year
+            if "role" in df.columns:
+                year = pd.Series(self._year, index=df.index, dtype="Int64").where(df["role"] != "author")
+            df = df.assign(year=year)
+        ds.write_dataset(
+            to_arrow(df),
+            self.path,
+            format="parquet",
+            partitioning=_partitioning(),
+            basename_template=f"part-{self._run_id}-{self._num_batches}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        self._num_batches += 1
+
+    def close(self):
+        pass
+
+
+def read_partitioned(path: str) -> pd.DataFrame:
+    """Names of a dataset written by PartitionedParquetSink. Requires pyarrow
+
+    Arguments:
+        path (str): dataset folder
+    Returns:
+        pd.DataFrame: every name with columns source and year from the partitions. year is a nullable integer,
+            missing for names filed under year=unknown
+    """
+    import pyarrow.dataset as ds
+
+    df = pd.read_parquet(path, partitioning=ds.HivePartitioning.discover(null_fallback=UNKNOWN_YEAR))
+    df["year"] = df["year"].astype("Int64")
+    return df
+
+
+def _partitioning():
+    """Hive partitioning by source and year, writing a missing year as UNKNOWN_YEAR instead of pyarrow's default
+    partition, which read_parquet cannot unify with the others"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    source, year = PARTITION_COLUMNS
+    schema = pa.schema([(source, pa.string()), (year, pa.int64())])
+    return ds.HivePartitioning(schema, null_fallback=UNKNOWN_YEAR)
+
+
+SINKS = {".csv": CsvSink, ".jsonl": JsonlSink, ".parquet": ParquetSink}
+
+
+def make_sink(path: str):
+    """Sink for a file path, chosen by its extension
+
+    Arguments:
+        path (str): output file ending in .csv, .jsonl or .parquet, or a folder ending in / for a parquet
+            dataset partitioned by source and year
+    Returns:
+        CsvSink, JsonlSink, ParquetSink or PartitionedParquetSink: sink with write(df) and close()
+    Raises:
+        Exception: "Invalid output file: {path}. Must end in one of {SINKS}"
+    """
+    if path.endswith(("/", os.sep)):
+        return PartitionedParquetSink(path)
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SINKS:
+        raise Exception(f"Invalid output file: {path}. Must end in one of {list(SINKS)}")
+    return SINKS[extension](path)
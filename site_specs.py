@@ -0,0 +1,349 @@
+import re
+from typing import Dict, List
+
+# local imports
+from exclusion_matcher import exclusion_matcher, tag_matcher
+from html_parser import parse_html
+from instrumentation import NULL_METRICS
+import school_constants
+
+# Spec keys, all optional. Defaults come from the tag and class constants in school_constants and are overridden
+# by FACULTY_SPEC_OVERRIDES / PHD_SPEC_OVERRIDES
+#   people (dict): {"tag", "attrs"} of the elements holding one person each
+#   people_attr (str): attribute matched against the people class, "class" unless the site uses e.g. data-title
+#   url_people_tag (dict): url to people tag for pages of a school that use a different tag
+#   people_within (list): [step, arg] pairs narrowing the people, step is "index", "find" or "find_all"
+#   container (int): index of the single people element whose name_tag children are the rows to parse
+#   name_tag (str): tag inside each row holding the name, the whole row's text is used if None
+#   name_regex (str): regex on the row markup whose first group is the name
+#   name_parts (list): span classes inside each row joined to make the name
+#   role_rows (dict): {"tag", "attrs"} of page elements holding each person's role, in people order
+#   role_row_tag (str): tag inside each role row holding the role
+#   skip_role_tags (bool): skip role rows containing school_constants.EXCLUDED_TAGS
+#   person_role_tag (str): tag inside each person holding the role
+#   container_role (dict): {"tag", "regex"} of role elements inside the container
+#   excluded (list): roles excluded from the results
+#   strip (list): substrings removed from names
+#   drop_pattern (str): names matching this regex are dropped
+#   tables (dict): sections of the page holding the wanted people, replacing the names above
+#       sections (list): {"tag", "class"} of the sections, defaults to div classes from FACULTY_TABLE
+#       pick (list): indices of the sections kept
+#       within (str): tag inside each section holding the names
+#       rows (str): row tag inside each section
+#       match_class (bool): whether names must have the people class
+#       first_only (bool): take only the first name element of each section
+#       drop_pattern (str): names matching this regex are dropped
+
+
+class Selector:
+    def __init__(self, tag=None, attrs: Dict = None):
+        """Compiled find_all arguments
+
+        Attributes:
+            tag (str or list): tag name(s)
+            attrs (Dict): attributes to match
+        """
+        self.tag = tag
+        self.attrs = {} if attrs is None else attrs
+
+    def find_all(self, element) -> list:
+        return element.find_all(self.tag, self.attrs)
+
+    def find(self, element):
+        return element.find(self.tag, self.attrs)
+
+
+class SiteSpec:
+    def __init__(self, school: str, role: str, spec: Dict):
+        """Compiled extraction rules of one school and role
+
+        Arguments:
+            school (str): name of school
+            role (str): faculty or phd
+            spec (Dict): declarative spec, see the key list at the top of this module
+        """
+        self.school = school
+        self.role = role
+        self.people = Selector(**spec["people"])
+        self.url_people = {
+            url: Selector(tag, self.people.attrs)
+            for url, tag in spec.get("url_people_tag", {}).items()
+        }
+        self.people_within = [tuple(step) for step in spec.get("people_within", [])]
+        self.container = spec.get("container")
+        self.name_tag = spec.get("name_tag")
+        self.name_regex = _compile(spec.get("name_regex"))
+        self.name_parts = [
+            Selector("span", {"class": part}) for part in spec.get("name_parts", [])
+        ]
+
+        self.role_rows = None
+        if spec.get("role_rows") is not None:
+            self.role_rows = Selector(**spec["role_rows"])
+        self.role_row_tag = spec.get("role_row_tag")
+        self.skip_role_tags = None
+        if spec.get("skip_role_tags", False):
+            self.skip_role_tags = tag_matcher(tuple(school_constants.EXCLUDED_TAGS))
+        self.person_role_tag = spec.get("person_role_tag")
+        self.container_role = None
+        if spec.get("container_role") is not None:
+            self.container_role = (
+                spec["container_role"]["tag"],
+                re.compile(spec["container_role"]["regex"]),
+            )
+        self.excluded = exclusion_matcher(tuple(spec.get("excluded", [])))
+        self.strip = spec.get("strip", [])
+        self.drop_pattern = _compile(spec.get("drop_pattern"))
+
+        self.tables = None
+        if spec.get("tables") is not None:
+            tables = spec["tables"]
+            self.tables = {
+                "sections": [
+                    Selector(
+                        section.get("tag"),
+                        {"class": section["class"]} if "class" in section else {},
+                    )
+                    for section in tables["sections"]
+                ],
+                "pick": tables.get("pick"),
+                "within": tables.get("within"),
+                "rows": tables.get("rows"),
+                "names": Selector(
+                    self.people.tag,
+                    self.people.attrs if tables.get("match_class", True) else {},
+                ),
+                "first_only": tables.get("first_only", False),
+                "drop_pattern": _compile(tables.get("drop_pattern", r"[@-]")),
+            }
+
+        # Only the people elements need to be built when nothing outside them is read
+        self.strainable = (
+            self.role_rows is None
+            and self.tables is None
+            and self.container is None
+            and not self.people_within
+            and list(self.people.attrs) == ["class"]
+        )
+
+    def extract(
+        self, text: str, url: str = None, parser: str = "html.parser", metrics=NULL_METRICS
+    ) -> List[str]:
+        """Retrieve names from a webpage
+
+        Arguments:
+            text (str): html text
+            url (str): website url the text came from, used for per-url rules
+            parser (str): html parser backend, one of html_parser.PARSERS
+            metrics (Metrics): records rows before and after role filtering
+        Returns:
+            List[str]: names of individuals
+        Raises:
+            Exception: when a configured section, container or name is missing from the page, e.g. after a
+                redesign, so the page is skipped rather than read as an empty roster
+        """
+        people_selector = self.url_people.get(url, self.people)
+        if self.strainable:
+            html = parse_html(
+                text, parser, people_selector.tag, people_selector.attrs["class"]
+            )
+        else:
+            html = parse_html(text, parser)
+
+        if self.tables is not None:
+            return self._extract_tables(html)
+
+        people = people_selector.find_all(html)
+        for step, arg in self.people_within:
+            if step == "index":
+                people = people[arg]
+            elif step == "find":
+                people = people.find(arg)
+            else:
+                people = people.find_all(arg)
+
+        rows = people
+        container = None
+        if self.container is not None:
+            container = people[self.container]
+            rows = container.find_all(self.name_tag)
+
+        # Get a list of bool for which False represents excluded people
+        keep = [True] * len(rows)
+        if self.role_rows is not None:
+            roles = []
+            for row in self.role_rows.find_all(html):
+                if self.role_row_tag is not None:
+                    row = row.find(self.role_row_tag)
+                # Exclude tags not related to role
+                if self.skip_role_tags is not None and self.skip_role_tags.matches(row):
+                    continue
+                roles.append(row)
+            if self.person_role_tag is not None:
+                for person in people:
+                    roles.append(person.find(self.person_role_tag).text.strip())
+            if self.container_role is not None:
+                tag, regex = self.container_role
+                for row in container.find_all(tag):
+                    position = regex.search(str(row))
+                    if position is not None:
+                        roles.append(position.group(1))
+            keep = [not x for x in self.excluded.mask(roles)]
+
+        names = []
+        for row in rows:
+            if self.name_regex is not None:
+                name = self.name_regex.search(str(row))
+                if name is None:
+                    raise Exception(f"No name in a row of {self.school} {self.role}: {str(row)[:80]}")
+                names.append(name.group(1))
+                continue
+            # Get names when row does not need to be parsed
+            if self.name_tag is None:
+                if row is not None:
+                    names.append(re.sub(" +", " ", row.get_text().strip()))
+            # Get names when row needs to be parsed
+            else:
+                name = row.find(self.name_tag)
+                if name is not None:
+                    names.append(re.sub(" +", " ", name.text.strip()))
+            if self.name_parts:
+                parts = [part.find(row).get_text().strip() for part in self.name_parts]
+                names.append(" ".join(parts))
+
+        # Get final names, excluding unwanted elements
+        names = [
+            self._strip(x)
+            for x in names
+            if self.drop_pattern is None or not self.drop_pattern.search(x)
+        ]
+        kept = [i for (i, v) in zip(names, keep) if v]
+        metrics.count("rows_parsed", len(names), source=self.school, role=self.role)
+        metrics.count("rows_kept", len(kept), source=self.school, role=self.role)
+        return kept
+
+    def _extract_tables(self, html) -> List[str]:
+        """Retrieve names from the role-level sections of a page"""
+        tables = self.tables
+        names = []
+        for section_selector in tables["sections"]:
+            sections = section_selector.find_all(html)
+            if tables["pick"] is not None:
+                missing = [i for i in tables["pick"] if i >= len(sections)]
+                if missing:
+                    raise Exception(
+                        f"Section {missing[0]} of {self.school} {self.role} missing, the page has {len(sections)}"
+                    )
+                sections = [sections[i] for i in tables["pick"]]
+            if tables["within"] is not None:
+                sections = [x.find(tables["within"]) for x in sections]
+            if tables["rows"] is not None:
+                sections = [row for x in sections for row in x.find_all(tables["rows"])]
+
+            if tables["first_only"]:
+                elements = [tables["names"].find(x) for x in sections]
+                if None in elements:
+                    raise Exception(f"No name in a section of {self.school} {self.role}")
+            else:
+                elements = [e for x in sections for e in tables["names"].find_all(x)]
+
+            section_names = [x.get_text().strip() for x in elements]
+            if tables["drop_pattern"] is not None:
+                section_names = [
+                    x for x in section_names if not tables["drop_pattern"].search(x)
+                ]
+            names.extend(section_names)
+        return names
+
+    def _strip(self, name: str) -> str:
+        for x in self.strip:
+            name = name.replace(x, "")
+        return name
+
+
+def build_spec(school: str, role: str) -> Dict:
+    """Declarative spec of a school and role from the constants in school_constants
+
+    Arguments:
+        school (str): name of school
+        role (str): faculty or phd
+    Returns:
+        Dict: spec, see the key list at the top of this module
+    """
+    if role == "faculty":
+        name_tag = school_constants.FACULTY_NAME_TAG.get(school)
+        class_name = school_constants.FACULTY_CLASS.get(school)
+        position = school_constants.FACULTY_ROLE.get(school)
+        row_tag = school_constants.FACULTY_NAME_ROW_TAG.get(school)
+        overrides = school_constants.FACULTY_SPEC_OVERRIDES.get(school, {})
+        excluded = school_constants.EXCLUDED_FACULTY
+        strip = [", Ph.D."]
+    else:
+        name_tag = school_constants.PHD_NAME_TAG.get(school)
+        class_name = school_constants.PHD_CLASS.get(school)
+        position = school_constants.PHD_ROLE.get(school)
+        row_tag = school_constants.PHD_NAME_ROW_TAG.get(school)
+        overrides = school_constants.PHD_SPEC_OVERRIDES.get(school, {})
+        excluded = school_constants.EXCLUDED_PHD
+        strip = []
+
+    spec = {
+        "people": {
+            "tag": name_tag,
+            "attrs": {overrides.get("people_attr", "class"): class_name},
+        },
+        "name_tag": row_tag,
+        "excluded": excluded,
+        "strip": strip,
+        "drop_pattern": r"[\d\n@-]",
+    }
+    # This is used if the website includes all roles together
+    if position is not None:
+        spec["role_rows"] = {
+            "tag": school_constants.ROLE_TAG.get(school),
+            "attrs": {"class": position},
+        }
+        if role == "faculty":
+            spec["role_row_tag"] = school_constants.ROLE_NAME_TAG.get(school)
+    if role == "faculty" and school in school_constants.FACULTY_TABLE:
+        spec["tables"] = {
+            "sections": [
+                {"tag": "div", "class": table_name}
+                for table_name in school_constants.FACULTY_TABLE[school]
+            ]
+        }
+
+    for key, value in overrides.items():
+        if key == "tables":
+            spec["tables"] = {**spec.get("tables", {}), **value}
+        elif key != "people_attr":
+            spec[key] = value
+    return spec
+
+
+def compile_specs() -> Dict:
+    """Compile the specs of every configured school and role
+
+    Returns:
+        Dict: (school, role) to SiteSpec
+    """
+    specs = {}
+    for role, websites in (
+        ("faculty", school_constants.DEPT_WEBSITES_FACULTY),
+        ("phd", school_constants.DEPT_WEBSITES_PHD),
+    ):
+        for school in websites:
+            specs[(school, role)] = SiteSpec(school, role, build_spec(school, role))
+    return specs
+
+
+def _compile(pattern: str):
+    return None if pattern is None else re.compile(pattern)
+
+
+SPECS = compile_specs()
+
+
+if __name__ == "__main__":
+    for (school, role), spec in SPECS.items():
+        print(school, role, "strainable" if spec.strainable else "")
@@ -0,0 +1,27 @@
+import shutil
+
+# local imports
+from benchmark import FIXTURE_DIR, Benchmark, errors
+from response_cache import ResponseCache
+import school_constants
+
+
+def test_every_fixture_yields_names():
+    report = Benchmark(repeat=1).run()
+
+    assert errors(report) == []
+    parsed = [key for key in report["benchmarks"] if key.startswith("parse/")]
+    assert "parse/phd/illinois" in parsed and "parse/faculty/florida" in parsed
+    assert all(report["benchmarks"][key]["names"] > 0 for key in parsed)
+
+
+def test_fixture_without_names_fails(tmp_path):
+    fixture_dir = str(tmp_path / "fixtures")
+    shutil.copytree(FIXTURE_DIR, fixture_dir)
+    # a redesign leaves the harvard phd page without any name element
+    url = school_constants.DEPT_WEBSITES_PHD["harvard"][0]
+    ResponseCache(fixture_dir).store(url, "<html><body><div>Graduate students</div></body></html>")
+
+    report = Benchmark(fixture_dir=fixture_dir, repeat=1).run()
+
+    assert errors(report) == ["parse/phd/harvard: no names extracted"]
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+# local imports
+from fetch_policy import CircuitBreaker, CircuitOpenError, FetchError, FetchPolicy
+import fetch_policy
+
+
+class Response:
+    def __init__(self, status_code: int, headers: dict = None):
+        self.status_code = status_code
+        self.headers = {} if headers is None else headers
+
+
+class Clock:
+    """monotonic clock stand-in advanced by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_retries_wait_for_retry_after(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(fetch_policy.time, "sleep", sleeps.append)
+    responses = [Response(429, {"Retry-After": "7"}), Response(503), Response(200)]
+    policy = FetchPolicy(backoff_base=0.0)
+
+    assert policy.request(lambda url: responses.pop(0), "https://a.edu/x").status_code == 200
+    assert sleeps == [7.0, 0.0]
+
+    # a 404 is an answer, not a failure to retry
+    assert policy.request(lambda url: Response(404), "https://a.edu/y").status_code == 404
+    with pytest.raises(FetchError, match="after 2 attempts"):
+        FetchPolicy(max_retries=1, backoff_base=0.0).request(lambda url: Response(500), "https://a.edu/z")
+
+
+def test_circuit_half_open_trial(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(fetch_policy.time, "monotonic", clock)
+    breaker = CircuitBreaker(threshold=2, cooldown=60.0)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    # after the cooldown a single trial goes through, a failed trial reopens the circuit at once
+    clock.now += 61
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now += 61
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+    assert breaker.failures == 0
+
+
+def test_open_circuit_fails_fast_per_host(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(fetch_policy.time, "monotonic", clock)
+    monkeypatch.setattr(fetch_policy.time, "sleep", lambda seconds: None)
+    policy = FetchPolicy(max_retries=0, breaker_threshold=2, breaker_cooldown=60.0)
+    calls = []
+
+    def down(url):
+        calls.append(url)
+        raise ConnectionError("refused")
+
+    for url in ["https://www.a.edu/1", "https://a.edu/2"]:
+        with pytest.raises(FetchError):
+            policy.request(down, url)
+    with pytest.raises(CircuitOpenError, match="Circuit open for a.edu"):
+        policy.request(down, "https://a.edu/3")
+    assert len(calls) == 2
+    assert policy.request(lambda url: Response(200), "https://b.edu/1").status_code == 200
+    assert policy.stats()["a.edu"] == {"open": True, "failures": 2}
+
+    clock.now += 61
+    assert policy.request(lambda url: Response(200), "https://a.edu/3").status_code == 200
+    assert policy.stats()["a.edu"] == {"open": False, "failures": 0}
+
+
+def test_slow_request_is_hedged():
+    policy = FetchPolicy(hedge_percentile=0.5)
+    for _ in range(fetch_policy.HEDGE_MIN_SAMPLES):
+        policy.request(lambda url: Response(200), "https://a.edu/fast")
+    release = threading.Event()
+    calls = []
+
+    def get(url):
+        calls.append(url)
+        if len(calls) == 1:
+            # the first request stalls until the hedged duplicate has answered
+            release.wait(5)
+            return Response(500)
+        return Response(200)
+
+    assert policy.request(get, "https://a.edu/slow").status_code == 200
+    release.set()
+    assert len(calls) == 2
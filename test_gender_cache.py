@@ -0,0 +1,58 @@
+import pandas as pd
+
+# local imports
+from gender_cache import GenderCache, normalize_first_name
+from gender_classifier import RunGenderClassifier
+import gender_cache
+
+
+class CountingClient:
+    """genderize.io client stand-in recording the names it is asked for"""
+
+    cacheable = True
+
+    def __init__(self):
+        self.looked_up = []
+
+    def lookup(self, names):
+        self.looked_up.append(sorted(names))
+        return {name: {"gender": "female", "probability": 0.9, "count": 10} for name in names}
+
+
+def test_results_persist_per_country(tmp_path):
+    path = str(tmp_path / "gender_cache.sqlite")
+    cache = GenderCache(path)
+    cache.put_many({"ann": {"gender": "female", "probability": 0.98, "count": 10}})
+    cache.put_many({"ann": {"gender": "male", "probability": 0.6, "count": 2}}, country="DE")
+    cache.close()
+
+    cache = GenderCache(path, memory_size=1)
+    assert cache.get_many(["ann", "bea"])["ann"]["gender"] == "female"
+    assert cache.get_many(["ann"], country="DE")["ann"]["gender"] == "male"
+    assert cache.get_many(["ann"], country="FR") == {}
+    assert normalize_first_name("  ÁNN ") == "ánn"
+
+
+def test_expired_results_are_looked_up_again(tmp_path, monkeypatch):
+    cache = GenderCache(str(tmp_path / "gender_cache.sqlite"), ttl_days=1)
+    now = 1_700_000_000.0
+    monkeypatch.setattr(gender_cache.time, "time", lambda: now)
+    cache.put_many({"ann": {"gender": "female", "probability": 0.98, "count": 10}})
+
+    now += 2 * 24 * 60 * 60
+    assert cache.get_many(["ann"]) == {}
+    assert GenderCache(str(tmp_path / "gender_cache.sqlite"), ttl_days=1).get_many(["ann"]) == {}
+    assert cache.purge_expired() == 1
+
+
+def test_classifier_only_looks_up_misses(tmp_path):
+    path = str(tmp_path / "gender_cache.sqlite")
+    client = CountingClient()
+
+    RunGenderClassifier(name_df=pd.DataFrame({"name": ["Ann Lee", "ann Ray"]}), cache=GenderCache(path), backend=client)
+    classified = RunGenderClassifier(
+        name_df=pd.DataFrame({"name": ["Ann Moss", "Bea Lake"]}), cache=GenderCache(path), backend=client
+    ).name_df
+
+    assert client.looked_up == [["ann"], ["bea"]]
+    assert classified["pred"].tolist() == [0.0, 0.0]
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+# local imports
+from gender_cache import GenderCache
+from gender_classifier import RunGenderClassifier
+
+
+class FemaleTable:
+    """name table stand-in classifying every first name as female"""
+
+    cacheable = False
+
+    def __init__(self):
+        self.looked_up = []
+
+    def lookup(self, names):
+        self.looked_up.extend(names)
+        return {name: {"gender": "female", "probability": 0.9} for name in names}
+
+
+def test_missing_names_stay_unclassified(tmp_path):
+    backend = FemaleTable()
+    name_df = pd.DataFrame({"name": ["Zoe Quinn", None, "Ann Lee", None]})
+
+    classifier = RunGenderClassifier(
+        name_df=name_df, cache=GenderCache(str(tmp_path / "gender_cache.sqlite")), backend=backend
+    )
+
+    df = classifier.name_df
+    assert sorted(backend.looked_up) == ["ann", "zoe"]
+    assert df["pred"].tolist() == [0.0, "None", 0.0, "None"]
+    assert np.isnan(df["probability"][[1, 3]]).all()
+    assert df["first_name"].tolist() == ["Zoe", "", "Ann", ""]
+    assert df["last_name"].tolist() == ["Quinn", "", "Lee", ""]
+    assert not df["usable_first_name"][[1, 3]].any()
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+# local imports
+from StatNameScraper import StatNameScraper
+from gender_gap import GenderGapAnalysis
+
+
+def test_journals_with_and_without_years():
+    # crawl_journals gives jss no year and the journals with volume templates real years
+    names_df = pd.DataFrame(
+        {
+            "school/journal": ["jss", "jss", "jss", "jasa", "jasa", "jasa", "aos"],
+            "role": ["author"] * 7,
+            "pred": [0.0, 1.0, 1.0, 1.0, 0.0, "None", 0.0],
+            "probability": [0.9, 0.8, 0.7, 0.95, 0.6, np.nan, 0.99],
+            "year": [None, None, None, 2021, 2021, 2020, 2021],
+        }
+    )
+    journals = GenderGapAnalysis(num_replicates=200, seed=0).run(names_df)["journals"]
+
+    assert list(journals.columns[:2]) == ["school/journal", "year"]
+    assert len(journals) == 4
+    jss = journals[journals["school/journal"] == "jss"].iloc[0]
+    assert np.isnan(jss["year"])
+    assert jss["n"] == 3 and jss["female"] == 1
+    assert np.isclose(jss["female_share"], 1 / 3)
+    jasa_2020 = journals[(journals["school/journal"] == "jasa") & (journals["year"] == 2020)].iloc[0]
+    assert jasa_2020["unclassified"] == 1 and np.isnan(jasa_2020["female_share"])
+
+
+def test_pipeline_output(offline_scraper_options):
+    names_df = StatNameScraper(schools=["uiuc"], journals=["jss"], **offline_scraper_options).pipeline()
+    assert set(names_df["role"]) == {"faculty", "phd", "author"}
+
+    tables = GenderGapAnalysis(num_replicates=100, seed=0).run(names_df)
+    departments = tables["departments"].set_index("role")
+    assert departments.loc["faculty", "n"] == (names_df["role"] == "faculty").sum()
+    assert departments.loc["phd", "n"] == (names_df["role"] == "phd").sum()
+    assert list(tables["gaps"]["school/journal"]) == ["uiuc"]
+    assert tables["journals"]["n"].sum() == (names_df["role"] == "author").sum()
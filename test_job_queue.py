@@ -0,0 +1,113 @@
+import os
+import shutil
+
+# local imports
+from StatNameScraper import StatNameScraper
+from benchmark import FIXTURE_DIR
+from job_queue import JobQueue, WorkUnit
+from response_cache import ResponseCache
+import job_queue
+import school_constants
+
+
+class Clock:
+    """wall clock stand-in advanced by hand"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def lease_until(queue: JobQueue, unit: WorkUnit) -> float:
+    return queue._conn.execute(
+        "SELECT lease_until FROM units WHERE source = ? AND role = ? AND url = ?", unit
+    ).fetchone()[0]
+
+
+def test_expired_lease_is_reclaimed(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_queue.time, "time", clock)
+    queue = JobQueue(str(tmp_path / "queue.sqlite"), lease_seconds=10)
+    unit = WorkUnit("uiuc", "phd", "https://a.edu/phd")
+    assert queue.add([unit, unit]) == 1
+
+    assert queue.claim("w1") == [unit]
+    assert queue.claim("w2") == []
+
+    # w1 hangs past its lease, w2 takes the unit over and w1 can no longer extend it
+    clock.now += 11
+    assert queue.claim("w2") == [unit]
+    queue.renew("w1", [unit])
+    assert lease_until(queue, unit) == clock.now + 10
+    clock.now += 5
+    queue.renew("w2", [unit])
+    assert lease_until(queue, unit) == clock.now + 10
+
+    queue.complete(unit, ["Ann Lee"])
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": 1, "failed": 0}
+    assert queue.merge()["name"].tolist() == ["Ann Lee"]
+
+
+def test_stale_worker_cannot_fail_a_reclaimed_unit(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_queue.time, "time", clock)
+    queue = JobQueue(str(tmp_path / "queue.sqlite"), lease_seconds=10)
+    unit = WorkUnit("uiuc", "phd", "https://a.edu/phd")
+    queue.add([unit])
+
+    queue.claim("w1")
+    clock.now += 11
+    queue.claim("w2")
+    # w1's download finally times out after w2 took the unit over
+    queue.fail("w1", unit, "ReadTimeout")
+    assert queue.counts()["leased"] == 1
+    assert queue.claim("w3") == []
+
+    queue.fail("w2", unit, "ConnectionError")
+    assert queue.incomplete()[["status", "error"]].values.tolist() == [["pending", "ConnectionError"]]
+
+
+def test_unit_given_up_after_its_last_lease(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_queue.time, "time", clock)
+    queue = JobQueue(str(tmp_path / "queue.sqlite"), lease_seconds=10, max_attempts=2)
+    done, hung = WorkUnit("jss", "author", "https://a.org/1"), WorkUnit("jss", "author", "https://a.org/2")
+    queue.add([done, hung])
+
+    assert queue.claim("w1", limit=2) == [done, hung]
+    queue.complete(done, ["Ann Lee"])
+    clock.now += 11
+    assert queue.claim("w1", limit=2) == [hung]
+    clock.now += 11
+    assert queue.claim("w1", limit=2) == []
+
+    assert queue.counts()["failed"] == 1
+    assert queue.incomplete()[["url", "attempts", "error"]].values.tolist() == [["https://a.org/2", 2, "lease expired"]]
+    # one unfinished page leaves the whole journal out
+    assert len(queue.merge()) == 0
+
+
+def test_workers_merge_finished_roles(tmp_path, offline_scraper_options):
+    cache_dir = str(tmp_path / "pages")
+    shutil.copytree(FIXTURE_DIR, cache_dir)
+    os.remove(ResponseCache(cache_dir)._path(school_constants.DEPT_WEBSITES_PHD["harvard"][0]))
+    options = dict(offline_scraper_options, cache_dir=cache_dir, schools=["uiuc", "harvard"], journals=[])
+    queue_path = str(tmp_path / "queue.sqlite")
+
+    assert StatNameScraper(**options).enqueue(queue_path) == 4
+    assert StatNameScraper(**options).work(queue_path, worker="w1", max_units=1) == 1
+    # the missing page is handed back and claimed again until its attempts run out
+    assert StatNameScraper(**options).work(queue_path, worker="w2") == 2 + job_queue.MAX_ATTEMPTS
+
+    scraper = StatNameScraper(**options)
+    names_df = scraper.merge_queue(queue_path)
+    assert set(zip(names_df["school/journal"], names_df["role"])) == {
+        ("uiuc", "faculty"),
+        ("uiuc", "phd"),
+        ("harvard", "faculty"),
+    }
+    skipped = scraper.skipped_sources()
+    assert skipped[["school/journal", "role"]].values.tolist() == [["harvard", "phd"]]
+    assert skipped["reason"][0].startswith("failed https://statistics.fas.harvard.edu/graduate-students")
@@ -0,0 +1,43 @@
+import pandas as pd
+
+# local imports
+from StatNameScraper import StatNameScraper
+from gender_cache import GenderCache
+from name_index import MISSING_ID, NameIndex
+
+
+class FemaleTable:
+    """name table stand-in classifying every first name as female"""
+
+    cacheable = False
+
+    def lookup(self, names):
+        return {name: {"gender": "female", "probability": 0.9} for name in names}
+
+
+def test_spellings_share_a_person():
+    index = NameIndex()
+    assert index.add(["J. Smith", "Ann Lee", "j smith"]).tolist() == [0, 1, 0]
+    assert index.add(["Ann  Lee", "Bo Ray"]).tolist() == [1, 2]
+
+    persons = index.persons()
+    assert persons["name"].tolist() == ["J. Smith", "Ann Lee", "Bo Ray"]
+    assert persons["occurrences"].tolist() == [2, 2, 1]
+
+
+def test_missing_names_are_not_indexed():
+    index = NameIndex()
+    assert index.add(["Ann Lee", None, "Bo Ray", None]).tolist() == [0, MISSING_ID, 1, MISSING_ID]
+    assert index.persons()["occurrences"].tolist() == [1, 1]
+
+
+def test_missing_names_are_classified_as_nobody(tmp_path, monkeypatch):
+    cache = GenderCache(str(tmp_path / "gender_cache.sqlite"))
+    monkeypatch.setattr(StatNameScraper, "_classifier_kwargs", lambda self: {"cache": cache, "backend": FemaleTable()})
+    names_df = pd.DataFrame({"school/journal": ["uiuc"] * 3, "role": ["phd"] * 3, "name": ["Ann Lee", None, "Bo Ray"]})
+
+    classified = StatNameScraper(quota_ledger_path=None)._classify(names_df)
+
+    assert classified["person_id"].tolist() == [0, pd.NA, 1]
+    assert classified["pred"].tolist() == [0.0, "None", 0.0]
+    assert classified["last_name"].tolist() == ["Lee", "", "Ray"]
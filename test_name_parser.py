@@ -0,0 +1,16 @@
+import pandas as pd
+
+# local imports
+from name_parser import parse_names
+
+
+def test_suffixes_before_and_after_the_comma():
+    parts = parse_names(
+        pd.Series(["Smith Jr., John", "Jones, Sr., Mary Ann", "John Smith, Jr., Ph.D.", "J. Michael Doe"])
+    )
+
+    assert parts["first_name"].tolist() == ["John", "Mary", "John", "J."]
+    assert parts["last_name"].tolist() == ["Smith", "Jones", "Smith", "Doe"]
+    assert parts["suffix"].tolist() == ["Jr.", "Sr.", "Jr., Ph.D.", ""]
+    assert parts["given_name"].tolist() == ["John", "Mary", "John", "Michael"]
+    assert parts["usable_first_name"].all()
@@ -0,0 +1,65 @@
+import json
+import os
+import shutil
+
+# local imports
+from StatNameScraper import StatNameScraper
+from benchmark import FIXTURE_DIR
+from page_index import PageIndex, body_hash, roster_diff
+from response_cache import ResponseCache
+import journal_constants
+
+
+def test_lookup_ignores_volatile_markup(tmp_path):
+    index = PageIndex(str(tmp_path / "index.json"))
+    page = '<html><script>var t = 1;</script><input value="a1"><p>Ann Lee</p></html>'
+    index.update("jss", "author", "https://a.org/1", page, ["Ann Lee"], rules="r1")
+    index.save()
+
+    index = PageIndex(str(tmp_path / "index.json"))
+    reloaded = page.replace("var t = 1;", "var t = 2;").replace('value="a1"', 'value="b2"')
+    assert body_hash(reloaded) == body_hash(page)
+    assert index.lookup("jss", "author", "https://a.org/1", reloaded, rules="r1") == ["Ann Lee"]
+    assert index.lookup("jss", "author", "https://a.org/1", reloaded, rules="r2") is None
+    assert index.lookup("jasa", "author", "https://a.org/1", reloaded, rules="r1") is None
+    assert index.lookup("jss", "author", "https://a.org/1", page.replace("Ann", "Bea"), rules="r1") is None
+
+
+def test_url_keyed_index_is_migrated(tmp_path):
+    path = tmp_path / "index.json"
+    entry = {"source": "uiuc", "role": "phd", "hash": "h", "rules": "", "names": ["Ann Lee"]}
+    path.write_text(json.dumps({"https://a.org/phd": entry}))
+
+    assert PageIndex(str(path)).previous_names("uiuc", "phd") == ["Ann Lee"]
+
+
+def test_roster_diff():
+    changes = roster_diff(["Ann Lee", "Bob Ray"], ["Bob Ray", "Cy Young"])
+    assert changes == {"added": ["Cy Young"], "removed": ["Ann Lee"]}
+
+
+def test_failed_page_keeps_its_roster_pending(tmp_path, offline_scraper_options):
+    cache_dir = str(tmp_path / "pages")
+    shutil.copytree(FIXTURE_DIR, cache_dir)
+    cache = ResponseCache(cache_dir)
+    first, *_, last = journal_constants.WEBSITES["jss"]
+    options = dict(offline_scraper_options, cache_dir=cache_dir, schools=[], journals=["jss"], roles=["author"])
+    index_path = str(tmp_path / "index.json")
+
+    added_df, _ = StatNameScraper(**options).update_rosters(index_path)
+    assert len(added_df) > 0
+
+    # a new author on the first page while the last page of the roster cannot be fetched
+    page = cache.load(first)["body"].replace("</body>", '<div class="col-sm-9 authors">Wilma Newton</div></body>')
+    cache.store(first, page)
+    last_page = cache.load(last)["body"]
+    os.remove(cache._path(last))
+    scraper = StatNameScraper(**options)
+    added_df, diff_df = scraper.update_rosters(index_path)
+    assert len(diff_df) == 0
+    assert list(scraper.skipped_sources()["school/journal"]) == ["jss"]
+
+    cache.store(last, last_page)
+    added_df, diff_df = StatNameScraper(**options).update_rosters(index_path)
+    assert list(added_df["name"]) == ["Wilma Newton"]
+    assert list(diff_df["change"]) == ["added"]
@@ -0,0 +1,72 @@
+import pandas as pd
+
+# local imports
+from StatNameScraper import StatNameScraper
+from gender_cache import GenderCache
+from quota_ledger import QuotaLedger, QuotaScheduler
+
+
+class QuotaClient:
+    """genderize.io client stand-in with a fixed number of names per window"""
+
+    chunk_size = 10
+    country_id = None
+
+    def __init__(self, quota: int):
+        self.quota = quota
+        self.used = 0
+        self.batches = []
+        self.failed = {}
+
+    def lookup(self, names):
+        self.batches.append(list(names))
+        self.used += len(names)
+        return {name: {"gender": "female", "probability": 0.9, "count": 10} for name in names}
+
+    def rate_limit(self):
+        return {"limit": self.quota, "remaining": self.quota - self.used, "reset": 3600.0}
+
+
+def test_ledger_orders_pending_names(tmp_path):
+    ledger = QuotaLedger(str(tmp_path / "quota.sqlite"))
+    ledger.enqueue({"ann": (1, 2), "bea": (1, 0), "cat": (5, 2), "dot": (1, 1)})
+    ledger.enqueue({"ann": (1, 0)})
+
+    # most occurrences first, then the best role rank a name was queued with
+    pending = ledger.pending()
+    assert pending[0] == "cat" and set(pending[1:3]) == {"ann", "bea"} and pending[3] == "dot"
+    ledger.dequeue(["cat", "bea"])
+    assert ledger.pending(limit=1) == ["ann"]
+    assert ledger.num_pending() == 2
+
+
+def test_quota_released_in_role_order(tmp_path, monkeypatch):
+    ledger = QuotaLedger(str(tmp_path / "quota.sqlite"), daily_limit=2)
+    client = QuotaClient(quota=2)
+    cache = GenderCache(str(tmp_path / "gender_cache.sqlite"))
+    monkeypatch.setattr(
+        StatNameScraper,
+        "_classifier_kwargs",
+        lambda self: {"cache": cache, "backend": QuotaScheduler(client=client, ledger=ledger)},
+    )
+    # the columns get_all_names returns
+    names_df = pd.DataFrame(
+        {
+            "school/journal": ["uiuc", "jss", "uiuc"],
+            "role": ["phd", "author", "faculty"],
+            "name": ["Petra Stone", "Alma Brook", "Frida Lake"],
+        }
+    )
+
+    classified = StatNameScraper(quota_ledger_path=None)._classify(names_df)
+
+    assert client.batches == [["frida", "alma"]]
+    assert classified.set_index("role")["pred"].to_dict() == {"phd": "None", "author": 0.0, "faculty": 0.0}
+    assert ledger.pending() == ["petra"]
+
+    # the next window releases the student left waiting
+    client.quota, client.used = 2, 0
+    ledger.record(0, remaining=2, reset=3600.0)
+    StatNameScraper(quota_ledger_path=None)._classify(names_df.iloc[[0]])
+    assert client.batches[-1] == ["petra"]
+    assert ledger.num_pending() == 0
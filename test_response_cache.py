@@ -0,0 +1,68 @@
+import pytest
+
+# local imports
+from response_cache import CacheMissError, ResponseCache
+
+
+class Response:
+    def __init__(self, status_code: int, text: str = "", headers: dict = None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {} if headers is None else headers
+
+
+class Server:
+    """stand-in for a site answering a conditional GET with 304 when the ETag still matches"""
+
+    def __init__(self, body: str, etag: str):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append(dict(headers or {}))
+        if headers and headers.get("If-None-Match") == self.etag:
+            return Response(304)
+        return Response(200, self.body, {"ETag": self.etag, "Last-Modified": "Mon, 03 Oct 2022 10:00:00 GMT"})
+
+
+def test_revalidated_page_reuses_the_stored_body(tmp_path):
+    url = "https://stat.example.edu/faculty"
+    server = Server("<p>Ann Lee</p>", etag='"v1"')
+    cache = ResponseCache(str(tmp_path))
+
+    assert cache.fetch(url, server.get) == "<p>Ann Lee</p>"
+    assert server.requests[0] == {}
+
+    # unchanged: the 304 has no body and the cached one is served
+    assert ResponseCache(str(tmp_path)).fetch(url, server.get) == "<p>Ann Lee</p>"
+    assert server.requests[1] == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 03 Oct 2022 10:00:00 GMT"}
+
+    # changed: the new body replaces the stored one
+    server.body, server.etag = "<p>Bea Ray</p>", '"v2"'
+    cache = ResponseCache(str(tmp_path))
+    assert cache.fetch(url, server.get) == "<p>Bea Ray</p>"
+    assert cache.load(url)["etag"] == '"v2"'
+    assert cache.stats() == {"hits": 0, "misses": 1}
+
+
+def test_failed_response_is_not_cached(tmp_path):
+    url = "https://stat.example.edu/faculty"
+    cache = ResponseCache(str(tmp_path))
+
+    cache.fetch(url, lambda url, headers=None: Response(503, "busy"))
+    assert cache.load(url) is None
+
+
+def test_offline_serves_the_cache_without_requests(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store("https://stat.example.edu/faculty", "<p>Ann Lee</p>")
+
+    def get(url, headers=None):
+        raise AssertionError("offline cache sent a request")
+
+    offline = ResponseCache(str(tmp_path), offline=True)
+    assert offline.fetch("https://stat.example.edu/faculty", get) == "<p>Ann Lee</p>"
+    with pytest.raises(CacheMissError, match="No cached response for https://stat.example.edu/phd"):
+        offline.fetch("https://stat.example.edu/phd", get)
+    assert offline.stats() == {"hits": 1, "misses": 0}
@@ -0,0 +1,47 @@
+import math
+
+import pandas as pd
+
+# local imports
+from StatNameScraper import StatNameScraper
+from run_journal import RunJournal
+
+
+def test_replay_drops_a_torn_trailing_line(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = RunJournal(path)
+    journal.record_unit("jss", "author", "https://a.org/1", ["Ann Lee", "Bo Ray"])
+    journal.record_batch(["Ann Lee", "Bo Ray"], [0.0, "None"], [0.97, float("nan")])
+    journal.close()
+    # killed while writing the next entry
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "unit", "source": "jss", "role": "author", "url": "https://a.org/2", "na')
+
+    journal = RunJournal(path, resume=True)
+    assert journal.unit_names("jss", "author", "https://a.org/1") == ["Ann Lee", "Bo Ray"]
+    assert journal.unit_names("jss", "author", "https://a.org/2") is None
+    assert journal.person("Ann Lee") == (0.0, 0.97)
+    pred, probability = journal.person("Bo Ray")
+    assert pred == "None" and math.isnan(probability)
+    assert journal.num_batches == 1
+
+    # entries appended after the cut replay as well
+    journal.record_unit("jss", "author", "https://a.org/2", ["Cy Young"])
+    journal.close()
+    journal = RunJournal(path, resume=True)
+    assert journal.unit_names("jss", "author", "https://a.org/2") == ["Cy Young"]
+    assert journal.urls == {"https://a.org/1", "https://a.org/2"}
+
+    assert RunJournal(path).units == {}
+
+
+def test_resumed_run_reuses_journaled_predictions(tmp_path, offline_scraper_options):
+    options = dict(offline_scraper_options, schools=["uiuc"], journals=[], journal_path=str(tmp_path / "run.jsonl"))
+    first_df = pd.concat(StatNameScraper(**options).stream())
+
+    # a fresh gender cache and no genderize.io, so every prediction must come from the journal
+    options.update(resume=True, gender_cache_path=str(tmp_path / "empty.sqlite"), genderize_url="http://127.0.0.1:9")
+    resumed_df = pd.concat(StatNameScraper(**options).stream())
+
+    assert len(first_df) > 0
+    assert resumed_df[["name", "pred"]].values.tolist() == first_df[["name", "pred"]].values.tolist()
@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# local imports
+from StatNameScraper import StatNameScraper
+from sinks import make_sink, read_partitioned
+
+
+def names_batch():
+    return pd.DataFrame(
+        {
+            "school/journal": ["jss", "jasa", "jasa"],
+            "role": ["author"] * 3,
+            "name": ["Ann Lee", "Bob Ray", "Cy Young"],
+            "person_id": [0, 1, 2],
+            "pred": [0.0, 1.0, "None"],
+            "probability": [0.9, 0.8, np.nan],
+            "year": [None, 2021, 2020],
+        }
+    )
+
+
+def test_csv_and_jsonl_sinks_append_batches(tmp_path):
+    paths = [str(tmp_path / "names.csv"), str(tmp_path / "names.jsonl")]
+    sinks = [make_sink(path) for path in paths]
+    for sink in sinks:
+        sink.write(names_batch())
+        sink.write(names_batch())
+        sink.close()
+
+    assert len(pd.read_csv(paths[0])) == 6
+    with open(paths[1]) as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 6 and records[0]["name"] == "Ann Lee"
+
+
+def test_parquet_sink_types_columns(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    path = str(tmp_path / "names.parquet")
+    sink = make_sink(path)
+    sink.write(names_batch())
+    # a later batch whose ids are all missing is cast to the first batch's schema
+    sink.write(names_batch().assign(person_id=None, probability=np.nan))
+    sink.close()
+
+    table = pytest.importorskip("pyarrow.parquet").read_table(path)
+    assert table.num_rows == 6
+    assert pa.types.is_dictionary(table.schema.field("school/journal").type)
+    assert table.schema.field("person_id").type == pa.int64()
+    assert table.column("gender").to_pylist()[:3] == ["female", "male", None]
+
+
+def test_streamed_names_reach_every_sink(tmp_path, offline_scraper_options):
+    pytest.importorskip("pyarrow")
+    paths = [str(tmp_path / "names.csv"), str(tmp_path / "names.parquet")]
+    scraper = StatNameScraper(**offline_scraper_options, schools=[], journals=["jss"])
+    num_names = scraper.run_streaming(paths)
+
+    assert num_names > 0
+    assert len(pd.read_csv(paths[0])) == num_names
+    assert len(pd.read_parquet(paths[1])) == num_names
+
+
+def test_invalid_extension():
+    with pytest.raises(Exception, match="Invalid output file"):
+        make_sink("names.txt")
+
+
+def test_partitioned_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "names") + "/"
+    sink = make_sink(path)
+    sink.write(names_batch())
+    # rosters have no year column and are filed under the run year
+    sink.write(pd.DataFrame({"school/journal": ["uiuc"], "role": ["phd"], "name": ["Dee Park"], "pred": [0.0]}))
+    # streamed journal pages without volume years have no year column either
+    sink.write(pd.DataFrame({"school/journal": ["jss"], "role": ["author"], "name": ["Eve Hall"], "pred": [0.0]}))
+    sink.close()
+
+    assert (tmp_path / "names" / "source=jss" / "year=unknown").is_dir()
+    df = read_partitioned(path).set_index("name")
+    assert len(df) == 5
+    assert pd.isna(df.loc["Eve Hall", "year"])
+    assert pd.isna(df.loc["Ann Lee", "year"])
+    assert df.loc["Bob Ray", "year"] == 2021 and df.loc["Cy Young", "year"] == 2020
+    assert df.loc["Dee Park", "year"] > 2020
+    assert df.loc["Ann Lee", "gender"] == "female" and pd.isna(df.loc["Cy Young", "gender"])
+    assert str(df.loc["Bob Ray", "source"]) == "jasa"
+
+    # every partition reads back with plain read_parquet too
+    assert len(pd.read_parquet(path)) == 5
@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+# local imports
+from benchmark import FIXTURE_DIR
+from html_parser import PARSERS
+from parse_worker import parse_page
+from response_cache import ResponseCache
+from site_specs import SPECS
+import journal_constants
+import school_constants
+
+# Names the baseline per-school extractor found on every school and journal of the benchmark fixtures
+BASELINE_NAMES = os.path.join(FIXTURE_DIR, "baseline_names.json")
+# Module each parser needs, html.parser ships with python
+PARSER_MODULES = {"html.parser": None, "lxml": "lxml", "selectolax": "selectolax"}
+
+
+def test_missing_section_raises():
+    spec = SPECS[("uci", "phd")]
+    roster = "<table><tr><td><div class='name'>Ann Lee</div></td></tr></table>"
+    assert spec.extract(f"<html><table><tr><td>Staff</td></tr></table>{roster}</html>") == ["Ann Lee"]
+
+    # only one table left after a redesign, the roster was the second
+    with pytest.raises(Exception, match="Section 1 of uci phd missing"):
+        spec.extract(f"<html>{roster}</html>")
+
+
+def test_missing_name_in_section_raises():
+    section = "cn-list-row cn-list-item vcard individual fulltime-faculty senior-faculty stats-department"
+    spec = SPECS[("columbia", "faculty")]
+    assert spec.extract(f"<div class='{section}'><a class='mini-row-link'>Ann Lee</a></div>") == ["Ann Lee"]
+
+    with pytest.raises(Exception, match="No name in a section of columbia faculty"):
+        spec.extract(f"<div class='{section}'><a>Ann Lee</a></div>")
+
+
+def test_row_without_regex_match_raises():
+    spec = SPECS[("florida", "phd")]
+    assert spec.extract("<div class='entry-content'><p><strong>Ann Lee</strong></p></div>") == ["Ann Lee"]
+
+    with pytest.raises(Exception, match="No name in a row of florida phd"):
+        spec.extract("<div class='entry-content'><p><strong>Ann Lee</strong></p><p>Bo Ray</p></div>")
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_fixtures_match_the_baseline_extractor(parser):
+    if PARSER_MODULES[parser] is not None:
+        pytest.importorskip(PARSER_MODULES[parser])
+    with open(BASELINE_NAMES) as f:
+        baseline = json.load(f)
+    cache = ResponseCache(FIXTURE_DIR, offline=True)
+    websites = {
+        "faculty": school_constants.DEPT_WEBSITES_FACULTY,
+        "phd": school_constants.DEPT_WEBSITES_PHD,
+        "author": journal_constants.WEBSITES,
+    }
+
+    for key, expected in baseline.items():
+        source, role = key.split("/")
+        names = []
+        for url in websites[role][source]:
+            names.extend(parse_page(source, role, url, cache.load(url)["body"], parser))
+        assert names == expected, key